@@ -0,0 +1,95 @@
+import streamlit as st
+from workoutPlanner import save_workout_plan_batched, Exercise, WorkoutDay, WorkoutPlan
+from renderTiming import timed
+from appSetup import get_db_connection
+
+
+@st.fragment
+@timed("manual plan builder")
+def manual_plan_builder():
+    st.subheader("📝 Create Your Plan Manually")
+    manual_goal = st.text_input("Goal:")
+    num_days = st.number_input(
+        "Days per week", min_value=1, step=1, key="num_manual_days"
+    )
+
+    manual_workout_days = []
+    # iterates over each workout day
+    for i in range(int(num_days)):
+        # ex_key is the exercise count for the day
+        ex_key = f"manual_exercise_count_{i}"
+        if ex_key not in st.session_state:
+            st.session_state[ex_key] = 1  # default exercise is 1
+
+        st.markdown(f"### Day {i + 1}")
+        focus = st.text_input(f"Focus {i + 1}", key=f"focus_{i}")
+        exercises = []
+
+        # iterates over each exercise added so far in the day
+        for j in range(st.session_state[ex_key]):
+            st.markdown(f"**Exercise {j + 1}**")
+            name = st.text_input("Exercise Name", key=f"ex_name_{i}_{j}")
+            sets = st.number_input("Sets", min_value=1, value=3, key=f"ex_sets_{i}_{j}")
+            reps = st.number_input(
+                "Reps", min_value=1, value=10, key=f"ex_reps_{i}_{j}"
+            )
+            rest = st.number_input(
+                "Rest (seconds)",
+                min_value=0,
+                value=60,
+                key=f"ex_rest_{i}_{j}",
+            )
+            weight = st.number_input(
+                "Weight (lbs)", min_value=0, value=0, key=f"ex_weight_{i}_{j}"
+            )
+            # adds the exercise to the exercises list
+            exercises.append(
+                Exercise(
+                    name=name,
+                    sets=sets,
+                    reps=reps,
+                    rest_time=rest,
+                    weight=weight or None,
+                )
+            )
+        # creates a workout day with the exercises and adds it to the manual workout days list
+        manual_workout_days.append(
+            WorkoutDay(day_name=f"Day {i + 1}", focus=focus, exercises=exercises)
+        )
+        # if button is clicked, the exercise count will be incremented so another input set is shown
+        if st.button(
+            f" Add Exercise to Day {i + 1}", key=f"add_manual_exercise_btm_{i}"
+        ):
+            st.session_state[ex_key] += 1
+            st.rerun(scope="fragment")
+
+    if st.button("💾 Save Manual Plan"):
+        # creates full workout plan object with user entered info
+        manual_plan = WorkoutPlan(
+            goal=manual_goal,
+            days_per_week=len(manual_workout_days),
+            workout_days=manual_workout_days,
+            user_email=st.session_state.user_email,
+        )
+        with get_db_connection() as conn:
+            save_workout_plan_batched(manual_plan, conn)
+        st.success("✅ Manual plan saved!")
+        # reset exercise count for each day to 1 after saving
+        for i in range(len(manual_workout_days)):
+            st.session_state[f"manual_exercise_count_{i}"] = 1
+        # reset radio
+        st.session_state["reset_option"] = True
+        st.session_state["manual_plan_saved"] = True
+        # reset number of days
+        del st.session_state["num_manual_days"]
+        # clear user input fields
+        for i in range(len(manual_workout_days)):
+            del st.session_state[f"focus_{i}"]
+            ex_key = f"manual_exercise_count_{i}"
+            for j in range(st.session_state[ex_key]):
+                for field in ["name", "sets", "reps", "rest", "weight"]:
+                    key = f"ex_{field}_{i}_{j}"
+                    if key in st.session_state:
+                        del st.session_state[key]
+            del st.session_state[ex_key]
+        st.rerun()
@@ -0,0 +1,131 @@
+import streamlit as st
+from workoutPlanner import (
+    save_workout_plan_batched,
+    Exercise,
+    WorkoutDay,
+)
+from renderTiming import timed
+from appSetup import get_db_connection
+from planDiff import update_workout_plan
+
+
+@st.fragment
+@timed("plan editor")
+def generated_plan_editor():
+    plan = st.session_state.generated_plan
+    st.subheader("📝 Edit Your Plan Before Saving")
+
+    updated_days = []
+    # for each day in the plan, it will show the day name and focus
+    for i, day in enumerate(plan.workout_days):
+        st.markdown(f"### {day.day_name} – {day.focus}")
+        updated_exercises = []
+        ex_key = f"exercise_count_{i}"
+        # Has streamlit already created the exercise count for this day?
+        if ex_key not in st.session_state:
+            st.session_state[ex_key] = len(day.exercises)
+        # if the exercise count is not in the session state, it will be created
+        for j in range(st.session_state[ex_key]):  # for each exercise in the day
+            key_prefix = f"{i}_{j}"
+            if j < len(day.exercises):  # if 'j' is an original workout
+                ex = day.exercises[j]
+            else:  # if 'j' is a new workout added by user
+                ex = Exercise(name="", sets=3, reps=10, rest_time=60, weight=None)
+
+            # creates a column for each input field
+            col1, col2, col3, col4, col5, col6 = st.columns([2, 1, 1, 1, 1, 1])
+            with col1:
+                name = st.text_input(
+                    "Exercise", value=ex.name, key=f"ex_name_{key_prefix}"
+                )
+            with col2:
+                sets = st.number_input(
+                    "Sets", value=ex.sets, min_value=1, key=f"ex_sets_{key_prefix}"
+                )
+            with col3:
+                try:
+                    reps_val = int(ex.reps)
+                except (ValueError, TypeError):
+                    reps_val = 1
+
+                reps = st.number_input(
+                    "Reps", value=reps_val, min_value=1, key=f"ex_reps_{key_prefix}"
+                )
+            with col4:
+                rest = st.number_input(
+                    "Rest",
+                    value=ex.rest_time,
+                    min_value=0,
+                    key=f"ex_rest_{key_prefix}",
+                )
+            with col5:
+                # weights are whole pounds (INTEGER column); a float value next
+                # to the int min_value makes number_input raise
+                try:
+                    weight_val = int(ex.weight)
+                except (ValueError, TypeError):
+                    weight_val = 0
+
+                weight = st.number_input(
+                    "Weight",
+                    value=weight_val,
+                    min_value=0,
+                    key=f"ex_weight_{key_prefix}",
+                )
+
+            with col6:
+                remove = st.checkbox("❌ Remove", key=f"ex_remove_{key_prefix}")
+
+            # if the remove checkbox is not checked, the exercise will be added to the updated exercises list
+            if not remove:
+                updated_exercises.append(
+                    Exercise(
+                        name=name,
+                        sets=sets,
+                        reps=reps,
+                        rest_time=rest,
+                        weight=weight if weight != 0 else None,
+                        id=ex.id,
+                    )
+                )
+        # if the add exercise button is clicked, the exercise count will be incremented
+        if st.button(f"➕ Add Exercise to {day.day_name}", key=f"add_exercise_btn_{i}"):
+            st.session_state[ex_key] += 1
+            st.rerun(scope="fragment")
+
+        # adds the updated exercises to the updated days list
+        updated_days.append(
+            WorkoutDay(
+                day_name=day.day_name,
+                focus=day.focus,
+                exercises=updated_exercises,
+                id=day.id,
+            )
+        )  # end of for loop, it appends days whether updated or not to the updated days list
+
+    # after all days are updated, the plan will be updated
+    plan.workout_days = updated_days
+
+    if st.button("💾 Save this plan"):
+        with get_db_connection() as conn:
+            if "editing_plan_original" in st.session_state:
+                # only the rows the user changed are written
+                update_workout_plan(
+                    conn,
+                    st.session_state.editing_plan_id,
+                    st.session_state.editing_plan_original,
+                    plan,
+                )
+                del st.session_state["editing_plan_id"]
+                del st.session_state["editing_plan_original"]
+            else:
+                save_workout_plan_batched(plan, conn)
+
+        st.success("🎉 Plan saved to your account!")
+        # deletes the fields from the session state so text fields are empty
+        for field in ["goal", "time", "days"]:
+            if field in st.session_state:
+                del st.session_state[field]
+
+        del st.session_state["generated_plan"]
+        st.rerun()
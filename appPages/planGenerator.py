@@ -0,0 +1,211 @@
+import copy
+import streamlit as st
+import os
+import openai
+from workoutPlanner import PlanParseError
+from renderTiming import timed
+from generationCache import record_regeneration
+from generationJobs import JobLimitReached, JobQueueFull, submit_generation
+from localPlanner import build_local_plan
+from nutritionPlanner import build_local_nutrition_plan, generate_nutrition_plan
+from requestRouter import route_request
+
+openai.api_key = os.getenv("OPENAI_API_KEY")
+# seconds to wait for GPT before offering the offline draft instead
+LLM_LATENCY_BUDGET = float(os.getenv("LLM_LATENCY_BUDGET", 25))
+GENERATION_MODES = {
+    "Show days as they're written": "stream",
+    "All days at once (fastest)": "parallel",
+    "Classic": "classic",
+}
+
+
+@st.fragment
+@timed("AI plan generator")
+def gpt_plan_generator():
+    for kind, message in st.session_state.pop("generation_notices", []):
+        getattr(st, kind)(message)
+
+    goal = st.text_input(
+        "What is your goal?",
+        # if goal is not in session state, it will be an empty string
+        value=st.session_state.get("goal", ""),
+        key="goal",
+    )
+    time = st.number_input(
+        "How many minutes per day?",
+        min_value=10,
+        step=5,
+        value=st.session_state.get("time", 60),
+        key="time",
+    )
+    days = st.slider(
+        "How many days per week?",
+        1,
+        7,
+        value=st.session_state.get("days", 3),
+        key="days",
+    )
+    generation_mode = st.radio(
+        "Generation mode",
+        list(GENERATION_MODES),
+        key="generation_mode",
+        horizontal=True,
+    )
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        generate = st.button("Generate with AI")
+    with col2:
+        # skips the cached answer for these inputs and asks GPT again
+        regenerate = st.button("🔄 Regenerate")
+    with col3:
+        # rule-based plan built locally, no waiting on the API
+        instant = st.button("⚡ Instant draft")
+
+    workout_plan = None
+    # shown after the rerun that brings up the editor
+    notices = []
+    # the goal box is free text, so eating requests end up here too; ones that
+    # name food go to the nutrition planner (see requestRouter)
+    route = None
+    if (generate or regenerate) and goal:
+        route = route_request(goal)
+    if route is not None and route.assistant_type == "nutrition_planner":
+        with st.spinner("Sounds like a nutrition question, writing a meal plan..."):
+            try:
+                st.session_state.nutrition_plan = generate_nutrition_plan(
+                    route.description
+                )
+            except (openai.OpenAIError, PlanParseError):
+                st.session_state.nutrition_plan = build_local_nutrition_plan(
+                    route.description
+                )
+                st.warning(
+                    "⚠️ The AI is unavailable right now, so here is a generic "
+                    "offline meal plan instead."
+                )
+    elif instant and goal and time and days:
+        workout_plan = build_local_plan(goal, time, days)
+        notices.append(
+            ("success", "✅ Draft ready! Edit it below or generate one with AI.")
+        )
+    # if all the fields are filled, the button will be enabled
+    elif (generate or regenerate) and goal and time and days:
+        if regenerate:
+            record_regeneration()
+        # runs in the background; the status fragment below polls it, so the rest
+        # of the app stays usable while GPT writes. a job this replaces still
+        # finishes, and fills the cache
+        try:
+            job = submit_generation(
+                st.session_state.user_email,
+                goal,
+                time,
+                days,
+                GENERATION_MODES[generation_mode],
+                regenerate=regenerate,
+            )
+        except (JobLimitReached, JobQueueFull) as e:
+            st.warning(f"⏳ {e}")
+        else:
+            st.session_state.generation_job = job
+
+    if st.session_state.get("nutrition_plan"):
+        show_nutrition_plan(st.session_state.nutrition_plan)
+
+    if st.session_state.get("generation_job") is not None:
+        generation_job_status()
+
+    if workout_plan is not None:
+        show_generated_plan(workout_plan, notices)
+
+
+# reruns on its own every second while a job is pending, and only itself; once the
+# job is done the plan is handed to the editor with a full rerun
+@st.fragment(run_every=1)
+def generation_job_status():
+    job = st.session_state.get("generation_job")
+    if job is None:
+        return
+    if job.done():
+        finish_generation(job)
+
+    if job.state == "queued":
+        label = f"Waiting for a free generator... {job.elapsed():.0f}s"
+    else:
+        label = f"Generating plan... {job.elapsed():.0f}s"
+    with st.status(label, expanded=bool(job.days)):
+        # days of a streamed plan, previewed while the rest is still coming
+        for day in list(job.days):
+            st.markdown(f"**{day.day_name} – {day.focus}**")
+            st.caption(", ".join(ex.name for ex in day.exercises))
+    if job.elapsed() > LLM_LATENCY_BUDGET and st.button(
+        "⚡ Use an offline draft instead"
+    ):
+        # the job keeps going, and holds this user's slot, until it finishes; it
+        # still fills the cache for next time
+        del st.session_state["generation_job"]
+        show_generated_plan(
+            build_local_plan(job.goal, job.minutes, job.day_count),
+            [("success", "✅ Draft ready! Edit it below or generate one with AI.")],
+        )
+
+
+def finish_generation(job):
+    del st.session_state["generation_job"]
+    if job.error is not None:
+        plan = build_local_plan(job.goal, job.minutes, job.day_count)
+        notices = [
+            (
+                "warning",
+                "⚠️ The AI is unavailable right now, so here is an offline draft "
+                "instead.",
+            )
+        ]
+    elif job.from_cache:
+        plan = job.plan
+        notices = [("success", "✅ Plan generated! (reused a saved answer)")]
+    else:
+        # sessions that asked for the same plan share the job, and each one
+        # edits its own copy
+        plan = copy.deepcopy(job.plan)
+        notices = [
+            ("success", "✅ Plan generated!"),
+            ("caption", f"Ready after {job.elapsed():.1f}s"),
+        ]
+    show_generated_plan(plan, notices)
+
+
+def show_generated_plan(plan, notices):
+    plan.user_email = st.session_state.user_email
+    st.session_state.generated_plan = plan
+    st.session_state.generation_notices = notices
+    # the editor is a separate section, so rerun the app to show it
+    st.rerun()
+
+
+def show_nutrition_plan(plan):
+    st.subheader("🥗 Nutrition plan")
+    st.caption(plan.request)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Calories", plan.daily_calories or "–")
+    col2.metric("Protein", f"{plan.protein_g} g" if plan.protein_g else "–")
+    col3.metric("Carbs", f"{plan.carbs_g} g" if plan.carbs_g else "–")
+    col4.metric("Fat", f"{plan.fat_g} g" if plan.fat_g else "–")
+    for meal in plan.meals:
+        details = ", ".join(
+            part
+            for part in (
+                f"{meal.calories} kcal" if meal.calories else "",
+                f"{meal.protein_g} g protein" if meal.protein_g else "",
+            )
+            if part
+        )
+        st.markdown(
+            f"- **{meal.name}**: {meal.foods}" + (f" ({details})" if details else "")
+        )
+    for tip in plan.tips:
+        st.caption(f"💡 {tip}")
+    if st.button("Dismiss nutrition plan"):
+        del st.session_state["nutrition_plan"]
+        st.rerun(scope="fragment")
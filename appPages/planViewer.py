@@ -0,0 +1,60 @@
+import streamlit as st
+from renderTiming import timed
+from appSetup import load_plan_snapshots
+from planActions.editPlan import edit_plan
+from planActions.deletePlan import delete_plan
+from planActions.displayPlan import display_plan
+
+
+@st.fragment
+@timed("plan viewer")
+def plan_viewer():
+    if st.session_state.get("deleted_success"):
+        st.success("✅ Plan deleted successfully!")
+        del st.session_state["deleted_success"]
+
+    st.title("📋 Saved Workout Plan")
+
+    try:
+        # every plan with its days and exercises, one query and cached
+        plans = load_plan_snapshots(st.session_state.user_email)
+
+        if not plans:
+            st.warning(
+                "No workout plans found for your account! Please create a new plan."
+            )
+        else:
+            # Render dropdown and plan viewer
+            plan_labels = [
+                f"Plan {i + 1}: {plan.goal} ({plan.days_per_week} days/week)"
+                for i, plan in enumerate(plans)
+            ]
+            selected_label = st.selectbox("📅 Choose a plan to view:", plan_labels)
+            selected_index = plan_labels.index(selected_label)
+            plan = plans[selected_index]
+
+            st.subheader(plan_labels[selected_index])
+
+            # Show plan summary
+            st.caption(f"Created on {plan.created_at}")
+
+            # plan action UI
+
+            with st.expander("⚙️ Plan Actions"):
+                # EDIT PLAN LOGIC
+                if st.button("✏️ Edit this plan"):
+                    edit_plan(plan)
+
+                # DELETE PLAN LOGIC
+                # if you click on delete plan, it will show the confirm window
+                if st.button("🗑️ Delete this plan"):
+                    st.session_state.show_confirm = True
+
+            # will only run if the confirm window is clicked
+            delete_plan(plan.id)
+
+            # Display selected plan
+            display_plan(plan)
+
+    except Exception as e:
+        st.error(f"❌ Database error: {e}")
@@ -0,0 +1,286 @@
+import streamlit as st
+from datetime import date, timedelta
+from renderTiming import timed
+from appSetup import load_all_plans, get_db_connection
+from progressActions.editProgress import edit_progress, edit_progress_batch
+from progressActions.deleteProgress import deleteProgress, delete_progress_batch
+from progressActions.progressQueries import (
+    PAGE_SIZE,
+    get_progress_exercises,
+    get_progress_page,
+    get_progress_series,
+)
+from progressActions.progressRollups import get_rollups, get_weekly_volume
+from progressActions.progressTransfer import (
+    ProgressImportError,
+    detect_format,
+    export_progress,
+    import_progress,
+)
+
+# progress tab date filters, in days back from today
+DATE_RANGES = {
+    "All time": None,
+    "Last 30 days": 30,
+    "Last 90 days": 90,
+    "Last year": 365,
+}
+
+
+# weights are NULL for bodyweight and timed exercises, so their tiles show a dash
+def _lbs(weight):
+    return "–" if weight is None else f"{weight:.0f} lbs"
+
+
+@st.fragment
+@timed("progress tracker")
+def progress_tracker():
+    st.title("📈 View Workout Progress")
+
+    plans = load_all_plans(st.session_state.user_email)
+
+    if not plans:
+        st.warning("No workout plans found.")
+    else:
+        plan_labels = [
+            f"Plan {i + 1}: {goal} ({days} days/week)"
+            for i, (_, goal, days, _) in enumerate(plans)
+        ]
+        selected_label = st.selectbox(
+            "📈 Select a plan to view progress:",
+            plan_labels,
+            key="progress_plan_select",
+        )
+        selected_index = plan_labels.index(selected_label)
+        selected_plan_id = plans[selected_index][0]
+
+        with st.expander("📥 Import or export history"):
+            uploaded = st.file_uploader(
+                "Import entries (CSV with a header row, or NDJSON)",
+                type=["csv", "ndjson", "jsonl"],
+                key="progress_import_file",
+            )
+            if uploaded is not None and st.button("Import"):
+                try:
+                    with get_db_connection() as conn:
+                        report = import_progress(
+                            conn,
+                            st.session_state.user_email,
+                            uploaded,
+                            detect_format(uploaded.name),
+                        )
+                except ProgressImportError as e:
+                    st.error(f"❌ Import failed, nothing was saved: {e}")
+                else:
+                    st.success(
+                        f"✅ Imported {report['inserted']} of {report['rows']} rows "
+                        f"({report['duplicates']} already present, "
+                        f"{report['rows_per_second']:.0f} rows/s)"
+                    )
+                    for reason, rejected in report["rejected"].items():
+                        st.warning(
+                            f"{rejected['count']} rows skipped, {reason} "
+                            f"(rows {', '.join(map(str, rejected['rows']))}, ...)"
+                        )
+            if st.button("Prepare CSV export of this plan"):
+                import io
+
+                out = io.StringIO()
+                with get_db_connection() as conn:
+                    export_progress(
+                        conn,
+                        out,
+                        user_email=st.session_state.user_email,
+                        plan_id=selected_plan_id,
+                    )
+                st.download_button(
+                    "⬇️ Download CSV",
+                    out.getvalue(),
+                    file_name=f"progress_plan_{selected_plan_id}.csv",
+                    mime="text/csv",
+                )
+
+        with get_db_connection() as conn:
+            exercise_names = get_progress_exercises(
+                conn, st.session_state.user_email, selected_plan_id
+            )
+
+        if not exercise_names:
+            st.info("No progress data yet. Log some workouts!")
+        else:
+            import pandas as pd
+
+            selected_exercise = st.selectbox(
+                "Select an exercise to view progress:",
+                exercise_names,
+                key="exercise_filter",
+            )
+            range_label = st.selectbox(
+                "Date range", list(DATE_RANGES), key="progress_date_range"
+            )
+            start_date = None
+            if DATE_RANGES[range_label] is not None:
+                start_date = date.today() - timedelta(days=DATE_RANGES[range_label])
+
+            # summary tiles come from the rollups: constant work however long
+            # the history is
+            with get_db_connection() as conn:
+                rollup = get_rollups(
+                    conn, st.session_state.user_email, [selected_exercise]
+                ).get(selected_exercise)
+                recent_weeks = get_weekly_volume(
+                    conn, st.session_state.user_email, selected_exercise
+                )
+            if rollup:
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric(
+                    "Last time",
+                    f"{rollup['latest_sets']}x{rollup['latest_reps']} @ "
+                    f"{_lbs(rollup['latest_weight'])}",
+                    help=f"{rollup['latest_date']:%Y-%m-%d}",
+                )
+                col2.metric("Best weight", _lbs(rollup["best_weight"]))
+                col3.metric("Best est. 1RM", _lbs(rollup["best_e1rm"]))
+                col4.metric("Sessions", rollup["total_sessions"])
+            if recent_weeks:
+                st.bar_chart(
+                    pd.DataFrame(
+                        recent_weeks, columns=["Week", "Volume", "Entries"]
+                    ).set_index("Week")[["Volume"]]
+                )
+
+            # pages are addressed by the last row of the previous page; the stack
+            # of those keys resets whenever the filters change
+            page_filters = (selected_plan_id, selected_exercise, range_label)
+            if st.session_state.get("progress_page_filters") != page_filters:
+                st.session_state.progress_page_filters = page_filters
+                st.session_state.progress_page_cursors = []
+            cursors = st.session_state.progress_page_cursors
+
+            with get_db_connection() as conn:
+                progress = get_progress_page(
+                    conn,
+                    st.session_state.user_email,
+                    selected_plan_id,
+                    selected_exercise,
+                    start_date=start_date,
+                    after=cursors[-1] if cursors else None,
+                )
+
+            filtered_df = pd.DataFrame(
+                progress,
+                columns=[
+                    "ID",
+                    "Exercise",
+                    "Day",
+                    "Sets",
+                    "Reps",
+                    "Weight",
+                    "Notes",
+                    "Date",
+                ],
+            )
+            st.dataframe(
+                filtered_df.drop(columns="ID"),
+                use_container_width=True,
+                hide_index=True,
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                if cursors and st.button("⬅️ Newer entries"):
+                    cursors.pop()
+                    st.rerun(scope="fragment")
+            with col2:
+                if len(progress) == PAGE_SIZE and st.button("Older entries ➡️"):
+                    last = progress[-1]
+                    cursors.append((last[7], last[0]))
+                    st.rerun(scope="fragment")
+
+            if not filtered_df.empty:
+                st.markdown("### ✏️ Modify or Delete Progress Entry")
+
+                # Use filtered DataFrame's index for selection
+                selected_row = st.selectbox(
+                    "Select a progress entry to modify:",
+                    filtered_df.index,
+                    format_func=lambda i: f"{filtered_df.at[i, 'Exercise']} on {filtered_df.at[i, 'Date']}",
+                )
+                edit_progress(filtered_df, selected_row)
+
+                deleteProgress(filtered_df, selected_row)
+
+                with st.expander("🗂️ Edit or delete several entries"):
+                    edit_progress_batch(filtered_df)
+                    delete_progress_batch(filtered_df)
+
+            if st.checkbox("📊 Show chart by exercise"):
+                with get_db_connection() as conn:
+                    series = get_progress_series(
+                        conn,
+                        st.session_state.user_email,
+                        selected_plan_id,
+                        selected_exercise,
+                        start_date=start_date,
+                    )
+                chart_df = pd.DataFrame(
+                    series, columns=["Date", "Max weight", "Volume", "Best set reps"]
+                ).set_index("Date")
+                st.line_chart(chart_df[["Max weight"]])
+                st.line_chart(chart_df[["Volume"]])
+
+            if st.checkbox("🏋️ Strength and training load"):
+                from progressActions.progressAnalytics import (
+                    detect_prs,
+                    load_progress_frame,
+                    muscle_group_weekly_load,
+                    rolling_averages,
+                    session_summary,
+                    weekly_volume,
+                )
+
+                with get_db_connection() as conn:
+                    history = load_progress_frame(
+                        conn, st.session_state.user_email, selected_plan_id
+                    )
+                sessions = rolling_averages(session_summary(history))
+                exercise_sessions = sessions[
+                    sessions["exercise_name"] == selected_exercise
+                ].set_index("session_date")
+                st.markdown("#### Estimated 1RM (4-session average)")
+                st.line_chart(exercise_sessions[["best_e1rm", "best_e1rm_avg"]])
+
+                weekly = weekly_volume(history)
+                st.markdown("#### Weekly volume")
+                st.bar_chart(
+                    weekly[weekly["exercise_name"] == selected_exercise].set_index(
+                        "week"
+                    )[["volume"]]
+                )
+
+                prs = detect_prs(history)
+                prs = prs[prs["e1rm_pr"] | prs["weight_pr"]]
+                st.markdown("#### Personal records")
+                st.dataframe(
+                    prs.sort_values("completed_date", ascending=False)
+                    .head(20)[
+                        [
+                            "exercise_name",
+                            "weight_used",
+                            "reps_done",
+                            "e1rm",
+                            "completed_date",
+                        ]
+                    ]
+                    .round({"e1rm": 1}),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+
+                load = muscle_group_weekly_load(history)
+                if not load.empty:
+                    st.markdown("#### Weekly load by muscle group")
+                    st.bar_chart(
+                        load.pivot(
+                            index="week", columns="muscle_group", values="load"
+                        ).fillna(0)
+                    )
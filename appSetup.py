@@ -1,9 +1,24 @@
 import streamlit as st
 import psycopg2
-import psycopg2.extras
-import bcrypt
+import psycopg2.errors
 from dotenv import load_dotenv
-import os
+from auth import (
+    AuthBusy,
+    AuthThrottled,
+    authenticate,
+    hash_password,
+    issue_token,
+    revoke_token,
+    verify_token,
+)
+from dbPool import pooled_connection
+from planCache import get_last_sets, get_plan_list, get_user_plans
+from workoutPlanner import (
+    PLAN_LIST_SQL,
+    PLAN_SNAPSHOTS_SQL,
+    get_last_session_sets,
+    plan_from_dict,
+)
 
 load_dotenv()
 
@@ -19,21 +34,23 @@ def register_user():
             st.error("Please fill both fields in.")
             return
 
-        hashed_pw = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+        try:
+            hashed_pw = hash_password(new_password)
+        except AuthBusy as e:
+            st.error(f"❌ {e}")
+            return
 
         try:
-            conn = get_db_connection()
-            with conn.cursor() as cur:
-                cur.execute(
-                    "INSERT INTO users (email, password) VALUES (%s, %s)",
-                    (new_email, hashed_pw),
-                )
-                conn.commit()
-                st.success("✅ Registered! Please log in.")
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "INSERT INTO users (email, password) VALUES (%s, %s)",
+                        (new_email, hashed_pw),
+                    )
+                    conn.commit()
+                    st.success("✅ Registered! Please log in.")
         except psycopg2.errors.UniqueViolation:
             st.error("❌ Email already registered.")
-        finally:
-            conn.close()
 
 
 def login_user():
@@ -42,24 +59,43 @@ def login_user():
     password = st.sidebar.text_input("Password", type="password", key="login_password")
 
     if st.sidebar.button("Log In"):
-        conn = get_db_connection()
-        # Use DictCursor to fetch user data as a dictionary
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            cur.execute("SELECT * FROM users WHERE email = %s", (email,))
-            user = cur.fetchone()
-        conn.close()
-
-        # Check if user exists and password is correct
-        if user and bcrypt.checkpw(password.encode(), user["password"].encode()):
-            st.session_state.user_email = user["email"]
+        try:
+            user_email = authenticate(email, password)
+        except (AuthThrottled, AuthBusy) as e:
+            st.error(f"❌ {e}")
+            return
+
+        if user_email:
+            st.session_state.user_email = user_email
             st.session_state.just_logged_in = True
+            # a refresh or a new tab with this link skips logging in again
+            st.query_params["session"] = issue_token(user_email)
             st.rerun()
         else:
             st.error("Invalid credentials.")
 
 
+# signs the session back in from the token in the URL, without touching the
+# database or bcrypt; a bad or expired token is dropped from the URL
+def restore_session():
+    token = st.query_params.get("session")
+    if "user_email" in st.session_state or not token:
+        return
+    email = verify_token(token)
+    if email:
+        st.session_state.user_email = email
+    else:
+        del st.query_params["session"]
+
+
 def logout_user():
     if st.sidebar.button("Log Out"):
+        token = st.query_params.get("session")
+        if token:
+            revoke_token(token)
+            del st.query_params["session"]
+        # a job still running finishes on its own and frees its slot then
+        st.session_state.pop("generation_job", None)
         st.session_state.pop("user_email", None)
         st.session_state.pop("just_logged_in", None)
         st.rerun()
@@ -67,40 +103,46 @@ def logout_user():
 
 def get_all_plans(conn, user_email):
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT id, goal, days_per_week, created_at
-            FROM workout_plans
-            WHERE user_email = %s
-            ORDER BY created_at DESC
-        """,
-            (user_email,),
-        )
+        cur.execute(PLAN_LIST_SQL, {"user": user_email})
         return cur.fetchall()
 
 
-# one row per exercise
-def get_days_and_exercises(conn, plan_id):
+# whole plans as WorkoutPlan objects in one query (see PLAN_SNAPSHOTS_SQL): all of
+# the user's plans, newest first, or just the one when plan_id is given
+def get_plan_snapshots(conn, user_email, plan_id=None):
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT wd.id, wd.day_name, wd.focus,
-                   we.name, we.sets, we.reps, we.rest_time, we.weight
-            FROM workout_days wd
-            JOIN workout_exercises we ON wd.id = we.day_id
-            WHERE wd.plan_id = %s
-            ORDER BY wd.id, we.id
-        """,
-            (plan_id,),
-        )
-        return cur.fetchall()
+        cur.execute(PLAN_SNAPSHOTS_SQL, {"user": user_email, "plan": plan_id})
+        return [plan_from_dict(row[0]) for row in cur.fetchall()]
+
 
+# cached versions of the queries above; a connection is only borrowed on a miss,
+# so reruns that just change widget state never touch the database for plan data.
+# the cached objects are shared between sessions: copy a plan before changing it
+def load_all_plans(user_email):
+    def load():
+        with get_db_connection() as conn:
+            return get_all_plans(conn, user_email)
 
-# connect to db
+    return get_plan_list(user_email, load)
+
+
+def load_plan_snapshots(user_email):
+    def load():
+        with get_db_connection() as conn:
+            return get_plan_snapshots(conn, user_email)
+
+    return get_user_plans(user_email, load)
+
+
+def load_last_session_sets(user_email, exercise_names):
+    def load():
+        with get_db_connection() as conn:
+            return get_last_session_sets(conn, user_email, exercise_names)
+
+    return get_last_sets(user_email, exercise_names, load)
+
+
+# borrow a connection from the shared pool, use as `with get_db_connection() as conn:`
+# the connection goes back to the pool (not closed) when the block ends
 def get_db_connection():
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST"),
-        port=os.getenv("DB_PORT"),
-        dbname=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-    )
+    return pooled_connection()
@@ -0,0 +1,199 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from dbPool import pooled_connection
+from planCache import LRUCache
+
+# bcrypt cost for new hashes; every +1 doubles the time a hash or check takes
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# bcrypt runs on this many worker threads (it releases the GIL while hashing), so
+# a burst of logins uses at most that many cores and other sessions' reruns keep
+# going. past MAX_PENDING_HASHES queued or running, new requests are turned away
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", 2))
+MAX_PENDING_HASHES = int(os.getenv("AUTH_MAX_PENDING", 16))
+# login attempts allowed per email inside the window, successful ones included
+LOGIN_MAX_ATTEMPTS = int(os.getenv("LOGIN_MAX_ATTEMPTS", 5))
+LOGIN_ATTEMPT_WINDOW = float(os.getenv("LOGIN_ATTEMPT_WINDOW", 300))
+SESSION_TOKEN_TTL = int(os.getenv("SESSION_TOKEN_TTL", 7 * 24 * 3600))
+# tokens are signed with AUTH_SECRET; without one a random key is made per process,
+# so tokens stop working when the server restarts
+_secret = (os.getenv("AUTH_SECRET") or "").encode() or secrets.token_bytes(32)
+
+
+class AuthBusy(Exception):
+    pass
+
+
+class AuthThrottled(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Too many login attempts, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="bcrypt")
+_pending = 0
+_attempts = {}  # lowercased email -> deque of attempt times (monotonic)
+_tokens = LRUCache(int(os.getenv("SESSION_CACHE_SIZE", 4096)))
+_revoked = {}  # token -> expiry, until the token would have expired anyway
+_stats = {
+    "hashes": 0,
+    "checks": 0,
+    "bcrypt_time": 0.0,  # seconds spent hashing and checking, worker time
+    "busy": 0,  # requests turned away because the bcrypt queue was full
+    "throttled": 0,  # login attempts refused by the per-email limit
+    "logins": 0,
+    "failed_logins": 0,
+    "token_logins": 0,  # sessions restored from a token, no DB or bcrypt
+}
+
+
+def _timed_bcrypt(func, *args):
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        with _lock:
+            _stats["bcrypt_time"] += time.perf_counter() - start
+
+
+def _run_bcrypt(func, *args):
+    global _pending
+    with _lock:
+        if _pending >= MAX_PENDING_HASHES:
+            _stats["busy"] += 1
+            raise AuthBusy("Too many sign-ins at once, try again in a moment")
+        _pending += 1
+    try:
+        return _pool.submit(_timed_bcrypt, func, *args).result()
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def hash_password(password):
+    with _lock:
+        _stats["hashes"] += 1
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return _run_bcrypt(bcrypt.hashpw, password.encode(), salt).decode()
+
+
+def check_password(password, hashed):
+    with _lock:
+        _stats["checks"] += 1
+    return _run_bcrypt(bcrypt.checkpw, password.encode(), hashed.encode())
+
+
+# counts the attempt, or raises AuthThrottled when the email is over its limit;
+# refused attempts never reach the database or bcrypt
+def _throttle(email):
+    key = email.strip().lower()
+    now = time.monotonic()
+    with _lock:
+        times = _attempts.setdefault(key, deque())
+        while times and now - times[0] > LOGIN_ATTEMPT_WINDOW:
+            times.popleft()
+        if len(times) >= LOGIN_MAX_ATTEMPTS:
+            _stats["throttled"] += 1
+            raise AuthThrottled(LOGIN_ATTEMPT_WINDOW - (now - times[0]))
+        times.append(now)
+        # forget emails whose attempts have all aged out
+        if len(_attempts) > 10_000:
+            for stale in [
+                k for k, t in _attempts.items() if now - t[-1] > LOGIN_ATTEMPT_WINDOW
+            ]:
+                del _attempts[stale]
+
+
+# returns the email on a correct password, None otherwise
+def authenticate(email, password):
+    _throttle(email)
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT password FROM users WHERE email = %s", (email,))
+            row = cur.fetchone()
+    # the connection is back in the pool before bcrypt starts
+    ok = row is not None and check_password(password, row[0])
+    with _lock:
+        _stats["logins" if ok else "failed_logins"] += 1
+        if ok:
+            _attempts.pop(email.strip().lower(), None)
+    return email if ok else None
+
+
+def _sign(body):
+    digest = hmac.new(_secret, body.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+# "<base64 email|expiry>.<hmac>": checking one needs no database and no bcrypt
+def issue_token(email):
+    expires = int(time.time()) + SESSION_TOKEN_TTL
+    payload = f"{email}|{expires}".encode()
+    body = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    token = f"{body}.{_sign(body)}"
+    _tokens.put(token, (email, expires))
+    return token
+
+
+# the email the token was issued for, or None if it is forged, expired or revoked.
+# verified tokens are cached, so a returning session costs one dict lookup
+def verify_token(token):
+    found, entry = _tokens.get(token)
+    if not found:
+        body, _, signature = token.partition(".")
+        if not hmac.compare_digest(signature.encode(), _sign(body).encode()):
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(body + "=" * (-len(body) % 4)).decode()
+            email, expires = payload.rsplit("|", 1)
+            entry = (email, int(expires))
+        except ValueError:
+            return None
+        # checked and cached under the lock revoke_token holds, so a token it
+        # revokes meanwhile can't be put back in the cache
+        with _lock:
+            if token in _revoked:
+                return None
+            _tokens.put(token, entry)
+    email, expires = entry
+    if expires < time.time():
+        return None
+    with _lock:
+        _stats["token_logins"] += 1
+    return email
+
+
+# revocation is kept in this process; with several app servers behind a load
+# balancer a revoked token stays valid on the others until it expires
+def revoke_token(token):
+    now = time.time()
+    with _lock:
+        for old in [t for t, expires in _revoked.items() if expires < now]:
+            del _revoked[old]
+        found, entry = _tokens.get(token)
+        # revoked before it leaves the cache, so verify_token can't re-cache it
+        _revoked[token] = entry[1] if found else now + SESSION_TOKEN_TTL
+        _tokens.discard(token)
+
+
+def auth_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["pending_hashes"] = _pending
+        stats["tracked_emails"] = len(_attempts)
+    bcrypt_calls = stats["hashes"] + stats["checks"]
+    stats["avg_bcrypt_ms"] = (
+        stats["bcrypt_time"] / bcrypt_calls * 1000 if bcrypt_calls else 0.0
+    )
+    stats["token_cache"] = _tokens.stats()
+    return stats
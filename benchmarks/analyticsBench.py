@@ -0,0 +1,167 @@
+# times progressAnalytics on synthetic histories and checks its results against
+# straightforward per-row Python on a small sample; no database needed
+#
+#   python -m benchmarks.analyticsBench --rows 100000 --repeat 5
+import argparse
+import math
+import statistics
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from progressActions.progressAnalytics import (
+    COLUMNS,
+    detect_prs,
+    muscle_group_weekly_load,
+    prepare,
+    rolling_averages,
+    session_summary,
+    weekly_volume,
+)
+
+EXERCISES = [
+    ("Barbell Bench Press", "Day 1", "Push"),
+    ("Overhead Press", "Day 1", "Push"),
+    ("Barbell Row", "Day 2", "Back and Biceps"),
+    ("Hammer Curl", "Day 2", "Back and Biceps"),
+    ("Back Squat", "Day 3", "Legs"),
+    ("Romanian Deadlift", "Day 3", "Legs"),
+    ("Plank", "Day 4", None),
+]
+
+
+def make_history(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(EXERCISES), rows)
+    start = np.datetime64("2015-01-01T07:00")
+    minutes = np.sort(rng.integers(0, 10 * 365 * 24 * 60, rows))
+    return pd.DataFrame(
+        {
+            "exercise_name": [EXERCISES[i][0] for i in picks],
+            "day_name": [EXERCISES[i][1] for i in picks],
+            "focus": [EXERCISES[i][2] for i in picks],
+            "sets_done": rng.integers(1, 6, rows),
+            "reps_done": rng.integers(1, 13, rows),
+            "weight_used": rng.integers(0, 300, rows),
+            "completed_date": start + minutes.astype("timedelta64[m]"),
+        },
+        columns=COLUMNS,
+    )
+
+
+def run_all(history):
+    df = prepare(history)
+    sessions = session_summary(df)
+    return {
+        "prepare": df,
+        "session_summary": sessions,
+        "weekly_volume": weekly_volume(df),
+        "detect_prs": detect_prs(df),
+        "rolling_averages": rolling_averages(sessions),
+        "muscle_group_weekly_load": muscle_group_weekly_load(df),
+    }
+
+
+def check(history):
+    results = run_all(history)
+    rows = history.to_dict("records")
+
+    def e1rm(row):
+        if row["reps_done"] <= 1:
+            return row["weight_used"]
+        return row["weight_used"] * (1 + row["reps_done"] / 30)
+
+    volume = defaultdict(float)
+    for row in rows:
+        key = (row["exercise_name"], pd.Timestamp(row["completed_date"]).normalize())
+        volume[key] += row["sets_done"] * row["reps_done"] * row["weight_used"]
+    sessions = results["session_summary"]
+    got = dict(
+        zip(
+            zip(sessions["exercise_name"], sessions["session_date"]), sessions["volume"]
+        )
+    )
+    assert got == volume, "session volume"
+
+    best = {}
+    expected_prs = []
+    for row in sorted(rows, key=lambda r: (r["exercise_name"], r["completed_date"])):
+        value = e1rm(row)
+        previous = best.get(row["exercise_name"])
+        expected_prs.append(previous is not None and value > previous)
+        best[row["exercise_name"]] = max(
+            value, previous if previous is not None else value
+        )
+    assert list(results["detect_prs"]["e1rm_pr"]) == expected_prs, "e1rm PRs"
+
+    rolled = results["rolling_averages"]
+    for name, group in rolled.groupby("exercise_name"):
+        values = list(group["best_e1rm"])
+        for i, avg in enumerate(group["best_e1rm_avg"]):
+            window = values[max(0, i - 3) : i + 1]
+            assert math.isclose(avg, sum(window) / len(window)), "rolling average"
+
+    load = defaultdict(float)
+    split = {
+        "push": ["chest", "shoulders", "triceps"],
+        "legs": ["quads", "hamstrings", "glutes", "calves"],
+    }
+    for row in rows:
+        if not isinstance(row["focus"], str):
+            continue
+        groups = split.get(row["focus"].lower()) or [
+            g.strip() for g in row["focus"].lower().split(" and ")
+        ]
+        date = pd.Timestamp(row["completed_date"]).normalize()
+        week = date - pd.Timedelta(days=date.weekday())
+        for group in groups:
+            load[(week, group)] += (
+                row["sets_done"] * row["reps_done"] * row["weight_used"] / len(groups)
+            )
+    muscle = results["muscle_group_weekly_load"]
+    got = dict(zip(zip(muscle["week"], muscle["muscle_group"]), muscle["load"]))
+    assert got.keys() == load.keys(), "muscle groups"
+    assert all(math.isclose(got[k], load[k]) for k in load), "muscle group load"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    check(make_history(2_000, seed=1))
+    print("correctness checks passed\n")
+
+    print(f"{'rows':>8} {'step':<26} {'median ms':>10}")
+    for rows in args.rows:
+        history = make_history(rows)
+        timings = defaultdict(list)
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            df = prepare(history)
+            timings["prepare"].append(time.perf_counter() - start)
+            for name, step in [
+                ("session_summary", session_summary),
+                ("weekly_volume", weekly_volume),
+                ("detect_prs", detect_prs),
+                ("muscle_group_weekly_load", muscle_group_weekly_load),
+            ]:
+                start = time.perf_counter()
+                result = step(df)
+                timings[name].append(time.perf_counter() - start)
+                if name == "session_summary":
+                    sessions = result
+            start = time.perf_counter()
+            rolling_averages(sessions)
+            timings["rolling_averages"].append(time.perf_counter() - start)
+        total = sum(statistics.median(t) for t in timings.values())
+        for name, samples in timings.items():
+            print(f"{rows:>8} {name:<26} {statistics.median(samples) * 1000:>10.1f}")
+        print(f"{rows:>8} {'total':<26} {total * 1000:>10.1f}\n")
+
+
+if __name__ == "__main__":
+    main()
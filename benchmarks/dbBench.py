@@ -0,0 +1,412 @@
+# latency and round trips of the data layer at several data sizes. seeds synthetic
+# users, plans and multi-year progress histories into a throwaway database, times
+# each function on random users, and reports p50/p95 per size. results can be
+# saved as a JSON baseline and later runs compared against it
+#
+# set BENCH_DSN to a throwaway PostgreSQL database (it is migrated, and the bench
+# users are deleted again afterwards). without it an embedded server is started in
+# a temp directory, which needs `pip install pgserver`
+#
+#   python -m benchmarks.dbBench --sizes small medium
+#   python -m benchmarks.dbBench --save              # write benchmarks/dbBaseline.json
+#   python -m benchmarks.dbBench --compare           # exit 1 on a regression
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import psycopg2
+
+from appSetup import get_all_plans, get_plan_snapshots
+from benchmarks.roundTrips import CountingConnection
+from dbMigrations import migrate
+from progressActions.progressQueries import get_progress_page, get_progress_series
+from progressActions.progressRollups import refresh_rollups
+from workoutPlanner import (
+    Exercise,
+    WorkoutDay,
+    WorkoutPlan,
+    clear_workout_plan_data,
+    save_progress,
+    save_workout_plan,
+    save_workout_plan_batched,
+)
+
+BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "dbBaseline.json"
+)
+
+# every user logs SESSIONS_PER_WEEK sessions of one plan day for `years`; a session
+# is one progress row per exercise of that day
+SIZES = {
+    "small": {"users": 5, "plans": 2, "years": 1},
+    "medium": {"users": 20, "plans": 3, "years": 3},
+    "large": {"users": 50, "plans": 4, "years": 5},
+}
+DAYS_PER_PLAN = 4
+EXERCISES_PER_DAY = 8
+SESSIONS_PER_WEEK = 4
+EXERCISE_NAMES = [
+    "Back Squat",
+    "Bench Press",
+    "Deadlift",
+    "Overhead Press",
+    "Barbell Row",
+    "Pull Up",
+    "Romanian Deadlift",
+    "Incline Dumbbell Press",
+    "Lat Pulldown",
+    "Leg Press",
+    "Hip Thrust",
+    "Lunge",
+    "Dumbbell Curl",
+    "Triceps Pushdown",
+    "Lateral Raise",
+    "Face Pull",
+    "Calf Raise",
+    "Plank",
+]
+FOCUS = ["Push", "Pull", "Legs", "Full Body"]
+
+
+def make_plan(user_email, rng, goal="benchmark"):
+    return WorkoutPlan(
+        goal=goal,
+        days_per_week=DAYS_PER_PLAN,
+        user_email=user_email,
+        workout_days=[
+            WorkoutDay(
+                day_name=f"Day {d + 1}",
+                focus=FOCUS[d % len(FOCUS)],
+                exercises=[
+                    Exercise(name=name, sets=3, reps=10, rest_time=90, weight=100)
+                    for name in rng.sample(EXERCISE_NAMES, EXERCISES_PER_DAY)
+                ],
+            )
+            for d in range(DAYS_PER_PLAN)
+        ],
+    )
+
+
+# users and plans go through the app's batched save; progress is streamed in with
+# COPY and the rollups rebuilt once, which is far faster than save_progress per row
+def seed(conn, prefix, size, rng):
+    spec = SIZES[size]
+    users = [f"{prefix}-{size}-{i}@example.com" for i in range(spec["users"])]
+    with conn.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO users (email, password) VALUES (%s, 'x')",
+            [(email,) for email in users],
+        )
+    conn.commit()
+
+    plans = {}  # email -> [(plan_id, plan), ...]
+    for email in users:
+        plans[email] = []
+        for _ in range(spec["plans"]):
+            plan = make_plan(email, rng)
+            plan_id, _, _ = save_workout_plan_batched(plan, conn)
+            plans[email].append((plan_id, plan))
+
+    sessions = int(spec["years"] * 52 * SESSIONS_PER_WEEK)
+    start = datetime.now() - timedelta(days=365 * spec["years"])
+    step = timedelta(days=7 / SESSIONS_PER_WEEK)
+    buf = io.StringIO()
+    rows = 0
+    for email in users:
+        weights = {}
+        for s in range(sessions):
+            # plans follow each other, the newest holds the most recent history
+            plan_id, plan = plans[email][s * len(plans[email]) // sessions]
+            day = plan.workout_days[s % DAYS_PER_PLAN]
+            when = start + s * step + timedelta(minutes=rng.randint(0, 120))
+            for ex in day.exercises:
+                weight = weights.get(ex.name, rng.randint(20, 150))
+                weights[ex.name] = weight + rng.choice([0, 0, 0, 5])
+                buf.write(
+                    f"{email}\t{plan_id}\t{ex.name}\t{day.day_name}\t"
+                    f"{rng.randint(2, 5)}\t{rng.randint(5, 12)}\t{weight}\t\t{when}\n"
+                )
+                rows += 1
+    buf.seek(0)
+    with conn.cursor() as cur:
+        cur.copy_expert(
+            """
+            COPY workout_progress (
+                user_email, plan_id, exercise_name, day_name, sets_done, reps_done,
+                weight_used, notes, completed_date
+            ) FROM STDIN
+            """,
+            buf,
+        )
+        for email in users:
+            refresh_rollups(cur, email)
+    conn.commit()
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE")
+    conn.autocommit = False
+    return plans, {
+        "users": len(users),
+        "plans": len(users) * spec["plans"],
+        "progress_rows": rows,
+    }
+
+
+def remove_users(conn, prefix):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM users WHERE email LIKE %s", (f"{prefix}-%",))
+    conn.commit()
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+# each operation takes (conn, user, plan_id, plan, rng); `setup` and `teardown`
+# run outside the clock and the round-trip count
+def operations(raw_conn):
+    def delete_bench_saves(conn, user, *_):
+        with raw_conn.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM workout_plans
+                WHERE user_email = %s AND goal = 'bench save'
+                """,
+                (user,),
+            )
+        raw_conn.commit()
+
+    def new_plan(conn, user, plan_id, plan, rng):
+        new_id, _, _ = save_workout_plan_batched(
+            make_plan(user, rng, goal="bench save"), raw_conn
+        )
+        return new_id
+
+    def progress_args(user, plan_id, plan, rng):
+        day = rng.choice(plan.workout_days)
+        return user, plan_id, rng.choice(day.exercises).name
+
+    def log_set(conn, user, plan_id, plan, rng):
+        day = rng.choice(plan.workout_days)
+        exercise = rng.choice(day.exercises).name
+        save_progress(conn, user, exercise, day.day_name, 3, 10, 100, "", plan_id)
+
+    return {
+        "save_workout_plan": (
+            None,
+            lambda conn, user, plan_id, plan, rng: save_workout_plan(
+                make_plan(user, rng, goal="bench save"), conn
+            ),
+            delete_bench_saves,
+        ),
+        "save_workout_plan_batched": (
+            None,
+            lambda conn, user, plan_id, plan, rng: save_workout_plan_batched(
+                make_plan(user, rng, goal="bench save"), conn
+            ),
+            delete_bench_saves,
+        ),
+        "clear_workout_plan_data": (
+            new_plan,
+            lambda conn, user, plan_id, plan, rng, new_id: clear_workout_plan_data(
+                conn, new_id
+            ),
+            delete_bench_saves,
+        ),
+        "get_all_plans": (
+            None,
+            lambda conn, user, plan_id, plan, rng: get_all_plans(conn, user),
+            None,
+        ),
+        # one plan with its days and exercises, and all of a user's plans
+        "get_plan": (
+            None,
+            lambda conn, user, plan_id, plan, rng: get_plan_snapshots(
+                conn, user, plan_id
+            ),
+            None,
+        ),
+        "get_plan_snapshots": (
+            None,
+            lambda conn, user, plan_id, plan, rng: get_plan_snapshots(conn, user),
+            None,
+        ),
+        "save_progress": (None, log_set, None),
+        # what the Progress Tracker tab runs for one exercise: the first page of
+        # entries and the chart series
+        "progress_page": (
+            None,
+            lambda conn, user, plan_id, plan, rng: get_progress_page(
+                conn, *progress_args(user, plan_id, plan, rng)
+            ),
+            None,
+        ),
+        "progress_series": (
+            None,
+            lambda conn, user, plan_id, plan, rng: get_progress_series(
+                conn, *progress_args(user, plan_id, plan, rng)
+            ),
+            None,
+        ),
+    }
+
+
+def run_size(raw_conn, plans, repeat, rng):
+    conn = CountingConnection(raw_conn)
+    users = list(plans)
+    results = {}
+    for name, (setup, run, teardown) in operations(raw_conn).items():
+        timings = []
+        trips = []
+        for _ in range(repeat):
+            user = rng.choice(users)
+            plan_id, plan = rng.choice(plans[user])
+            args = (conn, user, plan_id, plan, rng)
+            extra = (setup(*args),) if setup else ()
+            conn.reset()
+            start = time.perf_counter()
+            run(*args, *extra)
+            timings.append(time.perf_counter() - start)
+            trips.append(conn.round_trips)
+            # reads leave a transaction open; end it outside the measurement
+            raw_conn.rollback()
+            if teardown:
+                teardown(*args)
+        results[name] = {
+            "p50_ms": round(statistics.median(timings) * 1000, 3),
+            "p95_ms": round(_percentile(timings, 95) * 1000, 3),
+            "round_trips": max(trips),
+        }
+    return results
+
+
+def connect():
+    dsn = os.getenv("BENCH_DSN")
+    if dsn:
+        return psycopg2.connect(dsn), None, "BENCH_DSN"
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit(
+            "Set BENCH_DSN to a throwaway database, or `pip install pgserver` to "
+            "run against an embedded one"
+        )
+    server = pgserver.get_server(
+        tempfile.mkdtemp(prefix="dbBench-"), cleanup_mode="delete"
+    )
+    return psycopg2.connect(server.get_uri()), server, "embedded pgserver"
+
+
+# a regression is more round trips, or a p50/p95 that is both `tolerance` slower
+# and at least `min_ms` slower (sub-millisecond timings are mostly noise)
+def compare(report, baseline, tolerance, min_ms):
+    regressions = []
+    print(
+        f"\n{'size':<7} {'operation':<26} {'p50 ms':>9} {'was':>9} "
+        f"{'p95 ms':>9} {'was':>9} {'trips':>6} {'was':>5}"
+    )
+    for size, result in report["sizes"].items():
+        base_size = baseline["sizes"].get(size)
+        if base_size is None:
+            continue
+        for name, now in result["operations"].items():
+            was = base_size["operations"].get(name)
+            if was is None:
+                continue
+            flags = []
+            for key in ("p50_ms", "p95_ms"):
+                slower = now[key] - was[key]
+                if slower > was[key] * tolerance and slower > min_ms:
+                    flags.append(key)
+            if now["round_trips"] > was["round_trips"]:
+                flags.append("round_trips")
+            print(
+                f"{size:<7} {name:<26} {now['p50_ms']:>9.2f} {was['p50_ms']:>9.2f} "
+                f"{now['p95_ms']:>9.2f} {was['p95_ms']:>9.2f} "
+                f"{now['round_trips']:>6} {was['round_trips']:>5}"
+                f"{'  <- ' + ', '.join(flags) if flags else ''}"
+            )
+            if flags:
+                regressions.append((size, name, flags))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", nargs="?", const=BASELINE_FILE, metavar="PATH")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_FILE, metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--min-ms", type=float, default=1.0)
+    args = parser.parse_args(argv[1:])
+
+    rng = random.Random(args.seed)
+    conn, server, target = connect()
+    prefix = f"dbbench-{uuid.uuid4().hex[:8]}"
+    try:
+        migrate(conn)
+        with conn.cursor() as cur:
+            cur.execute("SHOW server_version")
+            version = cur.fetchone()[0]
+        conn.rollback()
+        report = {
+            "target": target,
+            "server_version": version,
+            "repeat": args.repeat,
+            "sizes": {},
+        }
+        print(f"PostgreSQL {version} ({target}), {args.repeat} runs per operation")
+        for size in args.sizes:
+            start = time.perf_counter()
+            plans, counts = seed(conn, prefix, size, rng)
+            print(
+                f"\n{size}: {counts['users']} users, {counts['plans']} plans, "
+                f"{counts['progress_rows']} progress rows "
+                f"(seeded in {time.perf_counter() - start:.1f}s)"
+            )
+            results = run_size(conn, plans, args.repeat, rng)
+            print(f"{'operation':<26} {'p50 ms':>9} {'p95 ms':>9} {'trips':>6}")
+            for name, result in results.items():
+                print(
+                    f"{name:<26} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                    f"{result['round_trips']:>6}"
+                )
+            report["sizes"][size] = {"rows": counts, "operations": results}
+            remove_users(conn, prefix)
+    finally:
+        conn.rollback()
+        remove_users(conn, prefix)
+        conn.close()
+        if server is not None:
+            server.cleanup()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nbaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regressions against {args.compare}")
+            return 1
+        print(f"\nno regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,155 @@
+# cold-start import profile for each entry point of the app, checked against the
+# budgets in importBudget.json. every entry is imported in a fresh interpreter, so
+# the numbers are what a new server process pays the first time that page is shown
+#
+#   python -m benchmarks.importBudget            # report and check, exit 1 if over
+#   python -m benchmarks.importBudget --top 15   # more of the slowest imports
+#   python -m benchmarks.importBudget --update   # write current numbers + headroom
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(ROOT, "benchmarks", "importBudget.json")
+HEADROOM = 1.5
+# small pages import in a few ms, so their budgets get a floor to absorb noise
+MIN_IMPORT_MS = 50
+HEAVY = ["openai", "pydantic", "pandas", "numpy"]
+
+# what each page imports the first time it is shown; "login" is everything a
+# logged-out visitor's run needs
+ENTRIES = {
+    "login": ["streamlit", "renderTiming", "appSetup"],
+    "plan viewer": ["appPages.planViewer"],
+    "plan builder": ["appPages.planBuilder"],
+    "plan editor": ["appPages.planEditor"],
+    "plan generator": ["appPages.planGenerator"],
+    "progress tracker": ["appPages.progressTracker"],
+    "progress analytics": ["progressActions.progressAnalytics"],
+}
+
+# pages import streamlit and appSetup too, but those are already loaded by the
+# time any page is, so they are imported before the clock starts
+_PROBE = """
+import json, resource, sys, time
+for name in {preloaded!r}:
+    __import__(name)
+before = set(sys.modules)
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "import_ms": seconds * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": sorted(set(sys.modules) - before),
+}}))
+"""
+
+
+def probe(entry, importtime=False):
+    preloaded = [] if entry == "login" else ENTRIES["login"]
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _PROBE.format(preloaded=preloaded, modules=ENTRIES[entry])]
+    result = subprocess.run(
+        command, capture_output=True, text=True, check=True, cwd=ROOT
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+# slowest packages by cumulative time, from -X importtime output
+def slowest(stderr, loaded, top):
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        # only top-level package entries, nested ones are counted inside those
+        if name in loaded and "." not in name and cumulative.strip().isdigit():
+            rows.append((int(cumulative) / 1000, name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def measure(repeat):
+    results = {}
+    for entry in ENTRIES:
+        samples = [probe(entry)[0] for _ in range(repeat)]
+        results[entry] = {
+            "import_ms": statistics.median(s["import_ms"] for s in samples),
+            "rss_mb": statistics.median(s["rss_mb"] for s in samples),
+            "heavy": [name for name in HEAVY if name in samples[0]["loaded"]],
+        }
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args(argv[1:])
+
+    results = measure(args.repeat)
+
+    if args.update:
+        budgets = {
+            entry: {
+                "import_ms": max(MIN_IMPORT_MS, round(result["import_ms"] * HEADROOM)),
+                "rss_mb": round(result["rss_mb"] * HEADROOM),
+                "heavy": result["heavy"],
+            }
+            for entry, result in results.items()
+        }
+        with open(BUDGET_FILE, "w") as f:
+            json.dump(budgets, f, indent=2)
+            f.write("\n")
+        print(f"budgets written to {BUDGET_FILE}")
+        return 0
+
+    with open(BUDGET_FILE) as f:
+        budgets = json.load(f)
+
+    failures = []
+    print(f"{'entry':<20} {'import ms':>10} {'budget':>8} {'rss MB':>8} {'budget':>8}")
+    for entry, result in results.items():
+        budget = budgets.get(entry)
+        if budget is None:
+            failures.append(f"{entry}: no budget, run with --update")
+            continue
+        print(
+            f"{entry:<20} {result['import_ms']:>10.0f} {budget['import_ms']:>8} "
+            f"{result['rss_mb']:>8.0f} {budget['rss_mb']:>8}"
+        )
+        if result["import_ms"] > budget["import_ms"]:
+            failures.append(f"{entry}: import took {result['import_ms']:.0f} ms")
+        if result["rss_mb"] > budget["rss_mb"]:
+            failures.append(f"{entry}: process grew to {result['rss_mb']:.0f} MB")
+        # a heavy package showing up where it wasn't before is the usual regression:
+        # someone imported openai/pandas at the top of a module the page needs
+        for name in set(result["heavy"]) - set(budget["heavy"]):
+            failures.append(f"{entry}: now imports {name} eagerly")
+
+    for entry in ENTRIES:
+        info, stderr = probe(entry, importtime=True)
+        rows = slowest(stderr, set(info["loaded"]), args.top)
+        print(f"\n{entry}: slowest imports (cumulative ms)")
+        for ms, name in rows:
+            print(f"  {ms:>8.1f}  {name}")
+
+    if failures:
+        print("\nover budget:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nall entries within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
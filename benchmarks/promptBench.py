@@ -0,0 +1,135 @@
+# prompt size and output budget for each plan request, and with --live the tokens,
+# time and plan shape of real generations. the offline part needs no API key:
+#
+#   python -m benchmarks.promptBench                  # prompt sizes and budgets
+#   python -m benchmarks.promptBench --live 3         # 3 plans per mode via OpenAI
+#   python -m benchmarks.promptBench --live 3 --mode classic --days 5 --minutes 60
+import argparse
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from planPrompts import (
+    SYSTEM_PREFIXES,
+    day_max_tokens,
+    day_messages,
+    outline_max_tokens,
+    outline_messages,
+    plan_max_tokens,
+    plan_messages,
+    token_stats,
+)
+from workoutPlanner import (
+    WorkoutPlanStream,
+    generate_and_parse_workout_plan,
+    generate_workout_plan_parallel,
+    parse_stats,
+)
+
+load_dotenv()
+
+GOAL = "build muscle and get stronger"
+SHAPES = [(3, 45), (5, 60), (7, 90)]  # (days, minutes)
+MODES = ["classic", "stream", "parallel"]
+
+
+def _chars(messages):
+    return sum(len(message["content"]) for message in messages)
+
+
+def offline():
+    print(
+        f"{'request':<10} {'days':>4} {'min':>4} {'prompt chars':>13} "
+        f"{'max tokens':>11}"
+    )
+    for days, minutes in SHAPES:
+        split = "; ".join(f"Day {i + 1}: Full body" for i in range(days))
+        for name, messages, budget in [
+            (
+                "plan",
+                plan_messages(GOAL, minutes, days),
+                plan_max_tokens(days, minutes),
+            ),
+            (
+                "outline",
+                outline_messages(GOAL, minutes, days),
+                outline_max_tokens(days),
+            ),
+            (
+                "day",
+                day_messages(GOAL, minutes, "Day 1", "Full body", split),
+                day_max_tokens(minutes),
+            ),
+        ]:
+            print(
+                f"{name:<10} {days:>4} {minutes:>4} {_chars(messages):>13} "
+                f"{budget:>11}"
+            )
+    print("\nfixed system prefixes (chars):")
+    for kind, prefix in SYSTEM_PREFIXES.items():
+        print(f"  {kind:<8} {len(prefix)}")
+
+
+def generate(mode, days, minutes):
+    if mode == "stream":
+        stream = WorkoutPlanStream(GOAL, minutes, days)
+        for _ in stream:
+            pass
+        return stream.plan
+    if mode == "parallel":
+        return generate_workout_plan_parallel(GOAL, minutes, days)
+    return generate_and_parse_workout_plan(GOAL, minutes, days)
+
+
+def live(modes, days, minutes, repeat):
+    print(
+        f"{'mode':<9} {'s/plan':>7} {'prompt':>7} {'cached':>7} {'output':>7} "
+        f"{'cut off':>7} {'days ok':>7} {'ex/day':>6}"
+    )
+    for mode in modes:
+        before = token_stats()["calls"]
+        seconds, days_ok, exercises = [], 0, []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            plan = generate(mode, days, minutes)
+            seconds.append(time.perf_counter() - start)
+            days_ok += len(plan.workout_days) == days
+            exercises += [len(day.exercises) for day in plan.workout_days]
+        after = token_stats()["calls"]
+
+        def added(key):
+            return sum(
+                totals[key] - before.get(name, {}).get(key, 0)
+                for name, totals in after.items()
+            )
+
+        print(
+            f"{mode:<9} {statistics.median(seconds):>7.1f} "
+            f"{added('prompt_tokens') / repeat:>7.0f} "
+            f"{added('cached_tokens') / repeat:>7.0f} "
+            f"{added('completion_tokens') / repeat:>7.0f} "
+            f"{added('truncated'):>7} {days_ok:>4}/{repeat:<2} "
+            f"{statistics.mean(exercises):>6.1f}"
+        )
+    print(f"\nparse: {parse_stats()}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", type=int, default=0, metavar="N")
+    parser.add_argument("--mode", choices=MODES, action="append")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--minutes", type=int, default=60)
+    args = parser.parse_args(argv[1:])
+
+    offline()
+    if args.live:
+        print()
+        live(args.mode or MODES, args.days, args.minutes, args.live)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
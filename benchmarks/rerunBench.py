@@ -0,0 +1,149 @@
+# server time per widget interaction on a 7-day, 60-exercise plan. AppTest reruns
+# the whole script for every interaction, which is what every click cost before
+# the app was split into fragments. AppTest can't rerun a single fragment, so the
+# fragment column is an estimate: the renderTiming time of the widget's section
+# within that full rerun, which leaves out streamlit's own per-rerun overhead
+#
+# run from the repo root against the database configured in .env:
+#   python -m benchmarks.rerunBench --repeat 5
+import argparse
+import copy
+import os
+import statistics
+import time
+import uuid
+
+from dotenv import load_dotenv
+from streamlit.testing.v1 import AppTest
+
+from dbPool import pooled_connection
+from renderTiming import reset_timings, timing_stats
+from workoutPlanner import (
+    Exercise,
+    WorkoutDay,
+    WorkoutPlan,
+    save_progress,
+    save_workout_plan_batched,
+)
+
+load_dotenv()
+
+EXERCISES_PER_DAY = [9, 9, 9, 9, 8, 8, 8]  # 60 in total
+
+# (label, section that owns the widget, interaction)
+INTERACTIONS = [
+    (
+        "tick ❌ Remove in the plan editor",
+        "plan editor",
+        lambda at: at.checkbox(key="ex_remove_3_4").check(),
+    ),
+    (
+        "switch the viewer's log mode",
+        "plan viewer",
+        lambda at: at.radio(key=at.session_state["bench_log_mode_key"]).set_value(
+            "One exercise at a time"
+        ),
+    ),
+    (
+        "change the progress date range",
+        "progress tracker",
+        lambda at: at.selectbox(key="progress_date_range").set_value("Last 90 days"),
+    ),
+]
+
+
+def seed(user_email):
+    plan = WorkoutPlan(
+        goal="benchmark",
+        days_per_week=len(EXERCISES_PER_DAY),
+        user_email=user_email,
+        workout_days=[
+            WorkoutDay(
+                day_name=f"Day {d + 1}",
+                focus="Full Body",
+                exercises=[
+                    Exercise(
+                        name=f"Exercise {d + 1}.{e + 1}", sets=3, reps=10, rest_time=60
+                    )
+                    for e in range(count)
+                ],
+            )
+            for d, count in enumerate(EXERCISES_PER_DAY)
+        ],
+    )
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO users (email, password) VALUES (%s, 'x')", (user_email,)
+            )
+        conn.commit()
+        plan_id, _, _ = save_workout_plan_batched(plan, conn)
+        for e in range(20):
+            save_progress(
+                conn, user_email, "Exercise 1.1", "Day 1", 3, 10, 100 + e, "", plan_id
+            )
+    return plan, plan_id
+
+
+def cleanup(user_email):
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM users WHERE email = %s", (user_email,))
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--script", default="app.py")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    user_email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    plan, plan_id = seed(user_email)
+    try:
+        full = {label: [] for label, _, _ in INTERACTIONS}
+        section = {label: [] for label, _, _ in INTERACTIONS}
+        for _ in range(args.repeat):
+            for label, owner, interact in INTERACTIONS:
+                at = AppTest.from_file(os.path.abspath(args.script), default_timeout=60)
+                at.session_state["user_email"] = user_email
+                at.session_state["bench_log_mode_key"] = f"log_mode_{plan_id}"
+                # the generated-plan editor shows whenever a plan is in progress
+                at.session_state["generated_plan"] = copy.deepcopy(plan)
+                # only the open tab runs
+                at.session_state["main_tab"] = (
+                    "Progress Tracker"
+                    if owner == "progress tracker"
+                    else "Workout Plan"
+                )
+                at.run()
+                interact(at)
+                reset_timings()
+                start = time.perf_counter()
+                at.run()
+                full[label].append(time.perf_counter() - start)
+                assert not at.exception, at.exception
+                stats = timing_stats()
+                if owner in stats:
+                    section[label].append(stats[owner]["last_ms"] / 1000)
+
+        print(f"{'interaction':<36} {'whole script ms':>16} {'fragment est. ms':>17}")
+        for label, _, _ in INTERACTIONS:
+            fragment = (
+                f"{statistics.median(section[label]) * 1000:>17.1f}"
+                if section[label]
+                else f"{'n/a':>17}"
+            )
+            print(
+                f"{label:<36} {statistics.median(full[label]) * 1000:>16.1f} {fragment}"
+            )
+        print(
+            "\nfragment est. = the section's share of the full rerun, not a measured "
+            "fragment rerun"
+        )
+    finally:
+        cleanup(user_email)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import time
+
+
+# wraps a psycopg2 connection and counts every statement sent to the server,
+# optionally sleeping `rtt` seconds per round trip to model a remote database
+class CountingConnection:
+    def __init__(self, conn, rtt=0.0):
+        self._conn = conn
+        self.rtt = rtt
+        self.round_trips = 0
+
+    def _round_trip(self):
+        self.round_trips += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._conn.cursor(*args, **kwargs), self)
+
+    def commit(self):
+        self._round_trip()
+        self._conn.commit()
+
+    def rollback(self):
+        self._round_trip()
+        self._conn.rollback()
+
+    def reset(self):
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class CountingCursor:
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def execute(self, *args, **kwargs):
+        self._counter._round_trip()
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, query, vars_list):
+        # psycopg2 sends executemany as one statement per parameter set
+        vars_list = list(vars_list)
+        for _ in vars_list:
+            self._counter._round_trip()
+        return self._cursor.executemany(query, vars_list)
+
+    def copy_expert(self, *args, **kwargs):
+        self._counter._round_trip()
+        return self._cursor.copy_expert(*args, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
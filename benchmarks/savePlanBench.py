@@ -0,0 +1,124 @@
+# compares round trips and wall time of save_workout_plan (one statement per row)
+# against save_workout_plan_batched (constant statements) as plans grow
+#
+# run from the repo root against the database configured in .env:
+#   python -m benchmarks.savePlanBench --rtt-ms 5 --repeat 5
+import argparse
+import statistics
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+from benchmarks.roundTrips import CountingConnection
+from dbPool import pooled_connection
+from workoutPlanner import (
+    Exercise,
+    WorkoutDay,
+    WorkoutPlan,
+    save_workout_plan,
+    save_workout_plan_batched,
+)
+
+load_dotenv()
+
+PLAN_SIZES = [(1, 4), (3, 6), (5, 8), (7, 10), (7, 20)]  # (days, exercises per day)
+
+
+def make_plan(user_email, days, exercises_per_day):
+    return WorkoutPlan(
+        goal="benchmark",
+        days_per_week=days,
+        user_email=user_email,
+        workout_days=[
+            WorkoutDay(
+                day_name=f"Day {d + 1}",
+                focus="Full Body",
+                exercises=[
+                    Exercise(name=f"Exercise {e + 1}", sets=3, reps=10, rest_time=60)
+                    for e in range(exercises_per_day)
+                ],
+            )
+            for d in range(days)
+        ],
+    )
+
+
+def time_save(save, conn, plan, repeat):
+    trips = []
+    timings = []
+    for _ in range(repeat):
+        conn.reset()
+        start = time.perf_counter()
+        save(plan, conn)
+        timings.append(time.perf_counter() - start)
+        trips.append(conn.round_trips)
+    return max(trips), statistics.median(timings) * 1000
+
+
+def cleanup(conn, user_email):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            DELETE FROM workout_exercises WHERE day_id IN (
+                SELECT wd.id FROM workout_days wd
+                JOIN workout_plans wp ON wp.id = wd.plan_id
+                WHERE wp.user_email = %s
+            )
+            """,
+            (user_email,),
+        )
+        cur.execute(
+            """
+            DELETE FROM workout_days WHERE plan_id IN (
+                SELECT id FROM workout_plans WHERE user_email = %s
+            )
+            """,
+            (user_email,),
+        )
+        cur.execute("DELETE FROM workout_plans WHERE user_email = %s", (user_email,))
+        cur.execute("DELETE FROM users WHERE email = %s", (user_email,))
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--rtt-ms", type=float, default=0.0, help="simulated network latency"
+    )
+    args = parser.parse_args()
+
+    user_email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    with pooled_connection() as raw_conn:
+        conn = CountingConnection(raw_conn, rtt=args.rtt_ms / 1000)
+        with raw_conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO users (email, password) VALUES (%s, %s)",
+                (user_email, "x"),
+            )
+        raw_conn.commit()
+
+        print(
+            f"{'days':>4} {'ex/day':>6} {'rows':>5} | "
+            f"{'old trips':>9} {'old ms':>8} | {'new trips':>9} {'new ms':>8}"
+        )
+        try:
+            for days, per_day in PLAN_SIZES:
+                plan = make_plan(user_email, days, per_day)
+                old_trips, old_ms = time_save(
+                    save_workout_plan, conn, plan, args.repeat
+                )
+                new_trips, new_ms = time_save(
+                    save_workout_plan_batched, conn, plan, args.repeat
+                )
+                print(
+                    f"{days:>4} {per_day:>6} {1 + days + days * per_day:>5} | "
+                    f"{old_trips:>9} {old_ms:>8.1f} | {new_trips:>9} {new_ms:>8.1f}"
+                )
+        finally:
+            cleanup(raw_conn, user_email)
+
+
+if __name__ == "__main__":
+    main()
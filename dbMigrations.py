@@ -0,0 +1,429 @@
+# versioned schema for the app's tables plus a check that the hot queries use indexes
+#
+#   python dbMigrations.py migrate   apply pending migrations
+#   python dbMigrations.py status    list applied versions
+#   python dbMigrations.py check     EXPLAIN the hot queries, exit 1 on a seq scan
+import json
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from dbPool import pooled_connection
+from progressActions.progressQueries import (
+    MAX_CHART_POINTS,
+    PAGE_SIZE,
+    PROGRESS_EXERCISES_SQL,
+    PROGRESS_FRAME_SQL,
+    PROGRESS_PAGE_SQL,
+    PROGRESS_SERIES_SQL,
+)
+from progressActions.progressRollups import WEEKLY_VOLUME_SQL
+from workoutPlanner import LAST_SESSION_SETS_SQL, PLAN_LIST_SQL, PLAN_SNAPSHOTS_SQL
+
+load_dotenv()
+
+# (version, name, sql); never edit a migration that has shipped, add a new one
+MIGRATIONS = [
+    (
+        1,
+        "initial schema",
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            password TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS workout_plans (
+            id SERIAL PRIMARY KEY,
+            user_email TEXT NOT NULL REFERENCES users (email) ON DELETE CASCADE,
+            goal TEXT,
+            days_per_week INTEGER,
+            created_at TIMESTAMP NOT NULL DEFAULT now()
+        );
+
+        CREATE TABLE IF NOT EXISTS workout_days (
+            id SERIAL PRIMARY KEY,
+            plan_id INTEGER NOT NULL REFERENCES workout_plans (id) ON DELETE CASCADE,
+            day_name TEXT,
+            focus TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS workout_exercises (
+            id SERIAL PRIMARY KEY,
+            day_id INTEGER NOT NULL REFERENCES workout_days (id) ON DELETE CASCADE,
+            name TEXT,
+            sets INTEGER,
+            reps INTEGER,
+            rest_time INTEGER,
+            weight INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS workout_progress (
+            id SERIAL PRIMARY KEY,
+            user_email TEXT NOT NULL REFERENCES users (email) ON DELETE CASCADE,
+            plan_id INTEGER REFERENCES workout_plans (id) ON DELETE CASCADE,
+            exercise_name TEXT NOT NULL,
+            day_name TEXT,
+            sets_done INTEGER,
+            reps_done INTEGER,
+            weight_used INTEGER,
+            notes TEXT,
+            completed_date TIMESTAMP NOT NULL DEFAULT now()
+        );
+
+        -- databases created before this file may have progress rows without an id
+        ALTER TABLE workout_progress ADD COLUMN IF NOT EXISTS id SERIAL;
+        """,
+    ),
+    (
+        2,
+        "cascading foreign keys",
+        """
+        -- tables created by hand may have non-cascading keys (or none at all); swap
+        -- them for cascading ones. NOT VALID skips checking rows that already exist
+        DO $$
+        DECLARE
+            fk record;
+            spec text[];
+        BEGIN
+            FOR fk IN
+                SELECT conname, conrelid::regclass AS tbl
+                FROM pg_constraint
+                WHERE contype = 'f'
+                  AND confdeltype <> 'c'
+                  AND conrelid::regclass::text IN (
+                      'workout_plans', 'workout_days', 'workout_exercises',
+                      'workout_progress'
+                  )
+            LOOP
+                EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.tbl, fk.conname);
+            END LOOP;
+
+            FOREACH spec SLICE 1 IN ARRAY ARRAY[
+                ['workout_plans', 'user_email', 'users', 'email'],
+                ['workout_days', 'plan_id', 'workout_plans', 'id'],
+                ['workout_exercises', 'day_id', 'workout_days', 'id'],
+                ['workout_progress', 'user_email', 'users', 'email'],
+                ['workout_progress', 'plan_id', 'workout_plans', 'id']
+            ]
+            LOOP
+                IF NOT EXISTS (
+                    SELECT 1
+                    FROM pg_constraint c
+                    JOIN pg_attribute a
+                      ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+                    WHERE c.contype = 'f'
+                      AND c.conrelid = spec[1]::regclass
+                      AND a.attname = spec[2]
+                ) THEN
+                    EXECUTE format(
+                        'ALTER TABLE %I ADD CONSTRAINT %I FOREIGN KEY (%I) '
+                        'REFERENCES %I (%I) ON DELETE CASCADE NOT VALID',
+                        spec[1], spec[1] || '_' || spec[2] || '_fkey', spec[2],
+                        spec[3], spec[4]
+                    );
+                END IF;
+            END LOOP;
+        END $$;
+        """,
+    ),
+    (
+        3,
+        "indexes for hot queries",
+        """
+        -- get_all_plans: WHERE user_email ORDER BY created_at DESC
+        CREATE INDEX IF NOT EXISTS workout_plans_user_created
+            ON workout_plans (user_email, created_at DESC);
+        -- get_days_and_exercises: days of a plan, exercises of a day, both by id
+        CREATE INDEX IF NOT EXISTS workout_days_plan
+            ON workout_days (plan_id, id);
+        CREATE INDEX IF NOT EXISTS workout_exercises_day
+            ON workout_exercises (day_id, id);
+        -- progress tab: per plan by date, and per exercise by (date, id) for paging
+        CREATE INDEX IF NOT EXISTS workout_progress_user_plan_date
+            ON workout_progress (user_email, plan_id, completed_date DESC);
+        CREATE INDEX IF NOT EXISTS workout_progress_user_plan_exercise_date
+            ON workout_progress (
+                user_email, plan_id, exercise_name, completed_date DESC, id DESC
+            );
+        """,
+    ),
+    (
+        4,
+        "primary key on progress rows",
+        """
+        -- progress edits and deletes address rows by id alone
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = 'workout_progress'::regclass AND contype = 'p'
+            ) THEN
+                ALTER TABLE workout_progress ADD PRIMARY KEY (id);
+            END IF;
+        END $$;
+        """,
+    ),
+    (
+        5,
+        "per-set progress detail",
+        """
+        -- written by save_session_progress; the unique index also serves the
+        -- lookup of a progress row's sets in order
+        CREATE TABLE IF NOT EXISTS workout_progress_sets (
+            progress_id INTEGER NOT NULL
+                REFERENCES workout_progress (id) ON DELETE CASCADE,
+            set_number INTEGER NOT NULL,
+            reps INTEGER,
+            weight INTEGER,
+            PRIMARY KEY (progress_id, set_number)
+        );
+        """,
+    ),
+    (
+        6,
+        "idempotent progress imports",
+        """
+        -- set by progressTransfer.import_progress only; rows logged in the app
+        -- leave it NULL and are not covered by the unique index
+        ALTER TABLE workout_progress ADD COLUMN IF NOT EXISTS import_hash TEXT;
+        CREATE UNIQUE INDEX IF NOT EXISTS workout_progress_user_import_hash
+            ON workout_progress (user_email, import_hash)
+            WHERE import_hash IS NOT NULL;
+        """,
+    ),
+    (
+        7,
+        "progress rollups",
+        """
+        -- maintained by progressActions.progressRollups on every progress write
+        CREATE TABLE IF NOT EXISTS progress_rollups (
+            user_email TEXT NOT NULL REFERENCES users (email) ON DELETE CASCADE,
+            exercise_name TEXT NOT NULL,
+            latest_progress_id INTEGER,
+            latest_date TIMESTAMP,
+            latest_sets INTEGER,
+            latest_reps INTEGER,
+            latest_weight INTEGER,
+            best_weight INTEGER,
+            best_e1rm DOUBLE PRECISION,
+            total_sessions INTEGER NOT NULL DEFAULT 0,
+            total_entries INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_email, exercise_name)
+        );
+
+        CREATE TABLE IF NOT EXISTS progress_weekly_volume (
+            user_email TEXT NOT NULL REFERENCES users (email) ON DELETE CASCADE,
+            exercise_name TEXT NOT NULL,
+            week DATE NOT NULL,
+            volume BIGINT NOT NULL DEFAULT 0,
+            entries INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_email, exercise_name, week)
+        );
+
+        -- rollup upkeep looks up an exercise's entries across plans: the latest
+        -- one, and whether a day already has one
+        CREATE INDEX IF NOT EXISTS workout_progress_user_exercise_date
+            ON workout_progress (user_email, exercise_name, completed_date DESC, id DESC);
+
+        -- existing history; same as `python -m progressActions.progressRollups rebuild`
+        INSERT INTO progress_rollups (
+            user_email, exercise_name, latest_progress_id, latest_date, latest_sets,
+            latest_reps, latest_weight, best_weight, best_e1rm, total_sessions,
+            total_entries
+        )
+        SELECT g.user_email, g.exercise_name, l.id, l.completed_date, l.sets_done,
+               l.reps_done, l.weight_used, g.best_weight, g.best_e1rm, g.sessions,
+               g.entries
+        FROM (
+            SELECT user_email, exercise_name,
+                   MAX(weight_used) AS best_weight,
+                   MAX((CASE WHEN COALESCE(reps_done, 0) <= 1 THEN COALESCE(weight_used, 0)
+                        ELSE weight_used * (1 + reps_done / 30.0) END)::float8) AS best_e1rm,
+                   COUNT(DISTINCT completed_date::date) AS sessions,
+                   COUNT(*) AS entries
+            FROM workout_progress
+            GROUP BY user_email, exercise_name
+        ) g
+        CROSS JOIN LATERAL (
+            SELECT p.id, p.completed_date, p.sets_done, p.reps_done, p.weight_used
+            FROM workout_progress p
+            WHERE p.user_email = g.user_email AND p.exercise_name = g.exercise_name
+            ORDER BY p.completed_date DESC, p.id DESC
+            LIMIT 1
+        ) l
+        ON CONFLICT DO NOTHING;
+
+        INSERT INTO progress_weekly_volume (user_email, exercise_name, week, volume, entries)
+        SELECT user_email, exercise_name, date_trunc('week', completed_date)::date,
+               SUM(COALESCE(sets_done, 0)::bigint * COALESCE(reps_done, 0)
+                   * COALESCE(weight_used, 0)),
+               COUNT(*)
+        FROM workout_progress
+        GROUP BY 1, 2, 3
+        ON CONFLICT DO NOTHING;
+        """,
+    ),
+]
+
+# (name, sql, params) for each query the app runs on every page view. the SQL is
+# the same constant the app function executes, so the check can't drift from it;
+# params only need the right types, the check looks at the plan and not the rows
+_USER = "someone@example.com"
+_PAGE = {
+    "user": _USER,
+    "plan": 1,
+    "exercise": "Bench Press",
+    "start": None,
+    "end": None,
+    "after_date": None,
+    "after_id": None,
+    "limit": PAGE_SIZE,
+}
+HOT_QUERIES = [
+    ("get_all_plans", PLAN_LIST_SQL, {"user": _USER}),
+    ("get_plan_snapshots", PLAN_SNAPSHOTS_SQL, {"user": _USER, "plan": None}),
+    ("get_plan_snapshots one plan", PLAN_SNAPSHOTS_SQL, {"user": _USER, "plan": 1}),
+    ("get_progress_exercises", PROGRESS_EXERCISES_SQL, {"user": _USER, "plan": 1}),
+    ("get_progress_page", PROGRESS_PAGE_SQL, _PAGE),
+    (
+        "get_progress_page filtered",
+        PROGRESS_PAGE_SQL,
+        dict(
+            _PAGE,
+            start=datetime(2024, 1, 1),
+            end=datetime(2024, 4, 1),
+            after_date=datetime(2024, 3, 1),
+            after_id=100,
+        ),
+    ),
+    (
+        "get_progress_series",
+        PROGRESS_SERIES_SQL,
+        dict(_PAGE, start=datetime(2024, 1, 1), end=None, points=MAX_CHART_POINTS),
+    ),
+    ("load_progress_frame", PROGRESS_FRAME_SQL, {"user": _USER, "plan": 1}),
+    (
+        "load_progress_frame all plans",
+        PROGRESS_FRAME_SQL,
+        {"user": _USER, "plan": None},
+    ),
+    (
+        "get_last_session_sets",
+        LAST_SESSION_SETS_SQL,
+        {"user": _USER, "names": ["Bench Press", "Back Squat"]},
+    ),
+    (
+        "get_weekly_volume",
+        WEEKLY_VOLUME_SQL,
+        {"user": _USER, "exercise": "Bench Press", "weeks": 12},
+    ),
+]
+
+
+def ensure_migrations_table(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT now()
+            )
+            """
+        )
+    conn.commit()
+
+
+def applied_versions(conn):
+    ensure_migrations_table(conn)
+    with conn.cursor() as cur:
+        cur.execute("SELECT version FROM schema_migrations ORDER BY version")
+        return [row[0] for row in cur.fetchall()]
+
+
+# applies each pending migration in its own transaction; the advisory lock keeps
+# two app servers starting at once from running the same migration twice
+def migrate(conn):
+    ensure_migrations_table(conn)
+    applied = []
+    for version, name, sql in MIGRATIONS:
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))"
+                )
+                cur.execute(
+                    "SELECT 1 FROM schema_migrations WHERE version = %s", (version,)
+                )
+                if cur.fetchone():
+                    conn.rollback()
+                    continue
+                cur.execute(sql)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name),
+                )
+            conn.commit()
+            applied.append(version)
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
+
+
+def _scans(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _scans(child)
+
+
+# EXPLAINs every hot query with sequential scans priced out of the running: if a
+# usable index exists the planner takes it, so any Seq Scan left means the index
+# is missing or no longer matches the query. returns {query name: [table, ...]}
+def check_hot_query_indexes(conn, queries=HOT_QUERIES):
+    failures = {}
+    with conn.cursor() as cur:
+        cur.execute("SET LOCAL enable_seqscan = off")
+        for name, sql, params in queries:
+            cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cur.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            seq_scans = [
+                node.get("Relation Name")
+                for node in _scans(plan[0]["Plan"])
+                if node["Node Type"] == "Seq Scan"
+            ]
+            if seq_scans:
+                failures[name] = seq_scans
+    conn.rollback()
+    return failures
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "migrate"
+    with pooled_connection() as conn:
+        if command == "migrate":
+            applied = migrate(conn)
+            print(f"Applied migrations: {applied or 'none, already up to date'}")
+        elif command == "status":
+            done = set(applied_versions(conn))
+            for version, name, _ in MIGRATIONS:
+                print(f"{'x' if version in done else ' '} {version:>3} {name}")
+        elif command == "check":
+            failures = check_hot_query_indexes(conn)
+            for name, tables in failures.items():
+                print(f"FAIL {name}: sequential scan on {', '.join(tables)}")
+            if failures:
+                return 1
+            print(f"OK: all {len(HOT_QUERIES)} hot queries use indexes")
+        else:
+            print(f"Unknown command {command!r}, use migrate, status or check")
+            return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+import tracing
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(
+        self, minconn, maxconn, timeout=10.0, idle_check_after=30.0, **connect_kwargs
+    ):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        # how long getconn waits for a free connection before giving up
+        self.timeout = timeout
+        # connections idle longer than this get pinged before being handed out
+        self.idle_check_after = idle_check_after
+        self.connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        self._idle = []  # (conn, last_used) pairs, most recently used last
+        self._size = 0  # open connections, idle or checked out
+        self._closed = False
+        self._stats = {
+            "hits": 0,  # checkout served by an idle connection
+            "misses": 0,  # checkout had to open a new connection
+            "waits": 0,  # checkout had to wait for another session to return one
+            "wait_time": 0.0,  # total seconds spent waiting in getconn
+            "timeouts": 0,
+            "discarded": 0,  # broken or stale connections thrown away
+        }
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        return psycopg2.connect(**self.connect_kwargs)
+
+    def _healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        status = conn.get_transaction_status()
+        if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        # only pay for a round trip when the connection sat idle for a while
+        if time.monotonic() - last_used < self.idle_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                # every connection is checked out, wait for one to come back
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {self.timeout}s"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    # reserve the slot now so other threads can't overshoot maxconn
+                    conn, last_used = None, None
+                    self._size += 1
+
+            # health checks and connects happen outside the lock
+            if conn is not None:
+                if not self._healthy(conn, last_used):
+                    self._discard(conn)
+                    continue
+                stat = "hits"
+            else:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                stat = "misses"
+
+            with self._cond:
+                self._stats[stat] += 1
+                if waited:
+                    self._stats["waits"] += 1
+                    self._stats["wait_time"] += time.monotonic() - start
+            return conn
+
+    def putconn(self, conn, close=False):
+        if close or conn.closed:
+            self._discard(conn)
+            return
+
+        # never hand out a connection with someone else's open transaction
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                conn.close()
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                conn.close()
+            self._size -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._size - len(self._idle)
+            checkouts = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / checkouts if checkouts else 0.0
+        return stats
+
+
+# one pool per process, shared by every streamlit session
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # every statement gets a span when tracing is on
+                extra = {}
+                if tracing.ENABLED:
+                    extra["cursor_factory"] = tracing.TracingCursor
+                _pool = ConnectionPool(
+                    minconn=int(os.getenv("DB_POOL_MIN", 1)),
+                    maxconn=int(os.getenv("DB_POOL_MAX", 10)),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", 10)),
+                    host=os.getenv("DB_HOST"),
+                    port=os.getenv("DB_PORT"),
+                    dbname=os.getenv("DB_NAME"),
+                    user=os.getenv("DB_USER"),
+                    **extra,
+                )
+    return _pool
+
+
+@contextmanager
+def pooled_connection():
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        # anything left uncommitted is rolled back before the connection is reused
+        pool.putconn(conn)
+
+
+def pool_stats():
+    if _pool is None:
+        return {}
+    return _pool.stats()
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+
+from workoutPlanner import MODEL, PROMPT_VERSION, plan_from_dict
+
+
+def normalize_goal(goal):
+    return " ".join(goal.lower().split())
+
+
+def cache_key(goal, time, days, model=MODEL, prompt_version=PROMPT_VERSION):
+    raw = json.dumps(
+        [normalize_goal(goal), int(time), int(days), model, prompt_version]
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# parsed plans from generate_workout_plan, stored in a sqlite file so they survive
+# restarts and are shared by every session; entries expire after `ttl` seconds and
+# the least recently used ones are dropped once there are more than `max_entries`
+class GenerationCache:
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS generated_plans (
+                key TEXT PRIMARY KEY,
+                plan TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            """
+            CREATE INDEX IF NOT EXISTS generated_plans_last_used
+            ON generated_plans (last_used)
+            """
+        )
+        self._db.commit()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "regenerations": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT plan, created_at FROM generated_plans WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            plan, created_at = row
+            if now - created_at > self.ttl:
+                self._db.execute("DELETE FROM generated_plans WHERE key = ?", (key,))
+                self._db.commit()
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._db.execute(
+                "UPDATE generated_plans SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+            self._stats["hits"] += 1
+        # decoded fresh on every hit, so callers can edit their copy freely
+        return plan_from_dict(json.loads(plan))
+
+    def put(self, key, plan):
+        data = asdict(plan)
+        # shared across users, and never a saved plan's row
+        data.update(user_email=None, id=None, created_at=None)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO generated_plans (key, plan, created_at, last_used)
+                VALUES (?, ?, ?, ?)
+                """,
+                (key, json.dumps(data), now, now),
+            )
+            evicted = self._db.execute(
+                """
+                DELETE FROM generated_plans WHERE key IN (
+                    SELECT key FROM generated_plans
+                    ORDER BY last_used DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+            self._db.commit()
+            self._stats["evictions"] += evicted
+
+    def record_regeneration(self):
+        with self._lock:
+            self._stats["regenerations"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._db.execute(
+                "SELECT COUNT(*) FROM generated_plans"
+            ).fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GenerationCache(
+                    path=os.getenv(
+                        "GENERATION_CACHE_PATH", ".generation_cache.sqlite3"
+                    ),
+                    ttl=float(os.getenv("GENERATION_CACHE_TTL", 7 * 24 * 3600)),
+                    max_entries=int(os.getenv("GENERATION_CACHE_SIZE", 1000)),
+                )
+    return _cache
+
+
+def lookup(goal, time, days):
+    return get_cache().get(cache_key(goal, time, days))
+
+
+def store(goal, time, days, plan):
+    get_cache().put(cache_key(goal, time, days), plan)
+
+
+def record_regeneration():
+    get_cache().record_regeneration()
+
+
+def cache_stats():
+    if _cache is None:
+        return {}
+    return _cache.stats()
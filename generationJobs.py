@@ -0,0 +1,193 @@
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from generationCache import cache_key, lookup, store
+from workoutPlanner import (
+    WorkoutPlanStream,
+    generate_and_parse_workout_plan,
+    generate_workout_plan_parallel,
+)
+
+# plan generation runs here instead of inside the streamlit script, so a session
+# is never frozen while GPT writes. at most GENERATION_WORKERS generations run at
+# once and GENERATION_MAX_QUEUE more may wait; each user can have
+# GENERATION_PER_USER of them in flight, counted until the job finishes even if
+# they stop waiting for it. identical requests (same inputs and mode) that arrive
+# while one is in flight share that job instead of paying for another completion,
+# whoever sent them
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", 4))
+GENERATION_MAX_QUEUE = int(os.getenv("GENERATION_MAX_QUEUE", 32))
+GENERATION_PER_USER = int(os.getenv("GENERATION_PER_USER", 2))
+
+
+class JobLimitReached(Exception):
+    pass
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+# handle for one generation, safe to keep in st.session_state and poll from reruns.
+# `days` fills in while a streamed plan is written; `plan` or `error` is set once
+# `state` is "done" or "failed"
+class Job:
+    def __init__(self, key, goal, minutes, days, mode):
+        self.id = next(_job_ids)
+        self.key = key
+        self.goal = goal
+        self.minutes = minutes
+        self.day_count = days
+        self.mode = mode
+        self.state = "queued"
+        self.from_cache = False
+        self.users = set()  # emails waiting on it, each holding a per-user slot
+        self.days = []
+        self.plan = None
+        self.error = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+    # blocks until the plan is ready; raises what the generation raised
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Generation job {self.id} still {self.state}")
+        if self.error is not None:
+            raise self.error
+        return self.plan
+
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.submitted
+
+
+_job_ids = itertools.count(1)
+_lock = threading.Lock()
+_pool = ThreadPoolExecutor(
+    max_workers=GENERATION_WORKERS, thread_name_prefix="plan-generation"
+)
+_in_flight = {}  # (cache key, mode) -> Job still queued or running
+_user_jobs = {}  # user_email -> set of in-flight job ids they are waiting on
+_wait_times = deque(maxlen=200)  # seconds from submit to start
+_run_times = deque(maxlen=200)
+_stats = {
+    "submitted": 0,
+    "deduplicated": 0,  # attached to an identical job already in flight
+    "cache_hits": 0,  # answered from the generation cache, no job run
+    "user_limited": 0,
+    "queue_full": 0,
+    "completed": 0,
+    "failed": 0,
+}
+
+
+# "stream" publishes each day in job.days as soon as it is written; "parallel" and
+# "classic" are the other two generation modes of the generator page
+def _generate(job):
+    if job.mode == "stream":
+        stream = WorkoutPlanStream(job.goal, job.minutes, job.day_count)
+        for day in stream:
+            job.days.append(day)
+        return stream.plan
+    if job.mode == "parallel":
+        return generate_workout_plan_parallel(job.goal, job.minutes, job.day_count)
+    return generate_and_parse_workout_plan(job.goal, job.minutes, job.day_count)
+
+
+def _run(job):
+    with _lock:
+        job.state = "running"
+        job.started = time.monotonic()
+        _wait_times.append(job.started - job.submitted)
+    try:
+        plan = _generate(job)
+        # stored even if nobody is polling any more, so the next ask is a cache hit
+        store(job.goal, job.minutes, job.day_count, plan)
+        job.plan = plan
+    except Exception as e:
+        job.error = e
+    with _lock:
+        job.finished = time.monotonic()
+        job.state = "failed" if job.error is not None else "done"
+        _run_times.append(job.finished - job.started)
+        _stats["failed" if job.error is not None else "completed"] += 1
+        _in_flight.pop(job.key, None)
+        # the only place slots are freed, so walking away from a job does not let
+        # a user start more generations than GENERATION_PER_USER
+        for user_email in job.users:
+            job_ids = _user_jobs.get(user_email)
+            if job_ids is not None:
+                job_ids.discard(job.id)
+                if not job_ids:
+                    del _user_jobs[user_email]
+    job._done.set()
+
+
+# returns a Job at once; it may already be done (cache hit) or be shared with
+# other sessions. raises JobLimitReached or JobQueueFull instead of queueing more
+def submit_generation(user_email, goal, minutes, days, mode, regenerate=False):
+    # a streamed job publishes days as it goes and the others do not, so only the
+    # same mode can share a job; the finished plans share the cache either way
+    key = (cache_key(goal, minutes, days), mode)
+    if not regenerate:
+        plan = lookup(goal, minutes, days)
+        if plan is not None:
+            job = Job(key, goal, minutes, days, mode)
+            job.state, job.plan, job.from_cache = "done", plan, True
+            job.started = job.finished = job.submitted
+            job._done.set()
+            with _lock:
+                _stats["cache_hits"] += 1
+            return job
+
+    with _lock:
+        mine = _user_jobs.get(user_email, set())
+        job = _in_flight.get(key)
+        if job is not None:
+            if job.id not in mine:
+                _stats["deduplicated"] += 1
+                job.users.add(user_email)
+                _user_jobs.setdefault(user_email, set()).add(job.id)
+            return job
+        if len(mine) >= GENERATION_PER_USER:
+            _stats["user_limited"] += 1
+            raise JobLimitReached(
+                "You already have plans generating, wait for one to finish"
+            )
+        queued = sum(j.state == "queued" for j in _in_flight.values())
+        if queued >= GENERATION_MAX_QUEUE:
+            _stats["queue_full"] += 1
+            raise JobQueueFull("Plan generation is busy, try again in a moment")
+        job = Job(key, goal, minutes, days, mode)
+        job.users.add(user_email)
+        _in_flight[key] = job
+        _user_jobs.setdefault(user_email, set()).add(job.id)
+        _stats["submitted"] += 1
+    _pool.submit(_run, job)
+    return job
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else None
+
+
+def job_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["queue_depth"] = sum(j.state == "queued" for j in _in_flight.values())
+        stats["running"] = sum(j.state == "running" for j in _in_flight.values())
+        waits, runs = list(_wait_times), list(_run_times)
+    stats["wait_p50"] = _percentile(waits, 0.5)
+    stats["wait_p95"] = _percentile(waits, 0.95)
+    stats["run_p50"] = _percentile(runs, 0.5)
+    stats["run_p95"] = _percentile(runs, 0.95)
+    return stats
@@ -0,0 +1,178 @@
+from collections import defaultdict
+from dataclasses import dataclass
+
+from workoutPlanner import Exercise, WorkoutDay, WorkoutPlan
+
+
+@dataclass(frozen=True)
+class LibraryExercise:
+    name: str
+    muscle_group: str
+    equipment: str  # barbell, dumbbell, cable, machine, bodyweight
+    compound: bool
+    setup_minutes: float  # getting the station ready, on top of the sets themselves
+
+
+EXERCISE_LIBRARY = [
+    LibraryExercise("Barbell Bench Press", "chest", "barbell", True, 2),
+    LibraryExercise("Incline Dumbbell Press", "chest", "dumbbell", True, 1),
+    LibraryExercise("Push-Up", "chest", "bodyweight", True, 0),
+    LibraryExercise("Cable Fly", "chest", "cable", False, 1),
+    LibraryExercise("Dumbbell Fly", "chest", "dumbbell", False, 1),
+    LibraryExercise("Overhead Press", "shoulders", "barbell", True, 2),
+    LibraryExercise("Seated Dumbbell Shoulder Press", "shoulders", "dumbbell", True, 1),
+    LibraryExercise("Lateral Raise", "shoulders", "dumbbell", False, 0.5),
+    LibraryExercise("Face Pull", "shoulders", "cable", False, 1),
+    LibraryExercise("Pike Push-Up", "shoulders", "bodyweight", True, 0),
+    LibraryExercise("Close-Grip Bench Press", "triceps", "barbell", True, 2),
+    LibraryExercise("Triceps Pushdown", "triceps", "cable", False, 0.5),
+    LibraryExercise("Overhead Dumbbell Extension", "triceps", "dumbbell", False, 0.5),
+    LibraryExercise("Bench Dip", "triceps", "bodyweight", False, 0),
+    LibraryExercise("Pull-Up", "back", "bodyweight", True, 0),
+    LibraryExercise("Barbell Row", "back", "barbell", True, 2),
+    LibraryExercise("Lat Pulldown", "back", "cable", True, 1),
+    LibraryExercise("One-Arm Dumbbell Row", "back", "dumbbell", True, 1),
+    LibraryExercise("Seated Cable Row", "back", "cable", True, 1),
+    LibraryExercise("Inverted Row", "back", "bodyweight", True, 1),
+    LibraryExercise("Barbell Curl", "biceps", "barbell", False, 1),
+    LibraryExercise("Hammer Curl", "biceps", "dumbbell", False, 0.5),
+    LibraryExercise("Cable Curl", "biceps", "cable", False, 0.5),
+    LibraryExercise("Chin-Up", "biceps", "bodyweight", True, 0),
+    LibraryExercise("Back Squat", "quads", "barbell", True, 3),
+    LibraryExercise("Leg Press", "quads", "machine", True, 1),
+    LibraryExercise("Goblet Squat", "quads", "dumbbell", True, 0.5),
+    LibraryExercise("Walking Lunge", "quads", "dumbbell", True, 0.5),
+    LibraryExercise("Bulgarian Split Squat", "quads", "bodyweight", True, 0.5),
+    LibraryExercise("Leg Extension", "quads", "machine", False, 1),
+    LibraryExercise("Romanian Deadlift", "hamstrings", "barbell", True, 2),
+    LibraryExercise("Dumbbell Romanian Deadlift", "hamstrings", "dumbbell", True, 1),
+    LibraryExercise("Lying Leg Curl", "hamstrings", "machine", False, 1),
+    LibraryExercise("Glute Bridge", "hamstrings", "bodyweight", False, 0),
+    LibraryExercise("Hip Thrust", "glutes", "barbell", True, 2),
+    LibraryExercise("Cable Kickback", "glutes", "cable", False, 0.5),
+    LibraryExercise("Standing Calf Raise", "calves", "machine", False, 0.5),
+    LibraryExercise("Single-Leg Calf Raise", "calves", "bodyweight", False, 0),
+    LibraryExercise("Plank", "core", "bodyweight", False, 0),
+    LibraryExercise("Hanging Leg Raise", "core", "bodyweight", False, 0),
+    LibraryExercise("Cable Crunch", "core", "cable", False, 0.5),
+    LibraryExercise("Kettlebell Swing", "conditioning", "dumbbell", True, 0.5),
+    LibraryExercise("Burpee", "conditioning", "bodyweight", True, 0),
+    LibraryExercise("Mountain Climber", "conditioning", "bodyweight", False, 0),
+]
+
+
+# muscle group -> equipment -> exercises, compound movements first; built once
+def _build_index(library):
+    index = defaultdict(lambda: defaultdict(list))
+    for ex in library:
+        index[ex.muscle_group][ex.equipment].append(ex)
+        index[ex.muscle_group]["any"].append(ex)
+    for by_equipment in index.values():
+        for exercises in by_equipment.values():
+            exercises.sort(key=lambda ex: (not ex.compound, ex.setup_minutes))
+    return index
+
+
+LIBRARY_INDEX = _build_index(EXERCISE_LIBRARY)
+
+DAY_TYPES = {
+    "Full Body": ["quads", "chest", "back", "hamstrings", "shoulders", "core"],
+    "Upper Body": ["chest", "back", "shoulders", "triceps", "biceps"],
+    "Lower Body": ["quads", "hamstrings", "glutes", "calves", "core"],
+    "Push": ["chest", "shoulders", "triceps"],
+    "Pull": ["back", "biceps", "core"],
+    "Legs": ["quads", "hamstrings", "glutes", "calves"],
+    "Core & Conditioning": ["conditioning", "core"],
+}
+
+SPLITS = {
+    1: ["Full Body"],
+    2: ["Upper Body", "Lower Body"],
+    3: ["Push", "Pull", "Legs"],
+    4: ["Upper Body", "Lower Body", "Upper Body", "Lower Body"],
+    5: ["Push", "Pull", "Legs", "Upper Body", "Lower Body"],
+    6: ["Push", "Pull", "Legs", "Push", "Pull", "Legs"],
+    7: ["Push", "Pull", "Legs", "Push", "Pull", "Legs", "Core & Conditioning"],
+}
+
+# (keywords, sets, reps, rest seconds); first match wins
+GOAL_SCHEMES = [
+    (("strength", "strong", "power"), 5, 5, 180),
+    (("muscle", "hypertrophy", "bulk", "size", "mass"), 4, 10, 90),
+    (("fat", "lose", "weight loss", "lean", "cut", "endurance", "tone"), 3, 15, 45),
+]
+DEFAULT_SCHEME = (3, 10, 60)
+SECONDS_PER_SET = 45
+
+
+def goal_scheme(goal):
+    goal = goal.lower()
+    for keywords, sets, reps, rest in GOAL_SCHEMES:
+        if any(keyword in goal for keyword in keywords):
+            return sets, reps, rest
+    return DEFAULT_SCHEME
+
+
+def exercise_minutes(ex, sets, rest):
+    return ex.setup_minutes + sets * (SECONDS_PER_SET + rest) / 60
+
+
+def _candidates(muscle_group, equipment):
+    by_equipment = LIBRARY_INDEX.get(muscle_group, {})
+    if equipment == "any":
+        return by_equipment.get("any", [])
+    # bodyweight moves work wherever the chosen equipment isn't available
+    return by_equipment.get(equipment, []) + by_equipment.get("bodyweight", [])
+
+
+# fills the session round-robin over the day's muscle groups until the time budget
+# runs out; `variant` shifts the picks so repeated day types don't get identical lists
+def build_local_day(day_type, minutes, sets, reps, rest, equipment="any", variant=0):
+    groups = DAY_TYPES[day_type]
+    pools = {group: _candidates(group, equipment) for group in groups}
+    used = set()
+    exercises = []
+    remaining = minutes
+    rounds = 0
+
+    while remaining > 0 and rounds < 4:
+        added = False
+        for group in groups:
+            pool = [ex for ex in pools[group] if ex.name not in used]
+            if not pool:
+                continue
+            ex = pool[variant % len(pool)] if rounds == 0 else pool[0]
+            cost = exercise_minutes(ex, sets, rest)
+            if cost > remaining and exercises:
+                continue
+            used.add(ex.name)
+            remaining -= cost
+            added = True
+            exercises.append(
+                Exercise(name=ex.name, sets=sets, reps=reps, rest_time=rest)
+            )
+        if not added:
+            break
+        rounds += 1
+    return exercises
+
+
+# builds a whole plan from the same goal/minutes/days the GPT prompt uses, with no
+# network call, so it can serve as an instant draft or as a fallback
+def build_local_plan(goal, minutes, days, equipment="any") -> WorkoutPlan:
+    days = max(1, min(int(days), 7))
+    sets, reps, rest = goal_scheme(goal)
+    seen = defaultdict(int)
+    workout_days = []
+    for i, day_type in enumerate(SPLITS[days]):
+        workout_days.append(
+            WorkoutDay(
+                day_name=f"Day {i + 1}",
+                focus=day_type,
+                exercises=build_local_day(
+                    day_type, minutes, sets, reps, rest, equipment, seen[day_type]
+                ),
+            )
+        )
+        seen[day_type] += 1
+    return WorkoutPlan(goal=goal, days_per_week=days, workout_days=workout_days)
@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from planPrompts import nutrition_max_tokens, nutrition_messages
+from tracing import span
+from workoutPlanner import PlanParseError, create_completion, load_json_text
+
+# what the request router sends here: eating plans rather than training plans.
+# they are shown once and not saved, so there are no tables behind them
+
+
+@dataclass
+class Meal:
+    name: str
+    foods: str
+    calories: Optional[int] = None
+    protein_g: Optional[int] = None
+
+
+@dataclass
+class NutritionPlan:
+    request: str
+    daily_calories: Optional[int] = None
+    protein_g: Optional[int] = None
+    carbs_g: Optional[int] = None
+    fat_g: Optional[int] = None
+    meals: List[Meal] = None
+    tips: List[str] = None
+
+
+# the offline plan: a calorie and protein target for the goal the request names
+# (first match wins), split over four template meals. generic, but it needs no
+# API, so the nutrition path has a fallback like the workout path does
+GOAL_TARGETS = [
+    (("cut", "lose", "loss", "lean", "shred", "deficit", "fat"), 1900, 160),
+    (("bulk", "gain", "mass", "muscle", "surplus"), 2800, 170),
+]
+DEFAULT_TARGET = (2300, 150)
+PLANT_BASED = ("vegan", "vegetarian", "plant")
+# (name, share of the day's calories, foods, plant-based foods)
+MEAL_TEMPLATES = [
+    (
+        "Breakfast",
+        0.25,
+        "Oats with milk and berries, two eggs",
+        "Oats with soy milk, berries and peanut butter",
+    ),
+    (
+        "Lunch",
+        0.30,
+        "Chicken breast, rice and mixed vegetables",
+        "Tofu, rice and mixed vegetables",
+    ),
+    ("Snack", 0.15, "Greek yogurt with a banana", "Soy yogurt, a banana and almonds"),
+    (
+        "Dinner",
+        0.30,
+        "Salmon, potatoes and a green salad",
+        "Lentil curry with brown rice and spinach",
+    ),
+]
+OFFLINE_TIPS = [
+    "Weigh yourself weekly and adjust calories by 100-200 if the trend stalls.",
+    "Spread protein evenly over the day's meals.",
+]
+
+
+def build_local_nutrition_plan(request: str) -> NutritionPlan:
+    text = request.lower()
+    calories, protein = next(
+        (
+            (calories, protein)
+            for keywords, calories, protein in GOAL_TARGETS
+            if any(keyword in text for keyword in keywords)
+        ),
+        DEFAULT_TARGET,
+    )
+    fat = round(calories * 0.25 / 9)
+    plant = any(word in text for word in PLANT_BASED)
+    return NutritionPlan(
+        request=request,
+        daily_calories=calories,
+        protein_g=protein,
+        carbs_g=round((calories - protein * 4 - fat * 9) / 4),
+        fat_g=fat,
+        meals=[
+            Meal(
+                name=name,
+                foods=plant_foods if plant else foods,
+                calories=round(calories * share),
+                protein_g=round(protein * share),
+            )
+            for name, share, foods, plant_foods in MEAL_TEMPLATES
+        ],
+        tips=list(OFFLINE_TIPS),
+    )
+
+
+def _int_or_none(value):
+    try:
+        return round(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_nutrition_plan(request: str, response: str) -> NutritionPlan:
+    with span("parse", "parse_nutrition_plan") as s:
+        data = load_json_text(response, [])
+        if not isinstance(data, dict):
+            raise PlanParseError(
+                f"Nutrition plan is a JSON {type(data).__name__}, not an object"
+            )
+        meals = [
+            Meal(
+                name=str(meal.get("name") or "Meal"),
+                foods=str(meal.get("foods") or ""),
+                calories=_int_or_none(meal.get("calories")),
+                protein_g=_int_or_none(meal.get("protein_g")),
+            )
+            for meal in data.get("meals") or []
+            if isinstance(meal, dict)
+        ]
+        if not meals:
+            raise PlanParseError("Nutrition plan has no meals")
+        s.set(rows=len(meals))
+        return NutritionPlan(
+            request=request,
+            daily_calories=_int_or_none(data.get("daily_calories")),
+            protein_g=_int_or_none(data.get("protein_g")),
+            carbs_g=_int_or_none(data.get("carbs_g")),
+            fat_g=_int_or_none(data.get("fat_g")),
+            meals=meals,
+            tips=[str(tip) for tip in data.get("tips") or []],
+        )
+
+
+def generate_nutrition_plan(request: str) -> NutritionPlan:
+    response = create_completion(
+        "generate_nutrition_plan",
+        nutrition_messages(request),
+        nutrition_max_tokens(),
+    )
+    return parse_nutrition_plan(request, response)
@@ -1,22 +1,27 @@
+import psycopg2
 import streamlit as st
 from workoutPlanner import delete_workout_plan
 from appSetup import get_db_connection
 
 
-def delete_plan(conn, selected_plan_id):
+def delete_plan(selected_plan_id):
     if st.session_state.get("show_confirm"):
         st.warning("⚠️ Are you sure you want to delete this plan?")
         col1, col2 = st.columns(2)
 
         with col1:
             if st.button("✅ Yes, delete it"):
-                conn = get_db_connection()
-                delete_workout_plan(conn, selected_plan_id)
-                conn.close()
-                st.success("✅ Plan deleted successfully!")
                 del st.session_state["show_confirm"]
-                st.session_state["deleted_success"] = True
-                st.rerun()
+                try:
+                    with get_db_connection() as conn:
+                        delete_workout_plan(conn, selected_plan_id)
+                except psycopg2.Error as e:
+                    # nothing was deleted, so the plan stays on screen as it was
+                    st.error(f"❌ Could not delete the plan: {e}")
+                else:
+                    st.success("✅ Plan deleted successfully!")
+                    st.session_state["deleted_success"] = True
+                    st.rerun()
 
         with col2:
             if st.button("❌ No, cancel"):
@@ -1,26 +1,72 @@
 import streamlit as st
-from appSetup import get_days_and_exercises, get_db_connection
-from workoutPlanner import save_progress
-
-
-def display_plan(conn, selected_plan_id):
-    data = get_days_and_exercises(conn, selected_plan_id)
-    current_day = None
-    for row in data:
-        # instead of row[0], row[1] ... we use day_id, day_name ...
-        day_id, day_name, focus, name, sets, reps, rest_time, weight = row
-
-        if day_name != current_day:
-            # using html to display day and focus
-            st.markdown(f"<h4>{day_name} – {focus}</h4>", unsafe_allow_html=True)
-            current_day = day_name
-
-        # displays each exercise in a row
-        st.markdown(
-            f"- **{name}**: {sets}x{reps}, Rest: {rest_time}s"
-            + (f", Weight: {weight} lbs" if weight else "")
-        )
-        with st.expander(f"📈 Log Your Progress for {name}"):
+from appSetup import get_db_connection, load_last_session_sets
+from workoutPlanner import save_progress, save_session_progress
+
+
+# one form per day: nothing reruns while sets are typed in, and submitting writes
+# the whole session in one transaction
+def log_day_form(plan_id, day, last_session):
+    import pandas as pd
+
+    day_id, day_name = day.id, day.day_name
+    with st.form(key=f"log_day_{day_id}"):
+        editors = []
+        for ex in day.exercises:
+            st.markdown(f"**{ex.name}**")
+            previous = last_session.get(ex.name)
+            if previous:
+                sets_rows = [{"Reps": r, "Weight": w} for r, w in previous]
+            else:
+                sets_rows = [{"Reps": ex.reps, "Weight": ex.weight or 0}] * (
+                    ex.sets or 1
+                )
+            editors.append(
+                (
+                    ex.name,
+                    st.data_editor(
+                        pd.DataFrame(sets_rows, columns=["Reps", "Weight"]),
+                        num_rows="dynamic",
+                        key=f"log_day_{day_id}_{ex.name}",
+                        column_config={
+                            "Reps": st.column_config.NumberColumn(min_value=0, step=1),
+                            "Weight": st.column_config.NumberColumn(
+                                "Weight (lbs)", min_value=0, step=1
+                            ),
+                        },
+                    ),
+                )
+            )
+        notes = st.text_area("Notes (optional)", key=f"log_day_notes_{day_id}")
+        submitted = st.form_submit_button(f"Save {day_name}")
+
+    if submitted:
+        entries = []
+        for name, sets_df in editors:
+            sets_df = sets_df.dropna(subset=["Reps"])
+            sets_df = sets_df[sets_df["Reps"] > 0]
+            entries.append(
+                (
+                    name,
+                    [
+                        (int(r), int(w) if pd.notna(w) else 0)
+                        for r, w in zip(sets_df["Reps"], sets_df["Weight"])
+                    ],
+                )
+            )
+        with get_db_connection() as conn:
+            saved = save_session_progress(
+                conn, st.session_state.user_email, plan_id, day_name, entries, notes
+            )
+        if saved:
+            st.success(f"✅ Logged {len(saved)} exercises for {day_name}!")
+        else:
+            st.warning("No sets with reps to log.")
+
+
+# a form too, so typing into it does not rerun anything until it is saved
+def log_exercise_expander(plan_id, day_id, day_name, name):
+    with st.expander(f"📈 Log Your Progress for {name}"):
+        with st.form(key=f"log_exercise_{day_id}_{name}", clear_on_submit=True):
             sets_done = st.number_input(
                 "Sets done", min_value=0, key=f"sets_{day_id}_{name}"
             )
@@ -31,9 +77,10 @@ def display_plan(conn, selected_plan_id):
                 "Weight used (lbs)", min_value=0, key=f"weight_{day_id}_{name}"
             )
             notes = st.text_area("Notes (optional)", key=f"notes_{day_id}_{name}")
+            submitted = st.form_submit_button("Save Progress")
 
-            if st.button("Save Progress", key=f"save_progress_{day_id}_{name}"):
-                conn = get_db_connection()
+        if submitted:
+            with get_db_connection() as conn:
                 save_progress(
                     conn,
                     st.session_state.user_email,
@@ -43,7 +90,48 @@ def display_plan(conn, selected_plan_id):
                     reps_done,
                     weight_used,
                     notes,
-                    selected_plan_id,
+                    plan_id,
+                )
+            st.success("✅ Progress saved!")
+
+
+def display_plan(plan):
+    log_mode = st.radio(
+        "Log progress",
+        ["Whole day", "One exercise at a time"],
+        horizontal=True,
+        key=f"log_mode_{plan.id}",
+    )
+    # one rollup lookup per exercise, however long the history, and cached until
+    # the user logs or changes progress
+    last_session = load_last_session_sets(
+        st.session_state.user_email,
+        {ex.name for day in plan.workout_days for ex in day.exercises},
+    )
+
+    # days are kept apart by id, so two days sharing a name still show separately
+    for day in plan.workout_days:
+        # using html to display day and focus
+        st.markdown(f"<h4>{day.day_name} – {day.focus}</h4>", unsafe_allow_html=True)
+
+        if not day.exercises:
+            st.caption("No exercises on this day yet.")
+            continue
+
+        for ex in day.exercises:
+            # displays each exercise in a row
+            st.markdown(
+                f"- **{ex.name}**: {ex.sets}x{ex.reps}, Rest: {ex.rest_time}s"
+                + (f", Weight: {ex.weight} lbs" if ex.weight else "")
+            )
+            if ex.name in last_session:
+                st.caption(
+                    "Last time: "
+                    + ", ".join(f"{r} @ {w or 0} lbs" for r, w in last_session[ex.name])
                 )
-                conn.close()
-                st.success("✅ Progress saved!")
+            if log_mode != "Whole day":
+                log_exercise_expander(plan.id, day.id, day.day_name, ex.name)
+
+        if log_mode == "Whole day":
+            with st.expander(f"📝 Log {day.day_name}"):
+                log_day_form(plan.id, day, last_session)
@@ -0,0 +1,161 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return True, self._entries[key]
+            self._stats["misses"] += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+# version numbers for cache keys, keeping at most max_entries of them. each bump
+# takes the next number from one counter, and a key that was dropped (or never
+# bumped) reads as the highest number dropped so far, so no key can go back to a
+# version that entries loaded before its last bump were stored under
+class VersionMap:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._versions = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+
+    def get(self, key):
+        return self._versions.get(key, self._floor)
+
+    def bump(self, key):
+        self._counter += 1
+        self._versions[key] = self._counter
+        self._versions.move_to_end(key)
+        while len(self._versions) > self.max_entries:
+            _, version = self._versions.popitem(last=False)
+            self._floor = max(self._floor, version)
+
+
+# plan lists and whole plans are cached per user under a version number; every
+# write bumps the version, so stale entries are never read again and age out of
+# the LRU. versions live in this process, which is what a streamlit server runs in.
+# the version and owner maps are bounded too: forgetting a version only costs
+# misses, and forgetting an owner bumps that user's list version
+_cache = LRUCache(int(os.getenv("PLAN_CACHE_SIZE", 512)))
+VERSION_LIMIT = int(os.getenv("PLAN_CACHE_VERSIONS", 10000))
+_versions_lock = threading.Lock()
+_list_versions = VersionMap(VERSION_LIMIT)  # user_email -> plan list version
+_plan_owners = OrderedDict()  # plan_id -> user_email, learned from loaded lists
+_progress_versions = VersionMap(VERSION_LIMIT)  # user_email -> progress version
+
+
+def _list_key(user_email):
+    with _versions_lock:
+        return ("plans", user_email, _list_versions.get(user_email))
+
+
+def _remember_owners(user_email, plan_ids):
+    with _versions_lock:
+        for plan_id in plan_ids:
+            _plan_owners[plan_id] = user_email
+            _plan_owners.move_to_end(plan_id)
+        while len(_plan_owners) > VERSION_LIMIT:
+            _, owner = _plan_owners.popitem(last=False)
+            # a list of theirs holding that plan may be cached, and a write to the
+            # plan could no longer find it
+            _list_versions.bump(owner)
+
+
+def get_plan_list(user_email, loader):
+    key = _list_key(user_email)
+    found, plans = _cache.get(key)
+    if not found:
+        plans = loader()
+        _cache.put(key, plans)
+        _remember_owners(user_email, [plan[0] for plan in plans])
+    return plans
+
+
+# all of a user's plans as WorkoutPlan objects; shares the list version, so any
+# write to one of the plans (or a new plan) loads them again
+def get_user_plans(user_email, loader):
+    with _versions_lock:
+        key = ("snapshots", user_email, _list_versions.get(user_email))
+    found, plans = _cache.get(key)
+    if not found:
+        plans = loader()
+        _cache.put(key, plans)
+        _remember_owners(user_email, [plan.id for plan in plans])
+    return plans
+
+
+# {exercise_name: [(reps, weight), ...]} of a user's last session, which the plan
+# view shows on every rerun; any progress write of theirs loads it again
+def get_last_sets(user_email, exercise_names, loader):
+    with _versions_lock:
+        key = (
+            "last_sets",
+            user_email,
+            _progress_versions.get(user_email),
+            frozenset(exercise_names),
+        )
+    found, last = _cache.get(key)
+    if not found:
+        last = loader()
+        _cache.put(key, last)
+    return last
+
+
+def invalidate_progress(user_email):
+    with _versions_lock:
+        _progress_versions.bump(user_email)
+
+
+def invalidate_user(user_email):
+    with _versions_lock:
+        _list_versions.bump(user_email)
+
+
+# if the owner was never seen by this process (or was forgotten, which bumped
+# their lists already), none of their cached lists contain this plan, so there
+# is no list version to bump
+def invalidate_plan(plan_id, user_email=None):
+    with _versions_lock:
+        owner = user_email or _plan_owners.get(plan_id)
+        if owner is not None:
+            _list_versions.bump(owner)
+
+
+def cache_stats():
+    return _cache.stats()
@@ -0,0 +1,225 @@
+import json
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from psycopg2.extras import execute_values
+
+from planCache import invalidate_plan
+from workoutPlanner import Exercise, WorkoutDay, WorkoutPlan, allocate_ids
+
+EXERCISE_FIELDS = ("name", "sets", "reps", "rest_time", "weight")
+DAY_FIELDS = ("day_name", "focus")
+
+
+@dataclass
+class PlanDiff:
+    plan_changed: bool = False
+    # brand new days, inserted together with all of their exercises
+    days_to_insert: List[WorkoutDay] = field(default_factory=list)
+    days_to_update: List[WorkoutDay] = field(default_factory=list)
+    day_ids_to_delete: List[int] = field(default_factory=list)
+    # (day_id, exercise) pairs for exercises added to days that already exist
+    exercises_to_insert: List[Tuple[int, Exercise]] = field(default_factory=list)
+    exercises_to_update: List[Exercise] = field(default_factory=list)
+    exercise_ids_to_delete: List[int] = field(default_factory=list)
+    # exercises of the days in day_ids_to_delete, which go with their day
+    exercise_ids_deleted_with_days: List[int] = field(default_factory=list)
+
+    def is_empty(self):
+        return not (
+            self.plan_changed
+            or self.days_to_insert
+            or self.days_to_update
+            or self.day_ids_to_delete
+            or self.exercises_to_insert
+            or self.exercises_to_update
+            or self.exercise_ids_to_delete
+        )
+
+    # rows written when the diff is applied
+    def row_count(self):
+        return (
+            int(self.plan_changed)
+            + len(self.days_to_insert)
+            + sum(len(day.exercises or []) for day in self.days_to_insert)
+            + len(self.days_to_update)
+            + len(self.day_ids_to_delete)
+            + len(self.exercises_to_insert)
+            + len(self.exercises_to_update)
+            + len(self.exercise_ids_to_delete)
+            + len(self.exercise_ids_deleted_with_days)
+        )
+
+
+def _fields(obj, names):
+    return tuple(getattr(obj, name) for name in names)
+
+
+# compares the plan as loaded from the db with the edited one; rows are matched by
+# id, anything without an id is new and any loaded id missing from `new` is removed
+def diff_workout_plans(old: WorkoutPlan, new: WorkoutPlan) -> PlanDiff:
+    diff = PlanDiff()
+    diff.plan_changed = old.goal != new.goal or old.days_per_week != new.days_per_week
+
+    old_days = {day.id: day for day in old.workout_days or [] if day.id is not None}
+    kept_day_ids = set()
+
+    for day in new.workout_days or []:
+        old_day = old_days.get(day.id)
+        if old_day is None:
+            diff.days_to_insert.append(day)
+            continue
+
+        kept_day_ids.add(day.id)
+        if _fields(day, DAY_FIELDS) != _fields(old_day, DAY_FIELDS):
+            diff.days_to_update.append(day)
+
+        old_exercises = {
+            ex.id: ex for ex in old_day.exercises or [] if ex.id is not None
+        }
+        kept_exercise_ids = set()
+        for ex in day.exercises or []:
+            old_ex = old_exercises.get(ex.id)
+            if old_ex is None:
+                diff.exercises_to_insert.append((day.id, ex))
+                continue
+            kept_exercise_ids.add(ex.id)
+            if _fields(ex, EXERCISE_FIELDS) != _fields(old_ex, EXERCISE_FIELDS):
+                diff.exercises_to_update.append(ex)
+
+        diff.exercise_ids_to_delete += [
+            ex_id for ex_id in old_exercises if ex_id not in kept_exercise_ids
+        ]
+
+    diff.day_ids_to_delete = [
+        day_id for day_id in old_days if day_id not in kept_day_ids
+    ]
+    diff.exercise_ids_deleted_with_days = [
+        ex.id
+        for day_id in diff.day_ids_to_delete
+        for ex in old_days[day_id].exercises or []
+        if ex.id is not None
+    ]
+    return diff
+
+
+# every changed row in one UPDATE: the rows go over as a json array and
+# jsonb_populate_recordset types each field like the table's own column
+def _update_rows(cursor, table, columns, objects, scope_sql, scope_params):
+    rows = [{col: getattr(obj, col) for col in ("id",) + columns} for obj in objects]
+    assignments = ", ".join(f"{col} = v.{col}" for col in columns)
+    cursor.execute(
+        f"""
+        UPDATE {table} AS t
+        SET {assignments}
+        FROM jsonb_populate_recordset(NULL::{table}, %s::jsonb) AS v
+        WHERE t.id = v.id AND {scope_sql}
+        """,
+        (json.dumps(rows, default=str),) + scope_params,
+    )
+
+
+def apply_plan_diff(conn, plan_id, new: WorkoutPlan, diff: PlanDiff):
+    if diff.is_empty():
+        return
+
+    # exercises of new days plus exercises added to existing days
+    new_exercises = [
+        (day, ex) for day in diff.days_to_insert for ex in day.exercises or []
+    ]
+    try:
+        with conn.cursor() as cursor:
+            if diff.plan_changed:
+                cursor.execute(
+                    "UPDATE workout_plans SET goal = %s, days_per_week = %s WHERE id = %s",
+                    (new.goal, new.days_per_week, plan_id),
+                )
+
+            if diff.exercise_ids_to_delete or diff.day_ids_to_delete:
+                cursor.execute(
+                    """
+                    DELETE FROM workout_exercises
+                    WHERE (id = ANY(%s) OR day_id = ANY(%s))
+                      AND day_id IN (SELECT id FROM workout_days WHERE plan_id = %s)
+                    """,
+                    (diff.exercise_ids_to_delete, diff.day_ids_to_delete, plan_id),
+                )
+            if diff.day_ids_to_delete:
+                cursor.execute(
+                    "DELETE FROM workout_days WHERE id = ANY(%s) AND plan_id = %s",
+                    (diff.day_ids_to_delete, plan_id),
+                )
+
+            if diff.days_to_update:
+                _update_rows(
+                    cursor,
+                    "workout_days",
+                    DAY_FIELDS,
+                    diff.days_to_update,
+                    "t.plan_id = %s",
+                    (plan_id,),
+                )
+            if diff.exercises_to_update:
+                _update_rows(
+                    cursor,
+                    "workout_exercises",
+                    EXERCISE_FIELDS,
+                    diff.exercises_to_update,
+                    "t.day_id IN (SELECT id FROM workout_days WHERE plan_id = %s)",
+                    (plan_id,),
+                )
+
+            ids = allocate_ids(
+                cursor,
+                {
+                    "workout_days": len(diff.days_to_insert),
+                    "workout_exercises": len(new_exercises)
+                    + len(diff.exercises_to_insert),
+                },
+            )
+            for day, day_id in zip(diff.days_to_insert, ids["workout_days"]):
+                day.id = day_id
+            free_exercise_ids = iter(ids["workout_exercises"])
+
+            if diff.days_to_insert:
+                execute_values(
+                    cursor,
+                    "INSERT INTO workout_days (id, plan_id, day_name, focus) VALUES %s",
+                    [
+                        (day.id, plan_id, day.day_name, day.focus)
+                        for day in diff.days_to_insert
+                    ],
+                    page_size=len(diff.days_to_insert),
+                )
+
+            pending = [(day.id, ex) for day, ex in new_exercises]
+            pending += diff.exercises_to_insert
+            exercise_rows = []
+            for day_id, ex in pending:
+                ex.id = next(free_exercise_ids)
+                exercise_rows.append((ex.id, day_id) + _fields(ex, EXERCISE_FIELDS))
+            if exercise_rows:
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO workout_exercises (
+                        id, day_id, name, sets, reps, rest_time, weight
+                    )
+                    VALUES %s
+                    """,
+                    exercise_rows,
+                    page_size=len(exercise_rows),
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    invalidate_plan(plan_id, new.user_email)
+
+
+# writes only the rows that differ between the loaded plan and the edited one,
+# all in one transaction, and returns the diff that was applied
+def update_workout_plan(conn, plan_id, old: WorkoutPlan, new: WorkoutPlan):
+    diff = diff_workout_plans(old, new)
+    apply_plan_diff(conn, plan_id, new, diff)
+    return diff
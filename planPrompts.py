@@ -0,0 +1,174 @@
+import threading
+from collections import defaultdict, deque
+
+# each kind of request starts with its own fixed system message, byte for byte,
+# and only the short user message after it changes. the schema is described once
+# there in compact form instead of as a pretty-printed example in every prompt.
+# providers that cache prompt prefixes can reuse it across calls, and a shorter
+# prompt is cheaper and quicker to read either way
+_JSON = "Reply with one minified JSON object, no code block, no other text.\n"
+_HEAD = (
+    "You are a certified personal trainer writing gym plans for intermediate to "
+    "advanced clients. " + _JSON
+)
+_EXERCISE = "Exercise = {name:str,sets:int,reps:int,weight:null,rest_time:seconds}\n"
+_FIT = " Fit sets and rest into the session minutes."
+_NUTRITIONIST = "You are a sports nutritionist writing one-day sample eating plans. "
+_MEAL = "Meal = {name:str,foods:str,calories:int,protein_g:int}\n"
+SYSTEM_PREFIXES = {
+    "plan": _HEAD
+    + _EXERCISE
+    + "Reply = {goal:str,days_per_week:int,workout_days:[{day_name:str,focus:str,"
+    "exercises:[Exercise]}]}, one entry per training day." + _FIT,
+    "outline": _HEAD
+    + "Reply = {workout_days:[{day_name:str,focus:str}]}, one entry per training "
+    "day, no exercises yet.",
+    "day": _HEAD
+    + _EXERCISE
+    + "Reply = {exercises:[Exercise]} for the one day named."
+    + _FIT,
+    "repair": _HEAD
+    + _EXERCISE
+    + "Reply = the day corrected, as {day_name:str,focus:str,exercises:[Exercise]}.",
+    "nutrition": _NUTRITIONIST
+    + _JSON
+    + _MEAL
+    + "Reply = {daily_calories:int,protein_g:int,carbs_g:int,fat_g:int,"
+    "meals:[Meal],tips:[str]}, 3 to 5 meals, at most 3 short tips.",
+    "route": "You sort requests typed into a fitness app. "
+    + _JSON
+    + "workout_planner writes training plans: exercises, sets, reps, splits. "
+    "nutrition_planner writes eating plans: meals, calories, macros, diets.\n"
+    'Reply = {assistant_type:"workout_planner"|"nutrition_planner",'
+    "confidence_score:0-1,description:str}, description being the request "
+    "rewritten as one clear sentence.",
+}
+
+# completion budgets, from the length of minified JSON: an exercise is about 30
+# tokens, a day's name and focus about 20. HEADROOM covers models that still
+# indent their JSON; a cut-off answer costs a retry, so the budget errs long
+EXERCISE_TOKENS = 30
+DAY_TOKENS = 20
+HEADROOM = 2.0
+# a meal with its foods is about 40 tokens, a tip about 25, a routing answer with
+# its one-sentence description about 60
+MEAL_TOKENS = 40
+TIP_TOKENS = 25
+ROUTE_TOKENS = 60
+
+
+def exercises_per_day(minutes):
+    return max(4, min(12, round(minutes / 8)))
+
+
+def plan_max_tokens(days, minutes):
+    per_day = DAY_TOKENS + exercises_per_day(minutes) * EXERCISE_TOKENS
+    return int((40 + days * per_day) * HEADROOM)
+
+
+def outline_max_tokens(days):
+    return int((20 + days * DAY_TOKENS) * HEADROOM)
+
+
+def day_max_tokens(minutes):
+    return repair_max_tokens(exercises_per_day(minutes))
+
+
+def repair_max_tokens(exercise_count):
+    return int((DAY_TOKENS + max(exercise_count, 3) * EXERCISE_TOKENS) * HEADROOM)
+
+
+def nutrition_max_tokens():
+    return int((40 + 5 * MEAL_TOKENS + 3 * TIP_TOKENS) * HEADROOM)
+
+
+def route_max_tokens():
+    return int(ROUTE_TOKENS * HEADROOM)
+
+
+def _messages(kind, details):
+    return [
+        {"role": "system", "content": SYSTEM_PREFIXES[kind]},
+        {"role": "user", "content": details},
+    ]
+
+
+def plan_messages(goal: str, minutes: int, days: int):
+    return _messages(
+        "plan", f"Goal: {goal}\nTraining days: {days}\nSession minutes: {minutes}"
+    )
+
+
+def outline_messages(goal: str, minutes: int, days: int):
+    return _messages(
+        "outline", f"Goal: {goal}\nTraining days: {days}\nSession minutes: {minutes}"
+    )
+
+
+def day_messages(goal: str, minutes: int, day_name: str, focus: str, split: str):
+    return _messages(
+        "day",
+        f"Goal: {goal}\nSession minutes: {minutes}\nWeek: {split}\n"
+        f"Day: {day_name} ({focus})",
+    )
+
+
+def repair_messages(day_json: str, error):
+    return _messages("repair", f"Day: {day_json}\nProblem: {error}")
+
+
+def nutrition_messages(request: str):
+    return _messages("nutrition", f"Request: {request}")
+
+
+def route_messages(text: str):
+    return _messages("route", f"Request: {text}")
+
+
+# token counts of every LLM call, by the function that made it; kept whether or
+# not TRACING is on, so the effect of a prompt change shows up in token_stats()
+_usage_lock = threading.Lock()
+_usage = defaultdict(
+    lambda: {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "cached_tokens": 0,  # part of the prompt served from the provider's cache
+        "completion_tokens": 0,
+        "truncated": 0,  # stopped by max_tokens
+        "seconds": 0.0,
+    }
+)
+_recent_calls = deque(maxlen=200)
+
+
+def record_usage(name, usage, seconds, max_tokens=None, finish_reason=None):
+    details = getattr(usage, "prompt_tokens_details", None)
+    call = {
+        "name": name,
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "max_tokens": max_tokens,
+        "truncated": finish_reason == "length",
+        "seconds": seconds,
+    }
+    with _usage_lock:
+        totals = _usage[name]
+        totals["calls"] += 1
+        for key in ("prompt_tokens", "cached_tokens", "completion_tokens", "seconds"):
+            totals[key] += call[key]
+        totals["truncated"] += call["truncated"]
+        _recent_calls.append(call)
+
+
+# per call name: totals plus averages per call; recent_calls has the last 200
+def token_stats():
+    with _usage_lock:
+        stats = {name: dict(totals) for name, totals in _usage.items()}
+        recent = list(_recent_calls)
+    for totals in stats.values():
+        calls = totals["calls"]
+        totals["avg_prompt_tokens"] = totals["prompt_tokens"] / calls
+        totals["avg_completion_tokens"] = totals["completion_tokens"] / calls
+        totals["avg_seconds"] = totals["seconds"] / calls
+    return {"calls": stats, "recent_calls": recent}
@@ -0,0 +1,71 @@
+import re
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+# pydantic models for validating model output. kept out of workoutPlanner so that
+# viewing and logging plans never pays for importing pydantic; the parsing
+# functions there import this module on first use
+
+
+class AssistantType(BaseModel):
+    assistant_type: Literal["workout_planner", "nutrition_planner"] = Field(
+        description="The type of assistance being requested"
+    )
+    confidence_score: float = Field(description="Confidence score between 0 and 1")
+    description: str = Field(
+        description="A cleaned up description of the assistance being requested"
+    )
+
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+EXERCISE_DEFAULTS = {"sets": 3, "reps": 10, "rest_time": 60, "weight": None}
+
+
+# turns "8-10", "60s", "2 min", "135 lbs" or null into a number, noting every change
+def _coerce_number(field, value, repairs):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    default = EXERCISE_DEFAULTS[field]
+    if value is None:
+        if default is not None:
+            repairs.append(f"{field}: null replaced with {default}")
+        return default
+    if not isinstance(value, str):
+        return value  # let pydantic reject it
+
+    numbers = _NUMBER.findall(value)
+    if not numbers:
+        repairs.append(f"{field}: {value!r} replaced with {default}")
+        return default
+    number = float(numbers[0])  # ranges keep their lower bound
+    if field == "rest_time" and "min" in value.lower():
+        number *= 60
+    repairs.append(f"{field}: {value!r} read as {number:g}")
+    return number
+
+
+class ExerciseSchema(BaseModel):
+    name: str
+    sets: int = 3
+    reps: int = 10
+    rest_time: int = 60
+    weight: Optional[int] = None
+
+    @field_validator("sets", "reps", "rest_time", "weight", mode="before")
+    @classmethod
+    def coerce_numbers(cls, value, info):
+        repairs = (info.context or {}).get("repairs", [])
+        value = _coerce_number(info.field_name, value, repairs)
+        return round(value) if isinstance(value, float) else value
+
+
+class WorkoutDaySchema(BaseModel):
+    day_name: str
+    focus: str = ""
+    exercises: List[ExerciseSchema]
+
+    @field_validator("focus", mode="before")
+    @classmethod
+    def null_focus(cls, value):
+        return value or ""
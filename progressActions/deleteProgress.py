@@ -1,21 +1,58 @@
 import streamlit as st
 from appSetup import get_db_connection
+from planCache import invalidate_progress
+from progressActions.progressRollups import ROLLUP_INPUT_COLUMNS, rollup_removed
+
+
+def delete_progress_rows(conn, user_email, ids):
+    if not ids:
+        return 0
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM workout_progress WHERE id = ANY(%s) AND user_email = %s
+                RETURNING id, exercise_name, completed_date, sets_done, reps_done, weight_used
+                """,
+                (list(ids), user_email),
+            )
+            deleted = [dict(zip(ROLLUP_INPUT_COLUMNS, row)) for row in cur.fetchall()]
+            rollup_removed(cur, user_email, deleted)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    invalidate_progress(user_email)
+    return len(deleted)
 
 
 def deleteProgress(df, selected_row):
     if st.checkbox("Delete selected entry"):
         if st.button("🗑️ Confirm Delete"):
-            conn = get_db_connection()
-            with conn.cursor() as cur:
-                cur.execute(
-                    "DELETE FROM workout_progress WHERE user_email = %s AND completed_date = %s AND exercise_name = %s",
-                    (
-                        st.session_state.user_email,
-                        df.at[selected_row, "Date"],
-                        df.at[selected_row, "Exercise"],
-                    ),
+            with get_db_connection() as conn:
+                delete_progress_rows(
+                    conn,
+                    st.session_state.user_email,
+                    [int(df.at[selected_row, "ID"])],
                 )
-                conn.commit()
-            conn.close()
             st.success("✅ Progress entry deleted!")
             st.rerun()
+
+
+def delete_progress_batch(df):
+    labels = {
+        row["ID"]: f"{row['Exercise']} on {row['Date']}" for _, row in df.iterrows()
+    }
+    selected_ids = st.multiselect(
+        "Entries to delete",
+        list(labels),
+        format_func=labels.get,
+        key="progress_batch_delete",
+    )
+    if selected_ids and st.button(f"🗑️ Delete {len(selected_ids)} entries"):
+        with get_db_connection() as conn:
+            deleted = delete_progress_rows(
+                conn, st.session_state.user_email, [int(i) for i in selected_ids]
+            )
+        st.success(f"✅ {deleted} progress entries deleted!")
+        st.rerun()
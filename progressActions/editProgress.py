@@ -1,5 +1,62 @@
+import json
 import streamlit as st
 from appSetup import get_db_connection
+from planCache import invalidate_progress
+from progressActions.progressRollups import (
+    ROLLUP_INPUT_COLUMNS,
+    rollup_added,
+    rollup_removed,
+)
+
+EDITABLE_COLUMNS = {
+    "Sets": "sets_done",
+    "Reps": "reps_done",
+    "Weight": "weight_used",
+    "Notes": "notes",
+}
+
+
+# rows are dicts with an "id" plus any of the progress columns; every row is
+# updated by primary key in one statement, and the rollups see the old and new values
+def update_progress_rows(conn, user_email, rows):
+    if not rows:
+        return 0
+    columns = [col for col in EDITABLE_COLUMNS.values() if col in rows[0]]
+    assignments = ", ".join(f"{col} = v.{col}" for col in columns)
+    payload = json.dumps(rows, default=str)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                WITH old AS (
+                    SELECT id, exercise_name, completed_date, sets_done, reps_done,
+                           weight_used
+                    FROM workout_progress
+                    WHERE user_email = %(user)s
+                      AND id IN (
+                          SELECT (x->>'id')::int
+                          FROM jsonb_array_elements(%(rows)s::jsonb) x
+                      )
+                )
+                UPDATE workout_progress AS t
+                SET {assignments}
+                FROM jsonb_populate_recordset(NULL::workout_progress, %(rows)s::jsonb) AS v,
+                     old
+                WHERE t.id = v.id AND t.user_email = %(user)s AND old.id = t.id
+                RETURNING old.id, old.exercise_name, old.completed_date, old.sets_done,
+                          old.reps_done, old.weight_used
+                """,
+                {"user": user_email, "rows": payload},
+            )
+            old_rows = [dict(zip(ROLLUP_INPUT_COLUMNS, row)) for row in cur.fetchall()]
+            rollup_removed(cur, user_email, old_rows)
+            rollup_added(cur, user_email, [row["id"] for row in old_rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    invalidate_progress(user_email)
+    return len(old_rows)
 
 
 def edit_progress(df, selected_row):
@@ -16,21 +73,59 @@ def edit_progress(df, selected_row):
         new_notes = st.text_area("Notes", value=df.at[selected_row, "Notes"] or "")
 
         if st.button("💾 Save Changes"):
-            conn = get_db_connection()
-            with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE workout_progress SET sets_done = %s, reps_done = %s, weight_used = %s, notes = %s WHERE user_email = %s AND completed_date = %s AND exercise_name = %s",
-                    (
-                        new_sets,
-                        new_reps,
-                        new_weight,
-                        new_notes,
-                        st.session_state.user_email,
-                        df.at[selected_row, "Date"],
-                        df.at[selected_row, "Exercise"],
-                    ),
+            with get_db_connection() as conn:
+                update_progress_rows(
+                    conn,
+                    st.session_state.user_email,
+                    [
+                        {
+                            "id": int(df.at[selected_row, "ID"]),
+                            "sets_done": new_sets,
+                            "reps_done": new_reps,
+                            "weight_used": new_weight,
+                            "notes": new_notes,
+                        }
+                    ],
                 )
-                conn.commit()
-            conn.close()
             st.success("✅ Progress entry updated!")
             st.rerun()
+
+
+# NULL cells reach the editor frame as None or NaN; both mean no value, and NaN
+# would otherwise fail int() or be written out as JSON that jsonb rejects
+def _cell(value, cast):
+    import pandas as pd
+
+    return None if pd.isna(value) else cast(value)
+
+
+def _progress_row(row):
+    return {
+        "id": int(row["ID"]),
+        "sets_done": _cell(row["Sets"], int),
+        "reps_done": _cell(row["Reps"], int),
+        "weight_used": _cell(row["Weight"], int),
+        "notes": _cell(row["Notes"], str) or None,
+    }
+
+
+# spreadsheet-style editing of the current page; only rows that changed are sent
+def edit_progress_batch(df):
+    edited = st.data_editor(
+        df,
+        column_config={"ID": None},  # hidden, but kept to address the rows
+        disabled=["Exercise", "Day", "Date"],
+        hide_index=True,
+        key="progress_batch_editor",
+    )
+    if st.button("💾 Save all changes"):
+        before = {row["id"]: row for row in map(_progress_row, df.to_dict("records"))}
+        rows = [
+            row
+            for row in map(_progress_row, edited.to_dict("records"))
+            if row != before.get(row["id"])
+        ]
+        with get_db_connection() as conn:
+            updated = update_progress_rows(conn, st.session_state.user_email, rows)
+        st.success(f"✅ {updated} progress entries updated!")
+        st.rerun()
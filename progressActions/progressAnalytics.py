@@ -0,0 +1,144 @@
+# progress analytics computed on whole columns with pandas/numpy; every function
+# takes the frame from load_progress_frame (or anything with the same columns) and
+# works the same for one exercise or a user's entire history
+import numpy as np
+import pandas as pd
+
+from localPlanner import DAY_TYPES
+from progressActions.progressQueries import PROGRESS_FRAME_SQL
+
+COLUMNS = [
+    "exercise_name",
+    "day_name",
+    "focus",
+    "sets_done",
+    "reps_done",
+    "weight_used",
+    "completed_date",
+]
+
+# splits "Chest & Triceps", "Back, Biceps", "Upper Body / Core" into parts
+_FOCUS_SEPARATORS = r"\s*(?:,|&|/|\+|\band\b)\s*"
+_DAY_TYPE_GROUPS = {name.lower(): groups for name, groups in DAY_TYPES.items()}
+
+
+# progress rows for one plan (every plan if plan_id is None) with the focus of the
+# day they were logged on, oldest first
+def load_progress_frame(conn, user_email, plan_id=None):
+    with conn.cursor() as cur:
+        cur.execute(PROGRESS_FRAME_SQL, {"user": user_email, "plan": plan_id})
+        return prepare(pd.DataFrame(cur.fetchall(), columns=COLUMNS))
+
+
+# Epley: weight * (1 + reps / 30); a single rep is the weight itself
+def estimated_1rm(weight, reps):
+    weight = np.asarray(weight, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    return np.where(reps <= 1, weight, weight * (1 + reps / 30))
+
+
+# fills missing numbers with 0 and adds session_date, week, volume and e1rm
+def prepare(df):
+    df = df.copy()
+    for column in ("sets_done", "reps_done", "weight_used"):
+        df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0)
+    df["completed_date"] = pd.to_datetime(df["completed_date"])
+    df["session_date"] = df["completed_date"].dt.normalize()
+    df["week"] = df["session_date"] - pd.to_timedelta(
+        df["session_date"].dt.weekday, unit="D"
+    )
+    df["volume"] = df["sets_done"] * df["reps_done"] * df["weight_used"]
+    df["e1rm"] = estimated_1rm(df["weight_used"], df["reps_done"])
+    return df
+
+
+# one row per exercise per day: total volume, top weight and best e1rm
+def session_summary(df):
+    return (
+        df.groupby(["exercise_name", "session_date"], sort=True)
+        .agg(
+            volume=("volume", "sum"),
+            max_weight=("weight_used", "max"),
+            best_e1rm=("e1rm", "max"),
+            sets=("sets_done", "sum"),
+        )
+        .reset_index()
+    )
+
+
+# one row per exercise per week (weeks start on Monday)
+def weekly_volume(df):
+    return (
+        df.groupby(["exercise_name", "week"], sort=True)
+        .agg(
+            volume=("volume", "sum"),
+            sessions=("session_date", "nunique"),
+            best_e1rm=("e1rm", "max"),
+        )
+        .reset_index()
+    )
+
+
+# flags entries that beat every earlier entry of the same exercise on e1rm or on
+# weight; the first entry of an exercise only sets the baseline
+def detect_prs(df):
+    df = df.sort_values(["exercise_name", "completed_date"], kind="stable")
+    by_exercise = df.groupby("exercise_name", sort=False)
+    previous_e1rm = by_exercise["e1rm"].cummax().groupby(df["exercise_name"]).shift()
+    previous_weight = (
+        by_exercise["weight_used"].cummax().groupby(df["exercise_name"]).shift()
+    )
+    df["e1rm_pr"] = df["e1rm"] > previous_e1rm
+    df["weight_pr"] = df["weight_used"] > previous_weight
+    return df
+
+
+# rolling means over the last `window` sessions of each exercise
+def rolling_averages(sessions, window=4, columns=("best_e1rm", "volume")):
+    sessions = sessions.sort_values(["exercise_name", "session_date"], kind="stable")
+    rolled = (
+        sessions.groupby("exercise_name", sort=False)[list(columns)]
+        .rolling(window, min_periods=1)
+        .mean()
+        .reset_index(level=0, drop=True)
+    )
+    for column in columns:
+        sessions[f"{column}_avg"] = rolled[column]
+    return sessions
+
+
+# focus text -> muscle groups, one row per (entry, group). named day types like
+# "Push" expand to their groups from localPlanner.DAY_TYPES; anything else is
+# taken as written ("Chest and Triceps" -> chest, triceps)
+def focus_muscle_groups(focus):
+    parts = (
+        focus.fillna("").str.lower().str.split(_FOCUS_SEPARATORS, regex=True).explode()
+    )
+    parts = parts[parts.str.len() > 0]
+    named = parts.isin(_DAY_TYPE_GROUPS.keys())
+    expanded = parts[named].map(_DAY_TYPE_GROUPS).explode()
+    return pd.concat([parts[~named], expanded]).sort_index(kind="stable")
+
+
+# weekly volume per muscle group; an entry's volume is split evenly between the
+# groups its day's focus names; entries without a focus are left out. the focus
+# text is parsed once per distinct value, not once per entry
+def muscle_group_weekly_load(df):
+    codes, focuses = pd.factorize(df["focus"])
+    groups = focus_muscle_groups(pd.Series(focuses, dtype=object))
+    split = pd.DataFrame(
+        {
+            "code": groups.index,
+            "muscle_group": groups.to_numpy(),
+            "share": 1 / groups.groupby(level=0).transform("size").to_numpy(),
+        }
+    )
+    load = pd.DataFrame(
+        {
+            "code": codes,
+            "week": df["week"].to_numpy(),
+            "volume": df["volume"].to_numpy(),
+        }
+    ).merge(split, on="code")
+    load["load"] = load["volume"] * load["share"]
+    return load.groupby(["week", "muscle_group"], sort=True)["load"].sum().reset_index()
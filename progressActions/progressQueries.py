@@ -0,0 +1,142 @@
+# progress reads for the Progress Tracker tab; filtering, aggregation and
+# downsampling all happen in SQL so payloads stay the same size as history grows
+
+PAGE_SIZE = 25
+MAX_CHART_POINTS = 120
+
+# the statements are module constants so dbMigrations can EXPLAIN the exact SQL
+# these functions run
+PROGRESS_EXERCISES_SQL = """
+    SELECT DISTINCT exercise_name
+    FROM workout_progress
+    WHERE user_email = %(user)s AND plan_id = %(plan)s
+    ORDER BY exercise_name
+"""
+
+PROGRESS_PAGE_SQL = """
+    SELECT id, exercise_name, day_name, sets_done, reps_done, weight_used,
+           notes, completed_date
+    FROM workout_progress
+    WHERE user_email = %(user)s
+      AND plan_id = %(plan)s
+      AND exercise_name = %(exercise)s
+      AND (%(start)s IS NULL OR completed_date >= %(start)s)
+      AND (%(end)s IS NULL OR completed_date < %(end)s)
+      AND (%(after_date)s IS NULL
+           OR (completed_date, id) < (%(after_date)s, %(after_id)s))
+    ORDER BY completed_date DESC, id DESC
+    LIMIT %(limit)s
+"""
+
+PROGRESS_SERIES_SQL = """
+    WITH sessions AS (
+        SELECT completed_date::date AS session_date,
+               MAX(weight_used) AS max_weight,
+               SUM(sets_done * reps_done * weight_used) AS volume,
+               (ARRAY_AGG(reps_done ORDER BY weight_used DESC, reps_done DESC))[1]
+                   AS best_set_reps
+        FROM workout_progress
+        WHERE user_email = %(user)s
+          AND plan_id = %(plan)s
+          AND exercise_name = %(exercise)s
+          AND (%(start)s IS NULL OR completed_date >= %(start)s)
+          AND (%(end)s IS NULL OR completed_date < %(end)s)
+        GROUP BY 1
+    ),
+    buckets AS (
+        SELECT *, NTILE(%(points)s) OVER (ORDER BY session_date) AS bucket
+        FROM sessions
+    )
+    SELECT MAX(session_date) AS session_date,
+           MAX(max_weight) AS max_weight,
+           AVG(volume)::float8 AS volume,
+           (ARRAY_AGG(best_set_reps ORDER BY max_weight DESC, best_set_reps DESC))[1]
+               AS best_set_reps
+    FROM buckets
+    GROUP BY bucket
+    ORDER BY session_date
+"""
+
+# rows for progressAnalytics.load_progress_frame, kept here so dbMigrations can
+# check it without importing pandas: one plan (every plan if %(plan)s is NULL)
+# with the focus of the day each entry was logged on, oldest first
+PROGRESS_FRAME_SQL = """
+    SELECT p.exercise_name, p.day_name, d.focus, p.sets_done, p.reps_done,
+           p.weight_used, p.completed_date
+    FROM workout_progress p
+    LEFT JOIN LATERAL (
+        SELECT wd.focus
+        FROM workout_days wd
+        WHERE wd.plan_id = p.plan_id AND wd.day_name = p.day_name
+        ORDER BY wd.id
+        LIMIT 1
+    ) d ON true
+    WHERE p.user_email = %(user)s AND (%(plan)s::int IS NULL OR p.plan_id = %(plan)s)
+    ORDER BY p.completed_date, p.id
+"""
+
+
+def get_progress_exercises(conn, user_email, plan_id):
+    with conn.cursor() as cur:
+        cur.execute(
+            PROGRESS_EXERCISES_SQL,
+            {"user": user_email, "plan": plan_id},
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+# newest first; pass the (completed_date, id) of the last row shown as `after`
+# to get the next page without OFFSET scanning everything before it
+def get_progress_page(
+    conn,
+    user_email,
+    plan_id,
+    exercise_name,
+    start_date=None,
+    end_date=None,
+    after=None,
+    limit=PAGE_SIZE,
+):
+    after_date, after_id = after if after else (None, None)
+    with conn.cursor() as cur:
+        cur.execute(
+            PROGRESS_PAGE_SQL,
+            {
+                "user": user_email,
+                "plan": plan_id,
+                "exercise": exercise_name,
+                "start": start_date,
+                "end": end_date,
+                "after_date": after_date,
+                "after_id": after_id,
+                "limit": limit,
+            },
+        )
+        return cur.fetchall()
+
+
+# one point per session (calendar day): heaviest weight, total volume and the best
+# set (heaviest weight, most reps at that weight); sessions are then folded into at
+# most `max_points` evenly sized buckets so the chart payload is bounded
+def get_progress_series(
+    conn,
+    user_email,
+    plan_id,
+    exercise_name,
+    start_date=None,
+    end_date=None,
+    max_points=MAX_CHART_POINTS,
+):
+    with conn.cursor() as cur:
+        cur.execute(
+            PROGRESS_SERIES_SQL,
+            {
+                "user": user_email,
+                "plan": plan_id,
+                "exercise": exercise_name,
+                "start": start_date,
+                "end": end_date,
+                "points": max_points,
+            },
+        )
+        return cur.fetchall()
@@ -0,0 +1,325 @@
+# per user and exercise summaries of workout_progress (latest entry, best weight,
+# best estimated 1RM, session and entry counts) plus weekly volume buckets. every
+# write path updates them in the same transaction from just the rows it touched,
+# so reads are primary key lookups however long the history is
+#
+#   python -m progressActions.progressRollups rebuild [EMAIL]
+import json
+import sys
+
+# same Epley estimate as progressAnalytics.estimated_1rm
+E1RM = "(CASE WHEN COALESCE({t}.reps_done, 0) <= 1 THEN COALESCE({t}.weight_used, 0) ELSE {t}.weight_used * (1 + {t}.reps_done / 30.0) END)::float8"
+VOLUME = "COALESCE({t}.sets_done, 0)::bigint * COALESCE({t}.reps_done, 0) * COALESCE({t}.weight_used, 0)"
+
+ROLLUP_COLUMNS = [
+    "exercise_name",
+    "latest_progress_id",
+    "latest_date",
+    "latest_sets",
+    "latest_reps",
+    "latest_weight",
+    "best_weight",
+    "best_e1rm",
+    "total_sessions",
+    "total_entries",
+]
+
+# what rollup_removed needs to know about each row it takes out
+ROLLUP_INPUT_COLUMNS = [
+    "id",
+    "exercise_name",
+    "completed_date",
+    "sets_done",
+    "reps_done",
+    "weight_used",
+]
+
+# the newer of the stored and the incoming latest entry, column by column
+_KEEP_LATEST = ",\n".join(
+    f"{c} = CASE WHEN r.latest_date IS NULL"
+    f" OR (EXCLUDED.latest_date, EXCLUDED.latest_progress_id)"
+    f" >= (r.latest_date, r.latest_progress_id) THEN EXCLUDED.{c} ELSE r.{c} END"
+    for c in ROLLUP_COLUMNS
+    if c.startswith("latest_")
+)
+
+_LATEST = """
+    SELECT p.id, p.completed_date, p.sets_done, p.reps_done, p.weight_used
+    FROM workout_progress p
+    WHERE p.user_email = g.user_email AND p.exercise_name = g.exercise_name
+    ORDER BY p.completed_date DESC, p.id DESC
+    LIMIT 1
+"""
+
+
+# recomputes the rollups of `exercise_names` (all of the user's if None; every
+# user's if user_email is None too) from workout_progress
+def refresh_rollups(cur, user_email=None, exercise_names=None):
+    params = {"user": user_email, "names": exercise_names}
+    scope = """
+        (%(user)s IS NULL OR user_email = %(user)s)
+        AND (%(names)s::text[] IS NULL OR exercise_name = ANY(%(names)s))
+    """
+    cur.execute(
+        f"""
+        DELETE FROM progress_weekly_volume WHERE {scope};
+        DELETE FROM progress_rollups WHERE {scope};
+
+        INSERT INTO progress_rollups (user_email, {", ".join(ROLLUP_COLUMNS)})
+        SELECT g.user_email, g.exercise_name, l.id, l.completed_date, l.sets_done,
+               l.reps_done, l.weight_used, g.best_weight, g.best_e1rm, g.sessions,
+               g.entries
+        FROM (
+            SELECT user_email, exercise_name,
+                   MAX(weight_used) AS best_weight,
+                   MAX({E1RM.format(t="workout_progress")}) AS best_e1rm,
+                   COUNT(DISTINCT completed_date::date) AS sessions,
+                   COUNT(*) AS entries
+            FROM workout_progress
+            WHERE {scope}
+            GROUP BY user_email, exercise_name
+        ) g
+        CROSS JOIN LATERAL ({_LATEST}) l;
+
+        INSERT INTO progress_weekly_volume (user_email, exercise_name, week, volume, entries)
+        SELECT user_email, exercise_name, date_trunc('week', completed_date)::date,
+               SUM({VOLUME.format(t="workout_progress")}), COUNT(*)
+        FROM workout_progress
+        WHERE {scope}
+        GROUP BY 1, 2, 3;
+        """,
+        params,
+    )
+
+
+# folds rows that were just inserted (or just rewritten, after rollup_removed saw
+# their old values) into the rollups. `ids` is a list, or `ids_query` a SELECT of
+# ids, for imports too large to pass through Python
+def rollup_added(cur, user_email, ids=None, ids_query=None):
+    if ids_query is None:
+        if not ids:
+            return
+        ids_query = "SELECT unnest(%(ids)s::int[])"
+    cur.execute(
+        f"""
+        WITH added AS (
+            SELECT p.id, p.exercise_name, p.completed_date, p.sets_done, p.reps_done,
+                   p.weight_used, {E1RM.format(t="p")} AS e1rm,
+                   {VOLUME.format(t="p")} AS volume
+            FROM workout_progress p
+            WHERE p.user_email = %(user)s AND p.id IN ({ids_query})
+        ),
+        latest AS (
+            SELECT DISTINCT ON (exercise_name) *
+            FROM added
+            ORDER BY exercise_name, completed_date DESC, id DESC
+        ),
+        -- a day is a new session if every entry on it is one of the added rows
+        days AS (
+            SELECT d.exercise_name, d.added = (
+                       SELECT COUNT(*) FROM workout_progress o
+                       WHERE o.user_email = %(user)s
+                         AND o.exercise_name = d.exercise_name
+                         AND o.completed_date >= d.day
+                         AND o.completed_date < d.day + 1
+                   ) AS new_day
+            FROM (
+                SELECT exercise_name, completed_date::date AS day, COUNT(*) AS added
+                FROM added
+                GROUP BY 1, 2
+            ) d
+        ),
+        rollups AS (
+            INSERT INTO progress_rollups AS r (user_email, {", ".join(ROLLUP_COLUMNS)})
+            SELECT %(user)s, a.exercise_name, l.id, l.completed_date, l.sets_done,
+                   l.reps_done, l.weight_used, a.best_weight, a.best_e1rm,
+                   (SELECT COUNT(*) FROM days WHERE days.exercise_name = a.exercise_name
+                                                AND days.new_day),
+                   a.entries
+            FROM (
+                SELECT exercise_name, MAX(weight_used) AS best_weight,
+                       MAX(e1rm) AS best_e1rm, COUNT(*) AS entries
+                FROM added
+                GROUP BY 1
+            ) a
+            JOIN latest l ON l.exercise_name = a.exercise_name
+            ON CONFLICT (user_email, exercise_name) DO UPDATE SET
+                best_weight = GREATEST(r.best_weight, EXCLUDED.best_weight),
+                best_e1rm = GREATEST(r.best_e1rm, EXCLUDED.best_e1rm),
+                total_sessions = r.total_sessions + EXCLUDED.total_sessions,
+                total_entries = r.total_entries + EXCLUDED.total_entries,
+                {_KEEP_LATEST}
+        )
+        INSERT INTO progress_weekly_volume AS w (user_email, exercise_name, week, volume, entries)
+        SELECT %(user)s, exercise_name, date_trunc('week', completed_date)::date,
+               SUM(volume), COUNT(*)
+        FROM added
+        GROUP BY 2, 3
+        ON CONFLICT (user_email, exercise_name, week) DO UPDATE SET
+            volume = w.volume + EXCLUDED.volume,
+            entries = w.entries + EXCLUDED.entries
+        """,
+        {"user": user_email, "ids": list(ids or [])},
+    )
+
+
+# takes rows out of the rollups, given their values before they were deleted or
+# rewritten as dicts with id, exercise_name, completed_date, sets_done, reps_done
+# and weight_used. counts and weekly buckets are adjusted in place; only an
+# exercise whose best or latest entry was among the rows is recomputed
+def rollup_removed(cur, user_email, rows):
+    if not rows:
+        return
+    params = {
+        "user": user_email,
+        "rows": json.dumps(rows, default=str),
+        "ids": [row["id"] for row in rows],
+    }
+    cur.execute(
+        f"""
+        WITH removed AS (
+            SELECT r.*, {E1RM.format(t="r")} AS e1rm, {VOLUME.format(t="r")} AS volume,
+                   NOT EXISTS (
+                       SELECT 1 FROM workout_progress o
+                       WHERE o.user_email = %(user)s
+                         AND o.exercise_name = r.exercise_name
+                         AND o.completed_date >= r.completed_date::date
+                         AND o.completed_date < r.completed_date::date + 1
+                         AND o.id <> ALL(%(ids)s)
+                   ) AS last_of_day
+            FROM jsonb_to_recordset(%(rows)s::jsonb) AS r(
+                id INTEGER, exercise_name TEXT, completed_date TIMESTAMP,
+                sets_done INTEGER, reps_done INTEGER, weight_used INTEGER
+            )
+        ),
+        weekly AS (
+            UPDATE progress_weekly_volume w
+            SET volume = w.volume - s.volume, entries = w.entries - s.entries
+            FROM (
+                SELECT exercise_name, date_trunc('week', completed_date)::date AS week,
+                       SUM(volume) AS volume, COUNT(*) AS entries
+                FROM removed
+                GROUP BY 1, 2
+            ) s
+            WHERE w.user_email = %(user)s
+              AND w.exercise_name = s.exercise_name
+              AND w.week = s.week
+        )
+        UPDATE progress_rollups t
+        SET total_entries = t.total_entries - s.entries,
+            total_sessions = t.total_sessions - s.sessions
+        FROM (
+            SELECT exercise_name, COUNT(*) AS entries,
+                   COUNT(DISTINCT completed_date::date) FILTER (WHERE last_of_day) AS sessions,
+                   MAX(weight_used) AS weight, MAX(e1rm) AS e1rm, array_agg(id) AS ids
+            FROM removed
+            GROUP BY 1
+        ) s
+        WHERE t.user_email = %(user)s AND t.exercise_name = s.exercise_name
+        RETURNING t.exercise_name,
+                  s.weight >= t.best_weight OR s.e1rm >= t.best_e1rm
+                      OR t.latest_progress_id = ANY(s.ids)
+        """,
+        params,
+    )
+    touched = cur.fetchall()
+    stale = [name for name, needs_refresh in touched if needs_refresh]
+    if stale:
+        cur.execute(
+            f"""
+            UPDATE progress_rollups t
+            SET best_weight = g.best_weight, best_e1rm = g.best_e1rm,
+                latest_progress_id = l.id, latest_date = l.completed_date,
+                latest_sets = l.sets_done, latest_reps = l.reps_done,
+                latest_weight = l.weight_used
+            FROM (
+                SELECT user_email, exercise_name,
+                       MAX(weight_used) AS best_weight,
+                       MAX({E1RM.format(t="workout_progress")}) AS best_e1rm
+                FROM workout_progress
+                WHERE user_email = %(user)s AND exercise_name = ANY(%(names)s)
+                GROUP BY 1, 2
+            ) g
+            CROSS JOIN LATERAL ({_LATEST}) l
+            WHERE t.user_email = g.user_email AND t.exercise_name = g.exercise_name
+            """,
+            {"user": user_email, "names": stale},
+        )
+    cur.execute(
+        """
+        DELETE FROM progress_weekly_volume
+        WHERE user_email = %(user)s AND exercise_name = ANY(%(names)s) AND entries <= 0;
+        DELETE FROM progress_rollups
+        WHERE user_email = %(user)s AND exercise_name = ANY(%(names)s) AND total_entries <= 0;
+        """,
+        {"user": user_email, "names": [name for name, _ in touched]},
+    )
+
+
+# {exercise_name: {column: value}} for the given exercises (all of the user's if
+# None)
+def get_rollups(conn, user_email, exercise_names=None):
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT {", ".join(ROLLUP_COLUMNS)}
+            FROM progress_rollups
+            WHERE user_email = %s AND (%s::text[] IS NULL OR exercise_name = ANY(%s))
+            """,
+            (user_email, exercise_names, exercise_names),
+        )
+        return {row[0]: dict(zip(ROLLUP_COLUMNS, row)) for row in cur.fetchall()}
+
+
+WEEKLY_VOLUME_SQL = """
+    SELECT week, volume, entries FROM (
+        SELECT week, volume, entries
+        FROM progress_weekly_volume
+        WHERE user_email = %(user)s AND exercise_name = %(exercise)s
+        ORDER BY week DESC
+        LIMIT %(weeks)s
+    ) recent
+    ORDER BY week
+"""
+
+
+# (week, volume, entries) for the most recent `weeks` weeks with entries, oldest first
+def get_weekly_volume(conn, user_email, exercise_name, weeks=12):
+    with conn.cursor() as cur:
+        cur.execute(
+            WEEKLY_VOLUME_SQL,
+            {"user": user_email, "exercise": exercise_name, "weeks": weeks},
+        )
+        return cur.fetchall()
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] != "rebuild":
+        print("Usage: python -m progressActions.progressRollups rebuild [EMAIL]")
+        return 2
+    user_email = argv[2] if len(argv) > 2 else None
+
+    from dbPool import pooled_connection
+
+    with pooled_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                refresh_rollups(cur, user_email)
+                cur.execute(
+                    "SELECT COUNT(*) FROM progress_rollups WHERE %s IS NULL OR user_email = %s",
+                    (user_email, user_email),
+                )
+                count = cur.fetchone()[0]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    print(f"Rebuilt {count} exercise rollups for {user_email or 'all users'}")
+    return 0
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    sys.exit(main(sys.argv))
@@ -0,0 +1,324 @@
+# bulk import and export of workout_progress as CSV or newline-delimited JSON. both
+# directions stream through COPY, so memory use does not grow with the file
+#
+#   python -m progressActions.progressTransfer export out.csv [--user EMAIL] [--plan ID] [--since DATE]
+#   python -m progressActions.progressTransfer import EMAIL history.ndjson
+import argparse
+import csv
+import sys
+import time
+
+import psycopg2
+
+from planCache import invalidate_progress
+from progressActions.progressRollups import rollup_added
+
+EXPORT_COLUMNS = [
+    "id",
+    "user_email",
+    "plan_id",
+    "exercise_name",
+    "day_name",
+    "sets_done",
+    "reps_done",
+    "weight_used",
+    "notes",
+    "completed_date",
+]
+# columns an import file may carry; id is accepted so exports load back unchanged
+# but ignored, since imported rows get new ids
+IMPORT_COLUMNS = EXPORT_COLUMNS
+
+# a single-column csv whose quote and delimiter characters never show up in JSON
+# text, so each line goes through COPY untouched
+_RAW_LINES = "FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02'"
+
+_NUMBER = r"'^\s*\d+(\.\d*)?\s*$'"
+# dates, optionally with a time and then a UTC offset or "Z" (timestamptz columns
+# export like that). completed_date has no time zone, so zoned values are converted
+# to the session's time zone, which is also what its now() default uses
+_TIMESTAMP = (
+    r"'^\s*\d{4}-\d{2}-\d{2}"
+    r"([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(\s*([zZ]|[+-]\d{2}(:?\d{2})?))?)?\s*$'"
+)
+_ZONED = r"'\d{2}:\d{2}(:\d{2}(\.\d+)?)?\s*([zZ]|[+-]\d{2}(:?\d{2})?)\s*$'"
+
+
+class ProgressImportError(ValueError):
+    pass
+
+
+def detect_format(path):
+    return "ndjson" if path.endswith((".ndjson", ".jsonl", ".json")) else "csv"
+
+
+# writes the user's entries (everyone's if user_email is None) to `out`, oldest
+# first; returns {"rows", "seconds", "rows_per_second"}
+def export_progress(conn, out, fmt="csv", user_email=None, plan_id=None, since=None):
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        query = cur.mogrify(
+            f"""
+            SELECT {", ".join(EXPORT_COLUMNS)}
+            FROM workout_progress
+            WHERE (%(user)s IS NULL OR user_email = %(user)s)
+              AND (%(plan)s IS NULL OR plan_id = %(plan)s)
+              AND (%(since)s IS NULL OR completed_date >= %(since)s)
+            ORDER BY completed_date, id
+            """,
+            {"user": user_email, "plan": plan_id, "since": since},
+        ).decode()
+        if fmt == "ndjson":
+            copy = f"COPY (SELECT row_to_json(t) FROM ({query}) t) TO STDOUT WITH ({_RAW_LINES})"
+        else:
+            copy = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)"
+        cur.copy_expert(copy, out)
+        rows = cur.rowcount
+    conn.rollback()
+    return _report({"rows": rows}, start)
+
+
+def _report(report, start):
+    report["seconds"] = time.perf_counter() - start
+    report["rows_per_second"] = (
+        report["rows"] / report["seconds"] if report["seconds"] else 0.0
+    )
+    return report
+
+
+def _stage_csv(cur, source):
+    header = source.readline()
+    if isinstance(header, bytes):
+        header = header.decode("utf-8-sig")
+    columns = [c.strip().lower() for c in next(csv.reader([header]), [])]
+    unknown = [c for c in columns if c not in IMPORT_COLUMNS]
+    if unknown:
+        raise ProgressImportError(f"Unknown columns: {', '.join(unknown)}")
+    if "exercise_name" not in columns:
+        raise ProgressImportError("The file needs an exercise_name column")
+    cur.copy_expert(
+        f"COPY progress_import ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        source,
+    )
+
+
+def _stage_ndjson(cur, source):
+    cur.execute(
+        """
+        CREATE TEMP TABLE progress_import_lines (
+            line_no SERIAL, doc TEXT
+        ) ON COMMIT DROP
+        """
+    )
+    cur.copy_expert(
+        f"COPY progress_import_lines (doc) FROM STDIN WITH ({_RAW_LINES})", source
+    )
+    fields = ", ".join(f"doc::json->>'{c}'" for c in IMPORT_COLUMNS)
+    cur.execute(
+        f"""
+        INSERT INTO progress_import (line_no, {", ".join(IMPORT_COLUMNS)})
+        SELECT line_no, {fields}
+        FROM progress_import_lines
+        WHERE btrim(doc) <> ''
+        """
+    )
+
+
+# loads entries for `user_email` from a CSV (with header) or NDJSON stream. exercise
+# names are matched to the user's plans ignoring case and spacing and stored with
+# the plan's spelling; a row without plan_id goes to the newest plan that has the
+# exercise. every row is keyed by a hash of its contents, so loading the same file
+# again inserts nothing. everything happens in one transaction
+def import_progress(conn, user_email, source, fmt="csv"):
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                CREATE TEMP TABLE progress_import (
+                    line_no SERIAL,
+                    {", ".join(f"{c} TEXT" for c in IMPORT_COLUMNS)}
+                ) ON COMMIT DROP
+                """
+            )
+            if fmt == "ndjson":
+                _stage_ndjson(cur, source)
+            else:
+                _stage_csv(cur, source)
+
+            cur.execute(
+                """
+                CREATE TEMP TABLE progress_import_known ON COMMIT DROP AS
+                SELECT DISTINCT ON (wp.id, lower(regexp_replace(btrim(we.name), '\\s+', ' ', 'g')))
+                       lower(regexp_replace(btrim(we.name), '\\s+', ' ', 'g')) AS key,
+                       wp.id AS plan_id, wp.created_at, we.name, wd.day_name
+                FROM workout_plans wp
+                JOIN workout_days wd ON wd.plan_id = wp.id
+                JOIN workout_exercises we ON we.day_id = wd.id
+                WHERE wp.user_email = %(user)s
+                ORDER BY wp.id, key, wd.id
+                """,
+                {"user": user_email},
+            )
+            cur.execute(
+                f"""
+                CREATE TEMP TABLE progress_import_rows ON COMMIT DROP AS
+                SELECT s.line_no, m.plan_id, m.name AS exercise_name,
+                       COALESCE(NULLIF(btrim(s.day_name), ''), m.day_name) AS day_name,
+                       CASE WHEN s.sets_done ~ {_NUMBER} THEN round(s.sets_done::numeric)::int END AS sets_done,
+                       CASE WHEN s.reps_done ~ {_NUMBER} THEN round(s.reps_done::numeric)::int END AS reps_done,
+                       CASE WHEN s.weight_used ~ {_NUMBER} THEN round(s.weight_used::numeric)::int END AS weight_used,
+                       NULLIF(s.notes, '') AS notes,
+                       CASE
+                           WHEN s.completed_date !~ {_TIMESTAMP} THEN NULL
+                           WHEN s.completed_date ~ {_ZONED}
+                               THEN s.completed_date::timestamptz::timestamp
+                           ELSE s.completed_date::timestamp
+                       END AS completed_date,
+                       CASE
+                           WHEN NULLIF(btrim(s.exercise_name), '') IS NULL THEN 'missing exercise_name'
+                           WHEN NULLIF(btrim(s.user_email), '') <> %(user)s THEN 'belongs to another user'
+                           WHEN NULLIF(btrim(s.sets_done), '') !~ {_NUMBER}
+                             OR NULLIF(btrim(s.reps_done), '') !~ {_NUMBER}
+                             OR NULLIF(btrim(s.weight_used), '') !~ {_NUMBER} THEN 'invalid number'
+                           WHEN NULLIF(btrim(s.completed_date), '') !~ {_TIMESTAMP} THEN 'invalid completed_date'
+                           WHEN NULLIF(btrim(s.plan_id), '') !~ '^\\d+$' THEN 'invalid plan_id'
+                           WHEN m.plan_id IS NULL THEN 'exercise not in your plans'
+                       END AS reason
+                FROM progress_import s
+                LEFT JOIN LATERAL (
+                    SELECT k.plan_id, k.name, k.day_name
+                    FROM progress_import_known k
+                    WHERE k.key = lower(regexp_replace(btrim(s.exercise_name), '\\s+', ' ', 'g'))
+                      AND (NULLIF(btrim(s.plan_id), '') IS NULL
+                           OR k.plan_id::text = btrim(s.plan_id))
+                    ORDER BY k.created_at DESC
+                    LIMIT 1
+                ) m ON true
+                """,
+                {"user": user_email},
+            )
+            cur.execute(
+                "CREATE TEMP TABLE progress_import_ids (id INTEGER) ON COMMIT DROP"
+            )
+            cur.execute(
+                """
+                WITH inserted AS (
+                    INSERT INTO workout_progress (
+                        user_email, plan_id, exercise_name, day_name, sets_done, reps_done,
+                        weight_used, notes, completed_date, import_hash
+                    )
+                    SELECT %(user)s, plan_id, exercise_name, day_name, sets_done, reps_done,
+                           weight_used, notes, COALESCE(completed_date, now()),
+                           md5(ROW(plan_id, lower(exercise_name), sets_done, reps_done,
+                                   weight_used, notes, completed_date)::text)
+                    FROM progress_import_rows r
+                    WHERE reason IS NULL
+                      -- rows exported from here carry their exact timestamp; skipping
+                      -- those also makes re-importing an export a no-op
+                      AND NOT EXISTS (
+                          SELECT 1 FROM workout_progress p
+                          WHERE p.user_email = %(user)s
+                            AND p.plan_id = r.plan_id
+                            AND p.exercise_name = r.exercise_name
+                            AND p.completed_date = r.completed_date
+                      )
+                    ORDER BY line_no
+                    ON CONFLICT (user_email, import_hash) WHERE import_hash IS NOT NULL
+                    DO NOTHING
+                    RETURNING id
+                )
+                INSERT INTO progress_import_ids SELECT id FROM inserted
+                """,
+                {"user": user_email},
+            )
+            inserted = cur.rowcount
+            rollup_added(
+                cur, user_email, ids_query="SELECT id FROM progress_import_ids"
+            )
+            cur.execute(
+                """
+                SELECT reason, COUNT(*), (ARRAY_AGG(line_no ORDER BY line_no))[1:5]
+                FROM progress_import_rows
+                GROUP BY reason
+                """
+            )
+            report = {"rows": 0, "inserted": inserted, "duplicates": 0, "rejected": {}}
+            for reason, count, lines in cur.fetchall():
+                report["rows"] += count
+                if reason is None:
+                    report["duplicates"] = count - inserted
+                else:
+                    report["rejected"][reason] = {"count": count, "rows": lines}
+        conn.commit()
+    except psycopg2.DataError as e:
+        conn.rollback()
+        raise ProgressImportError(str(e).strip()) from e
+    except Exception:
+        conn.rollback()
+        raise
+    invalidate_progress(user_email)
+    return _report(report, start)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="progressTransfer")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write progress to a file or -")
+    export.add_argument("path")
+    export.add_argument("--user", help="only this user's entries")
+    export.add_argument("--plan", type=int)
+    export.add_argument("--since", help="only entries completed on or after this date")
+    export.add_argument("--format", choices=["csv", "ndjson"])
+    load = commands.add_parser("import", help="load progress for a user")
+    load.add_argument("user")
+    load.add_argument("path")
+    load.add_argument("--format", choices=["csv", "ndjson"])
+    args = parser.parse_args(argv[1:])
+    fmt = args.format or detect_format(args.path)
+
+    from dbPool import pooled_connection
+
+    with pooled_connection() as conn:
+        if args.command == "export":
+            if args.path == "-":
+                report = export_progress(
+                    conn, sys.stdout, fmt, args.user, args.plan, args.since
+                )
+            else:
+                with open(args.path, "w", newline="") as out:
+                    report = export_progress(
+                        conn, out, fmt, args.user, args.plan, args.since
+                    )
+            print(
+                f"Exported {report['rows']} rows in {report['seconds']:.2f}s "
+                f"({report['rows_per_second']:.0f} rows/s)",
+                file=sys.stderr,
+            )
+            return 0
+
+        source = sys.stdin if args.path == "-" else open(args.path, newline="")
+        try:
+            report = import_progress(conn, args.user, source, fmt)
+        except ProgressImportError as e:
+            print(f"Import failed, nothing was saved: {e}", file=sys.stderr)
+            return 1
+        finally:
+            if source is not sys.stdin:
+                source.close()
+    print(
+        f"Read {report['rows']} rows in {report['seconds']:.2f}s "
+        f"({report['rows_per_second']:.0f} rows/s): {report['inserted']} imported, "
+        f"{report['duplicates']} already present"
+    )
+    for reason, rejected in report["rejected"].items():
+        rows = ", ".join(str(line) for line in rejected["rows"])
+        print(f"  {rejected['count']} rejected, {reason} (rows {rows}, ...)")
+    return 0
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    sys.exit(main(sys.argv))
@@ -0,0 +1,66 @@
+import functools
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+
+import tracing
+
+# recent wall times per app section. sections are streamlit fragments, so an
+# interaction inside one costs about that section's time rather than a full run
+SAMPLES_PER_SECTION = 200
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_SECTION))
+
+
+def record(section, seconds):
+    with _lock:
+        _samples[section].append(seconds)
+
+
+def timed(section):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # a fragment rerunning by itself is a rerun of its own for tracing
+            rerun = None
+            if tracing.ENABLED and tracing.current_rerun() is None:
+                rerun = tracing.begin_rerun(section)
+            start = time.perf_counter()
+            try:
+                with tracing.span("section", section):
+                    return func(*args, **kwargs)
+            finally:
+                record(section, time.perf_counter() - start)
+                tracing.end_rerun(rerun)
+
+        return wrapper
+
+    return decorator
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+# {section: {"runs", "last_ms", "p50_ms", "p95_ms"}}
+def timing_stats():
+    with _lock:
+        samples = {section: list(values) for section, values in _samples.items()}
+    return {
+        section: {
+            "runs": len(values),
+            "last_ms": values[-1] * 1000,
+            "p50_ms": statistics.median(values) * 1000,
+            "p95_ms": _percentile(values, 95) * 1000,
+        }
+        for section, values in samples.items()
+        if values
+    }
+
+
+def reset_timings():
+    with _lock:
+        _samples.clear()
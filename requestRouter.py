@@ -0,0 +1,255 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+from planPrompts import route_max_tokens, route_messages
+from workoutPlanner import create_completion
+
+# free-text requests are sorted into the AssistantType routes (planSchemas). the
+# goal box is on the workout page, so a request stays with the workout planner
+# unless it names food (NUTRITION_WORDS): "lose weight" or "bulk" are training
+# goals there. one that names food and nothing about training goes to the
+# nutrition planner. only requests that name both are scored, by a small TF-IDF
+# model built from the examples below, and the ones it can't tell apart go to the
+# LLM. either way the request is answered locally if the LLM can't be reached
+ROUTER_MODEL = os.getenv("ROUTER_MODEL", "gpt-4o-mini")
+# how far the best route's cosine similarity must lead the other route's for the
+# local answer to stand; fitted on ROUTING_CASES in tests/test_requestRouter.py
+ROUTER_MARGIN = float(os.getenv("ROUTER_MARGIN", 0.1))
+# the LLM has to be at least this sure to take a request off the workout planner
+ROUTER_CONFIDENCE = float(os.getenv("ROUTER_CONFIDENCE", 0.7))
+# a request sharing less than this with every route is treated as unknown
+MIN_SIMILARITY = 0.05
+DEFAULT_ROUTE = "workout_planner"
+
+# as _tokens() leaves them, so "meals" and "workouts" count too
+NUTRITION_WORDS = frozenset(
+    "breakfast calorie carb diet dieting dinner eat eating food grocery keto lunch "
+    "macro meal nutrition protein recipe snack vegan vegetarian".split()
+)
+TRAINING_WORDS = frozenset(
+    "cardio exercise gym lift lifting program routine run running session split "
+    "train training workout".split()
+)
+
+EXAMPLES = {
+    "workout_planner": [
+        "build muscle and get stronger",
+        "lose fat with a 4 day gym split",
+        "workout plan to increase my bench press",
+        "training program for running a marathon",
+        "strength routine for beginners at the gym",
+        "home workout with dumbbells and no equipment",
+        "push pull legs split for hypertrophy",
+        "get a bigger chest and arms",
+        "improve my squat and deadlift",
+        "full body exercise routine three times a week",
+        "cardio and conditioning sessions to improve endurance",
+        "bodyweight training to tone up",
+        "powerlifting program with sets and reps",
+        "stretching and mobility routine for my back",
+        "athletic performance training for basketball",
+        "lift weights to build abs and core strength",
+        "lose weight and burn fat",
+        "gain weight and bulk up",
+        "cut for summer and get shredded",
+        "get lean and toned",
+        "lose 10 pounds before my wedding",
+        "workout plan to go with my diet",
+        "4 day training split while cutting calories",
+        "gym routine to burn fat alongside keto",
+        "lifting program to build muscle on a high protein diet",
+        "exercises to burn off extra calories",
+    ],
+    "nutrition_planner": [
+        "meal plan to lose weight",
+        "what should I eat to build muscle",
+        "high protein diet for bulking",
+        "daily calories and macros for cutting",
+        "vegetarian meal prep for the week",
+        "healthy breakfast lunch and dinner ideas",
+        "keto diet plan with recipes",
+        "how many grams of protein carbs and fat should I eat",
+        "nutrition plan for a marathon runner",
+        "grocery list for clean eating",
+        "low carb snacks and meals",
+        "calorie deficit eating plan",
+        "what to eat before and after a workout",
+        "vegan diet with enough protein",
+        "intermittent fasting schedule and meals",
+        "cheap healthy food for the week",
+        "diet to lose fat and keep muscle",
+        "how much protein do I need per day",
+        "meal ideas for gaining weight",
+        "what foods help with recovery",
+        "count my macros for a cut",
+        "high calorie meals for a bulk",
+        "meals for training days and rest days",
+        "pre workout snack ideas",
+        "protein and carbs to fuel my training",
+        "what to eat before the gym",
+    ],
+}
+
+# "get", "help", "need" and the like say nothing about the route; left in, a
+# single one of them decided short requests
+_STOPWORDS = set(
+    "a an and are at be can do for get help how i in is it like make me much my "
+    "need of on or please should so some that the to want what with you".split()
+)
+_WORD = re.compile(r"[a-z]+")
+
+
+@dataclass
+class Route:
+    assistant_type: str  # "workout_planner" or "nutrition_planner"
+    confidence: float  # local: lead over the other route; llm: its own score
+    description: str  # what the chosen planner is asked for
+    # "keywords": named food or training but not both; "local": the TF-IDF
+    # model; "llm": the model could not tell
+    source: str
+    seconds: float
+
+
+def _tokens(text):
+    words = [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+    # crude plural stemming is enough to make "meals" match "meal"
+    return [w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words]
+
+
+def _unit(vector):
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {t: v / norm for t, v in vector.items()} if norm else {}
+
+
+# vocabulary, idf weights and one normalised centroid per route, built on first use
+# and kept for the life of the process
+@lru_cache(maxsize=1)
+def _model():
+    documents = [
+        (route, Counter(_tokens(text)))
+        for route, texts in EXAMPLES.items()
+        for text in texts
+    ]
+    document_frequency = Counter(t for _, counts in documents for t in counts)
+    idf = {
+        t: math.log((1 + len(documents)) / (1 + df)) + 1
+        for t, df in document_frequency.items()
+    }
+    centroids = {}
+    for route in EXAMPLES:
+        total = Counter()
+        for doc_route, counts in documents:
+            if doc_route == route:
+                total.update(_unit({t: c * idf[t] for t, c in counts.items()}))
+        centroids[route] = _unit(total)
+    return idf, centroids
+
+
+# (assistant_type, margin): margin is how far the best route's cosine similarity
+# leads the other's, so words both routes use move neither; 0.0 when the request
+# shares (next to) nothing with the examples
+def classify_locally(text):
+    idf, centroids = _model()
+    vector = _unit(
+        {t: c * idf[t] for t, c in Counter(_tokens(text)).items() if t in idf}
+    )
+    scores = {
+        route: sum(w * centroid.get(t, 0.0) for t, w in vector.items())
+        for route, centroid in centroids.items()
+    }
+    best, runner_up = sorted(scores, key=scores.get, reverse=True)
+    if scores[best] < MIN_SIMILARITY:
+        return best, 0.0
+    return best, scores[best] - scores[runner_up]
+
+
+def classify_with_llm(text):
+    from planSchemas import AssistantType
+
+    response = create_completion(
+        "classify_with_llm",
+        route_messages(text),
+        route_max_tokens(),
+        model=ROUTER_MODEL,
+        temperature=0,
+    )
+    return AssistantType.model_validate_json(response)
+
+
+_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "keywords": 0,  # decided by NUTRITION_WORDS and TRAINING_WORDS alone
+    "local": 0,  # scored by the local model, which was sure
+    "llm": 0,
+    "llm_failed": 0,  # the LLM errored; the workout planner was used
+    "local_time": 0.0,
+    "llm_time": 0.0,
+}
+
+
+def route_request(text):
+    start = time.perf_counter()
+    words = set(_tokens(text))
+    if NUTRITION_WORDS.isdisjoint(words):
+        assistant_type, margin, source = DEFAULT_ROUTE, 1.0, "keywords"
+    elif TRAINING_WORDS.isdisjoint(words):
+        assistant_type, margin, source = "nutrition_planner", 1.0, "keywords"
+    else:
+        assistant_type, margin = classify_locally(text)
+        source = "local"
+    local_seconds = time.perf_counter() - start
+    route = Route(assistant_type, margin, text.strip(), source, local_seconds)
+    if margin < ROUTER_MARGIN:
+        # the workout planner, unless the LLM is sure it is not
+        route.assistant_type = DEFAULT_ROUTE
+        try:
+            answer = classify_with_llm(text)
+        except Exception:
+            pass
+        else:
+            if (
+                answer.assistant_type == DEFAULT_ROUTE
+                or answer.confidence_score >= ROUTER_CONFIDENCE
+            ):
+                route.assistant_type = answer.assistant_type
+                route.description = answer.description or route.description
+            route.confidence = answer.confidence_score
+            route.source = "llm"
+        route.seconds = time.perf_counter() - start
+    with _lock:
+        _stats["requests"] += 1
+        _stats["local_time"] += local_seconds
+        if route.source == "llm":
+            _stats["llm"] += 1
+            _stats["llm_time"] += route.seconds - local_seconds
+        elif margin < ROUTER_MARGIN:
+            _stats["llm_failed"] += 1
+        else:
+            _stats[source] += 1
+    return route
+
+
+# latency saved assumes every request answered without the LLM would otherwise
+# have waited as long as the LLM classifications measured so far did
+def router_stats():
+    with _lock:
+        stats = dict(_stats)
+    answered = stats["keywords"] + stats["local"]
+    stats["local_share"] = answered / stats["requests"] if stats["requests"] else 0.0
+    stats["avg_local_ms"] = (
+        stats["local_time"] / stats["requests"] * 1000 if stats["requests"] else 0.0
+    )
+    stats["avg_llm_ms"] = (
+        stats["llm_time"] / stats["llm"] * 1000 if stats["llm"] else None
+    )
+    stats["saved_seconds"] = (
+        answered * stats["llm_time"] / stats["llm"] if stats["llm"] else None
+    )
+    return stats
@@ -0,0 +1,118 @@
+import pytest
+
+import requestRouter
+from requestRouter import (
+    NUTRITION_WORDS,
+    ROUTER_MARGIN,
+    TRAINING_WORDS,
+    _tokens,
+    classify_locally,
+    route_request,
+)
+
+W, N = "workout_planner", "nutrition_planner"
+
+# goals as people type them into the workout page's goal box, with where they
+# should end up. the mixed ones name both food and training, so they are the
+# ones scored by the local model; ROUTER_MARGIN is fitted on them
+ROUTING_CASES = [
+    ("build muscle", W),
+    ("fat loss", W),
+    ("marathon", W),
+    ("bulk", W),
+    ("cut for summer", W),
+    ("get shredded", W),
+    ("get lean", W),
+    ("lose weight", W),
+    ("weight loss", W),
+    ("gain weight", W),
+    ("lose 10 pounds", W),
+    ("get stronger and bench 100kg", W),
+    ("tone up for my wedding", W),
+    ("improve my 5k time", W),
+    ("meal plan to lose weight", N),
+    ("what should I eat to build muscle", N),
+    ("high protein diet", N),
+    ("keto recipes for the week", N),
+    ("healthy breakfast ideas", N),
+    ("how many calories should I eat to bulk", N),
+    ("vegan meal prep", N),
+    ("grocery list for a cut", N),
+    ("train for a half marathon while dieting", W),
+    ("workout split for someone doing keto", W),
+    ("gym plan to go with my 1800 calorie diet", W),
+    ("lifting program for a vegetarian", W),
+    ("workout routine to burn calories", W),
+    ("training plan while eating in a deficit", W),
+    ("gym routine to build muscle on a high protein diet", W),
+    ("cardio sessions to burn off extra calories", W),
+    ("4 day split, I already track my macros", W),
+    ("what to eat after a workout", N),
+    ("what to eat before training", N),
+    ("meal plan for my training days", N),
+    ("post workout meal ideas", N),
+    ("protein intake for lifting", N),
+    ("how many calories do I burn running and how much should I eat", N),
+    ("snacks to eat before the gym", N),
+    ("carb loading before a marathon run", N),
+]
+MIXED_CASES = [
+    (text, expected)
+    for text, expected in ROUTING_CASES
+    if not NUTRITION_WORDS.isdisjoint(_tokens(text))
+    and not TRAINING_WORDS.isdisjoint(_tokens(text))
+]
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    calls = []
+
+    def unavailable(text):
+        calls.append(text)
+        raise ConnectionError("no API in tests")
+
+    monkeypatch.setattr(requestRouter, "classify_with_llm", unavailable)
+    return calls
+
+
+@pytest.mark.parametrize(
+    "text,expected", [case for case in ROUTING_CASES if case not in MIXED_CASES]
+)
+def test_common_goals_route_without_the_llm(offline, text, expected):
+    route = route_request(text)
+    assert route.assistant_type == expected
+    assert route.source == "keywords"
+    assert offline == []
+
+
+# with the LLM down a mixed request is either answered locally, and right, or
+# falls back to the workout planner
+@pytest.mark.parametrize("text,expected", MIXED_CASES)
+def test_mixed_requests_offline(offline, text, expected):
+    _, margin = classify_locally(text)
+    route = route_request(text)
+    if margin >= ROUTER_MARGIN:
+        assert route.assistant_type == expected
+        assert offline == []
+    else:
+        assert route.assistant_type == W
+        assert offline == [text]
+
+
+def test_margin_separates_right_from_wrong():
+    margins = {True: [], False: []}
+    for text, expected in MIXED_CASES:
+        assistant_type, margin = classify_locally(text)
+        margins[assistant_type == expected].append(margin)
+    # every local answer the router keeps is right, and at least half the mixed
+    # requests are answered without the LLM
+    assert max(margins[False]) < ROUTER_MARGIN
+    kept = [margin for margin in margins[True] if margin >= ROUTER_MARGIN]
+    assert len(kept) >= len(MIXED_CASES) / 2
+
+
+def test_unsure_requests_stay_on_workout_when_the_llm_fails(offline):
+    route = route_request("running and eating")
+    assert route.assistant_type == W
+    assert offline == ["running and eating"]
@@ -0,0 +1,324 @@
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+
+import psycopg2.extensions
+
+# spans around database statements, LLM calls, plan parsing and app sections,
+# grouped by the rerun they happened in. turned on with TRACING=1 when the process
+# starts; when it is off span() hands back a shared no-op and the pool keeps the
+# plain psycopg2 cursor, so the only cost left is one flag check per span
+ENABLED = os.getenv("TRACING", "").lower() in ("1", "true", "yes")
+RECENT_RERUNS = 50
+# aggregated metrics are written to these files at most every EXPORT_INTERVAL
+# seconds, at the end of a rerun
+PROMETHEUS_FILE = os.getenv("TRACE_PROMETHEUS_FILE")
+JSONL_FILE = os.getenv("TRACE_JSONL_FILE")
+EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", 10))
+
+_lock = threading.Lock()
+_rerun_ids = itertools.count(1)
+_current = contextvars.ContextVar("tracing_rerun", default=None)
+_recent = deque(maxlen=RECENT_RERUNS)
+_reruns_total = 0
+_last_export = 0.0
+_metrics = defaultdict(
+    lambda: {
+        "count": 0,
+        "seconds": 0.0,
+        "rows": 0,
+        "errors": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+    }
+)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def set_usage(self, usage):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("kind", "name", "attrs", "rerun", "start")
+
+    def __init__(self, kind, name, attrs):
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+        self.rerun = _current.get()
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        with _lock:
+            metric = _metrics[(self.kind, self.name)]
+            metric["count"] += 1
+            metric["seconds"] += seconds
+            metric["errors"] += exc_type is not None
+            for key in ("rows", "prompt_tokens", "completion_tokens"):
+                metric[key] += self.attrs.get(key) or 0
+        if self.rerun is not None:
+            self.rerun["spans"].append(
+                {
+                    "kind": self.kind,
+                    "name": self.name,
+                    "ms": seconds * 1000,
+                    "error": exc_type.__name__ if exc_type else None,
+                    **self.attrs,
+                }
+            )
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    # openai usage objects, from a response or the last chunk of a stream
+    def set_usage(self, usage):
+        if usage is not None:
+            self.attrs["prompt_tokens"] = usage.prompt_tokens
+            self.attrs["completion_tokens"] = usage.completion_tokens
+
+
+# use as `with span("db", "get_all_plans") as s: ... s.set(rows=n)`
+def span(kind, name, **attrs):
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(kind, name, attrs)
+
+
+def current_session_id():
+    # only looked up when streamlit is already loaded, so scripts and benchmarks
+    # that import this module don't pull it in
+    scriptrunner = sys.modules.get("streamlit.runtime.scriptrunner")
+    if scriptrunner is None:
+        return None
+    ctx = scriptrunner.get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+
+# app.py begins a rerun at the top of every full run and ends it at the bottom; a
+# fragment rerunning on its own finds no rerun open and begins one for itself
+def begin_rerun(label):
+    global _reruns_total
+    if not ENABLED:
+        return None
+    rerun = {
+        "id": next(_rerun_ids),
+        "label": label,
+        "session": current_session_id(),
+        "started": time.time(),
+        "start": time.perf_counter(),
+        "seconds": None,
+        "spans": [],
+    }
+    _current.set(rerun)
+    with _lock:
+        _recent.append(rerun)
+        _reruns_total += 1
+    return rerun
+
+
+def end_rerun(rerun):
+    if rerun is None:
+        return
+    rerun["seconds"] = time.perf_counter() - rerun["start"]
+    if _current.get() is rerun:
+        _current.set(None)
+    export_if_due()
+
+
+def current_rerun():
+    return _current.get()
+
+
+# runs `func` in a worker thread with the caller's rerun, so spans opened there
+# (parallel LLM calls) still land in it: pool.submit(in_current_rerun(func), ...).
+# each call gets its own copy, as one Context can't be entered by two threads
+def in_current_rerun(func):
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+
+# psycopg2 cursor that puts a span around every statement, named after the
+# function that issued it. dbPool only uses it when tracing is on
+class TracingCursor(psycopg2.extensions.cursor):
+    def execute(self, query, vars=None):
+        with span("db", _caller()) as s:
+            try:
+                return super().execute(query, vars)
+            finally:
+                s.set(rows=max(self.rowcount, 0))
+
+    def executemany(self, query, vars_list):
+        with span("db", _caller()) as s:
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                s.set(rows=max(self.rowcount, 0))
+
+    def copy_expert(self, sql, file, size=8192):
+        with span("db", _caller()) as s:
+            try:
+                return super().copy_expert(sql, file, size)
+            finally:
+                s.set(rows=max(self.rowcount, 0))
+
+
+def _caller():
+    # skip this module and psycopg2 helpers such as execute_values
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_globals.get("__name__", "").startswith(
+        ("psycopg2", __name__)
+    ):
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+
+
+# [{"kind", "name", "count", "seconds", "rows", "errors", "prompt_tokens",
+# "completion_tokens"}], slowest total first
+def trace_stats():
+    with _lock:
+        rows = [
+            {"kind": kind, "name": name, **metric}
+            for (kind, name), metric in _metrics.items()
+        ]
+    return sorted(rows, key=lambda row: row["seconds"], reverse=True)
+
+
+# one summary per rerun, newest first: where the time went by span kind. other_ms
+# is what is left once queries, LLM calls and parsing are taken out, which is
+# mostly building widgets
+def recent_reruns(session_id=None, limit=10):
+    with _lock:
+        reruns = [
+            r for r in _recent if session_id is None or r["session"] == session_id
+        ]
+    summaries = []
+    for rerun in reversed(reruns[-limit:]):
+        spans = list(rerun["spans"])
+        ms = defaultdict(float)
+        for s in spans:
+            ms[s["kind"]] += s["ms"]
+        total_ms = rerun["seconds"] * 1000 if rerun["seconds"] else None
+        summaries.append(
+            {
+                "rerun": rerun["id"],
+                "label": rerun["label"],
+                "total_ms": total_ms,
+                "db_ms": ms["db"],
+                "queries": sum(s["kind"] == "db" for s in spans),
+                "rows": sum(s.get("rows") or 0 for s in spans if s["kind"] == "db"),
+                "llm_ms": ms["llm"],
+                "tokens": sum(
+                    (s.get("prompt_tokens") or 0) + (s.get("completion_tokens") or 0)
+                    for s in spans
+                ),
+                "parse_ms": ms["parse"],
+                "other_ms": (
+                    total_ms - ms["db"] - ms["llm"] - ms["parse"] if total_ms else None
+                ),
+            }
+        )
+    return summaries
+
+
+def rerun_spans(rerun_id):
+    with _lock:
+        for rerun in _recent:
+            if rerun["id"] == rerun_id:
+                return list(rerun["spans"])
+    return []
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus_text():
+    stats = trace_stats()
+    lines = []
+    for metric, key, help_text in [
+        ("app_span_count_total", "count", "Traced spans"),
+        ("app_span_seconds_total", "seconds", "Seconds spent in traced spans"),
+        ("app_span_rows_total", "rows", "Rows handled: DB rows, parsed plan days"),
+        ("app_span_errors_total", "errors", "Spans that raised"),
+    ]:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for row in stats:
+            labels = f'kind="{_label(row["kind"])}",name="{_label(row["name"])}"'
+            lines.append(f"{metric}{{{labels}}} {row[key]}")
+    lines += [
+        "# HELP app_llm_tokens_total LLM tokens used",
+        "# TYPE app_llm_tokens_total counter",
+    ]
+    for row in stats:
+        if row["prompt_tokens"] or row["completion_tokens"]:
+            for kind in ("prompt", "completion"):
+                lines.append(
+                    f'app_llm_tokens_total{{name="{_label(row["name"])}",'
+                    f'type="{kind}"}} {row[kind + "_tokens"]}'
+                )
+    lines += [
+        "# HELP app_reruns_total Traced app reruns",
+        "# TYPE app_reruns_total counter",
+        f"app_reruns_total {_reruns_total}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def jsonl_line():
+    return json.dumps(
+        {"time": time.time(), "reruns": _reruns_total, "spans": trace_stats()}
+    )
+
+
+# the Prometheus file is replaced whole (for node_exporter's textfile collector);
+# the JSON lines file gets one snapshot appended per export
+def export_if_due(force=False):
+    global _last_export
+    if not (PROMETHEUS_FILE or JSONL_FILE):
+        return
+    with _lock:
+        now = time.monotonic()
+        if not force and now - _last_export < EXPORT_INTERVAL:
+            return
+        _last_export = now
+    if PROMETHEUS_FILE:
+        tmp = f"{PROMETHEUS_FILE}.tmp"
+        with open(tmp, "w") as f:
+            f.write(prometheus_text())
+        os.replace(tmp, PROMETHEUS_FILE)
+    if JSONL_FILE:
+        with open(JSONL_FILE, "a") as f:
+            f.write(jsonl_line() + "\n")
+
+
+def reset_traces():
+    global _reruns_total
+    with _lock:
+        _metrics.clear()
+        _recent.clear()
+        _reruns_total = 0
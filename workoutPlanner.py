@@ -1,8 +1,35 @@
-import openai
-from pydantic import BaseModel, Field
-from typing import Literal, Optional, List
+from psycopg2.extras import execute_values
+from typing import Optional, List
 import json
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime
+from planCache import invalidate_plan, invalidate_progress
+from planPrompts import (
+    day_max_tokens,
+    day_messages,
+    outline_max_tokens,
+    outline_messages,
+    plan_max_tokens,
+    plan_messages,
+    record_usage,
+    repair_max_tokens,
+    repair_messages,
+)
+from tracing import in_current_rerun, span
+from progressActions.progressRollups import refresh_rollups, rollup_added
+
+
+MODEL = "gpt-4o"
+# bump whenever build_workout_prompt changes so cached generations are not reused
+PROMPT_VERSION = 2
+
+# openai and pydantic (planSchemas) take most of a cold start to import, so they
+# are imported inside the functions that call the API or validate its output
 
 
 @dataclass
@@ -12,6 +39,7 @@ class Exercise:
     reps: int
     rest_time: int
     weight: Optional[int] = None
+    id: Optional[int] = None  # workout_exercises.id once saved
 
 
 @dataclass
@@ -19,6 +47,7 @@ class WorkoutDay:
     day_name: str
     focus: str
     exercises: List[Exercise] = None
+    id: Optional[int] = None  # workout_days.id once saved
 
 
 @dataclass
@@ -27,111 +56,480 @@ class WorkoutPlan:
     days_per_week: int = 0
     workout_days: List[WorkoutDay] = None
     user_email: Optional[str] = None
+    id: Optional[int] = None  # workout_plans.id once saved
+    created_at: Optional[datetime] = None
+
+
+# one chat completion within the given output budget, with its token counts
+# recorded in planPrompts.token_stats()
+def create_completion(name, messages, max_tokens, model=MODEL, temperature=0.7):
+    import openai
+
+    with span("llm", name) as s:
+        start = time.perf_counter()
+        response = openai.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_completion_tokens=max_tokens,
+            response_format={"type": "json_object"},
+        )
+        s.set_usage(response.usage)
+        s.set(max_tokens=max_tokens)
+    choice = response.choices[0]
+    record_usage(
+        name,
+        response.usage,
+        time.perf_counter() - start,
+        max_tokens,
+        choice.finish_reason,
+    )
+    return choice.message.content
 
 
-class AssistantType(BaseModel):
-    assistant_type: Literal["workout_planner", "nutrition_planner"] = Field(
-        description="The type of assistance being requested"
+def generate_workout_plan(goal: str, time: int, days: int, max_tokens=None):
+    return create_completion(
+        "generate_workout_plan",
+        plan_messages(goal, time, days),
+        max_tokens or plan_max_tokens(days, time),
     )
-    confidence_score: float = Field(description="Confidence score between 0 and 1")
-    description: str = Field(
-        description="A cleaned up description of the assistance being requested"
+
+
+# pulls each complete object out of the "workout_days" array while the JSON text is
+# still arriving; feed() returns the day dicts that were finished by the new text
+class WorkoutDayStreamParser:
+    def __init__(self):
+        self.text = ""
+        self.done = False  # the closing ] of workout_days has been seen
+        self._pos = None  # scan position, None until the array has started
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._day_start = None
+
+    def _find_array_start(self):
+        key = self.text.find('"workout_days"')
+        if key == -1:
+            return
+        bracket = self.text.find("[", key)
+        if bracket != -1:
+            self._pos = bracket + 1
+
+    def feed(self, chunk):
+        self.text += chunk
+        if self._pos is None:
+            self._find_array_start()
+        if self._pos is None or self.done:
+            return []
+
+        days = []
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._day_start = self._pos
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    days.append(json.loads(text[self._day_start : self._pos + 1]))
+            elif char == "]" and self._depth == 0:
+                self.done = True
+                self._pos += 1
+                break
+            self._pos += 1
+        return days
+
+
+_stream_lock = threading.Lock()
+_stream_stats = {"streams": 0, "days": 0}
+_first_day_times = deque(maxlen=200)  # seconds from request to first parsed day
+_total_times = deque(maxlen=200)
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else None
+
+
+def stream_stats():
+    with _stream_lock:
+        stats = dict(_stream_stats)
+        stats["median_time_to_first_day"] = _median(_first_day_times)
+        stats["median_total_time"] = _median(_total_times)
+        stats["last_time_to_first_day"] = (
+            _first_day_times[-1] if _first_day_times else None
+        )
+    return stats
+
+
+# iterate to get each WorkoutDay as soon as the model finishes writing it; once the
+# loop ends `plan` holds the full parsed WorkoutPlan
+class WorkoutPlanStream:
+    def __init__(self, goal: str, minutes: int, days: int):
+        self.goal = goal
+        self.minutes = minutes
+        self.days = days
+        self.plan = None
+        self.time_to_first_day = None
+        self.total_time = None
+
+    def __iter__(self):
+        import openai
+        from pydantic import ValidationError
+
+        start = time.perf_counter()
+        parser = WorkoutDayStreamParser()
+        day_count = 0
+        max_tokens = plan_max_tokens(self.days, self.minutes)
+        usage = finish_reason = None
+        with span("llm", "WorkoutPlanStream") as s:
+            response = openai.chat.completions.create(
+                model=MODEL,
+                messages=plan_messages(self.goal, self.minutes, self.days),
+                temperature=0.7,
+                max_completion_tokens=max_tokens,
+                response_format={"type": "json_object"},
+                stream=True,
+                # the last chunk then carries the token counts, with no choices
+                stream_options={"include_usage": True},
+            )
+            for chunk in response:
+                s.set_usage(chunk.usage)
+                usage = chunk.usage or usage
+                if not chunk.choices:
+                    continue
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                for day in parser.feed(chunk.choices[0].delta.content or ""):
+                    try:
+                        workout_day = parse_workout_day(day)
+                    except ValidationError:
+                        # left for parse_workout_plan to repair once the stream ends
+                        continue
+                    if self.time_to_first_day is None:
+                        self.time_to_first_day = time.perf_counter() - start
+                    day_count += 1
+                    yield workout_day
+
+        record_usage(
+            "WorkoutPlanStream",
+            usage,
+            time.perf_counter() - start,
+            max_tokens,
+            finish_reason,
+        )
+        self.plan = parse_workout_plan(parser.text)
+        self.total_time = time.perf_counter() - start
+        with _stream_lock:
+            _stream_stats["streams"] += 1
+            _stream_stats["days"] += day_count
+            if self.time_to_first_day is not None:
+                _first_day_times.append(self.time_to_first_day)
+            _total_times.append(self.total_time)
+
+
+def _complete_json(name, messages, max_tokens):
+    return load_json_text(create_completion(name, messages, max_tokens), [])
+
+
+# asks for a short outline of the split first, then writes every day's exercises
+# concurrently, so a 7-day plan takes about as long as the outline plus one day
+def generate_workout_plan_parallel(
+    goal: str, time: int, days: int, max_workers: int = 4
+) -> WorkoutPlan:
+    outline = _complete_json(
+        "plan_outline", outline_messages(goal, time, days), outline_max_tokens(days)
+    )["workout_days"]
+    split = "; ".join(f"{day['day_name']}: {day['focus']}" for day in outline)
+
+    def generate_day(day):
+        messages = day_messages(goal, time, day["day_name"], day["focus"], split)
+        reply = _complete_json("plan_day", messages, day_max_tokens(time))
+        exercises = reply.get("exercises")
+        repairs = []
+        workout_day = _parse_day_or_reask({**day, "exercises": exercises}, repairs)
+        return workout_day, repairs
+
+    workers = max(1, min(max_workers, len(outline)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(in_current_rerun(generate_day), outline))
+
+    _record_parse([repair for _, repairs in results for repair in repairs])
+    return WorkoutPlan(
+        goal=goal,
+        days_per_week=days,
+        workout_days=[workout_day for workout_day, _ in results],
     )
 
 
-def generate_workout_plan(goal: str, time: int, days: int):
-    prompt = build_workout_prompt(goal, days, time)
+class PlanParseError(ValueError):
+    pass
 
-    response = openai.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a fitness trainer looking to help your client achieve their goals.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.7,
-    )
-    return response.choices[0].message.content
-
-
-def build_workout_prompt(goal: str, days: int, minutes: int):
-    return f"""
-    Act as a certified personal trainer. Create a structured weekly workout plan in JSON format only. 
-
-    Details:
-    - Goal: {goal}
-    - Training Days: {days}
-    - Session Length: {minutes} minutes
-    - Assume the user is intermediate to advanced
-
-    Use this exact JSON format:
-    {{
-        "goal": "{goal}",
-        "days_per_week": {days},
-        "workout_days": [
-        {{
-            "day_name": "Day 1",
-            "focus": "Chest & Triceps",
-            "exercises": [
-            {{
-                "name": "Bench Press",
-                "sets": 3,
-                 "reps": 10,
-                "weight": null,
-                "rest_time": 90
-            }}, 
-            ...
-            ]   
-        }},
-        ...
-        ]
-    }}
-
-    Respond ONLY with raw JSON.
-    Do NOT say anything like "Here is your plan" or "Sure, here's your workout".
-    Just return the JSON directly, and nothing else.
-    Do not format it as a code block (no triple backticks).
-
-    """
-
-
-def parse_workout_plan(response: str) -> WorkoutPlan:
-    data = json.loads(response)
-
-    workout_days = []
-    for day in data["workout_days"]:
-        exercises = [
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+# strips code fences and chatter around the JSON object and drops trailing commas;
+# each fix is only tried when the text still doesn't load
+def load_json_text(text, repairs):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise PlanParseError("Response contains no JSON object")
+    if start > 0 or end < len(text.rstrip()) - 1:
+        repairs.append("text around the JSON object removed")
+    text = text[start : end + 1]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    fixed = re.sub(r",\s*([}\]])", r"\1", text)
+    if fixed != text:
+        repairs.append("trailing commas removed")
+    try:
+        return json.loads(fixed)
+    except json.JSONDecodeError as e:
+        raise PlanParseError(f"Response is not valid JSON: {e}") from e
+
+
+def parse_workout_day(day, repairs=None) -> WorkoutDay:
+    from planSchemas import WorkoutDaySchema
+
+    repairs = [] if repairs is None else repairs
+    valid = WorkoutDaySchema.model_validate(day, context={"repairs": repairs})
+    return WorkoutDay(
+        day_name=valid.day_name,
+        focus=valid.focus,
+        exercises=[
             Exercise(
-                name=ex["name"],
-                sets=ex["sets"],
-                reps=ex["reps"],
-                weight=ex.get("weight"),
-                rest_time=ex.get("rest_time"),
+                name=ex.name,
+                sets=ex.sets,
+                reps=ex.reps,
+                rest_time=ex.rest_time,
+                weight=ex.weight,
             )
-            for ex in day["exercises"]
-        ]
+            for ex in valid.exercises
+        ],
+    )
 
-        workout_day = WorkoutDay(
-            day_name=day["day_name"], focus=day.get("focus"), exercises=exercises
-        )
-        workout_days.append(workout_day)
 
+_parse_lock = threading.Lock()
+_parse_stats = {
+    "plans": 0,
+    "clean": 0,  # parsed as returned
+    "repaired": 0,  # fixed locally, no extra request
+    "fragment_reasks": 0,  # single days sent back to the model
+    "full_regenerations": 0,  # whole plan asked for again
+}
+
+
+def _record_parse(repairs):
+    with _parse_lock:
+        _parse_stats["plans"] += 1
+        _parse_stats["repaired" if repairs else "clean"] += 1
+
+
+def parse_stats():
+    with _parse_lock:
+        stats = dict(_parse_stats)
+    plans = stats["plans"] or 1
+    stats["repair_rate"] = stats["repaired"] / plans
+    stats["full_regeneration_rate"] = stats["full_regenerations"] / plans
+    return stats
+
+
+# a day that still fails after local repair is sent back on its own, which costs
+# one short request instead of a whole new plan
+def _parse_day_or_reask(day, repairs, reask=True):
+    from pydantic import ValidationError
+
+    try:
+        return parse_workout_day(day, repairs)
+    except ValidationError as e:
+        if not reask:
+            raise PlanParseError(f"Invalid workout day: {e}") from e
+        error = e
+
+    with _parse_lock:
+        _parse_stats["fragment_reasks"] += 1
+    exercises = day.get("exercises") if isinstance(day, dict) else None
+    fixed = _complete_json(
+        "day_repair",
+        repair_messages(json.dumps(day), error),
+        repair_max_tokens(len(exercises) if isinstance(exercises, list) else 0),
+    )
+    try:
+        return parse_workout_day(fixed, repairs)
+    except ValidationError as e:
+        raise PlanParseError(f"Invalid workout day after retry: {e}") from e
+
+
+def parse_workout_plan(response: str, reask: bool = True) -> WorkoutPlan:
+    with span("parse", "parse_workout_plan") as s:
+        repairs = []
+        data = load_json_text(response, repairs)
+        days = data.get("workout_days") if isinstance(data, dict) else None
+        if not isinstance(days, list):
+            raise PlanParseError("Response has no workout_days list")
+
+        workout_days = []
+        for i, day in enumerate(days):
+            if isinstance(day, dict) and not day.get("day_name"):
+                day = {**day, "day_name": f"Day {i + 1}"}
+                repairs.append("missing day_name filled in")
+            workout_days.append(_parse_day_or_reask(day, repairs, reask=reask))
+
+        days_per_week = data.get("days_per_week")
+        if not isinstance(days_per_week, int) or isinstance(days_per_week, bool):
+            numbers = _NUMBER.findall(str(days_per_week or ""))
+            days_per_week = int(float(numbers[0])) if numbers else len(workout_days)
+            repairs.append(f"days_per_week read as {days_per_week}")
+
+        s.set(rows=len(workout_days), repairs=len(repairs))
+        _record_parse(repairs)
     return WorkoutPlan(
-        goal=data["goal"],
-        days_per_week=data["days_per_week"],
+        goal=data.get("goal") or "",
+        days_per_week=days_per_week,
         workout_days=workout_days,
     )
 
 
+# only when the response can't be salvaged at all is the whole plan requested again
+def generate_and_parse_workout_plan(goal: str, time: int, days: int) -> WorkoutPlan:
+    try:
+        return parse_workout_plan(generate_workout_plan(goal, time, days))
+    except PlanParseError:
+        with _parse_lock:
+            _parse_stats["full_regenerations"] += 1
+        # if the first answer ran out of tokens, the same budget would cut it again
+        max_tokens = plan_max_tokens(days, time) * 2
+        return parse_workout_plan(generate_workout_plan(goal, time, days, max_tokens))
+
+
+# the plan list and whole-plan queries behind appSetup.get_all_plans and
+# get_plan_snapshots; dbMigrations EXPLAINs these same strings
+PLAN_LIST_SQL = """
+    SELECT id, goal, days_per_week, created_at
+    FROM workout_plans
+    WHERE user_email = %(user)s
+    ORDER BY created_at DESC
+"""
+# each row is a plan with its days and their exercises aggregated to JSON by the
+# database, decoded by plan_from_dict. the LEFT JOIN keeps days that have no
+# exercises yet. all of the user's plans, newest first, or just %(plan)s if set
+PLAN_SNAPSHOTS_SQL = """
+    SELECT json_build_object(
+        'id', wp.id,
+        'goal', wp.goal,
+        'days_per_week', wp.days_per_week,
+        'user_email', wp.user_email,
+        'created_at', wp.created_at,
+        'workout_days', COALESCE(days.workout_days, '[]')
+    )
+    FROM workout_plans wp
+    LEFT JOIN LATERAL (
+        SELECT json_agg(
+            json_build_object(
+                'id', d.id,
+                'day_name', d.day_name,
+                'focus', d.focus,
+                'exercises', d.exercises
+            )
+            ORDER BY d.id
+        ) AS workout_days
+        FROM (
+            SELECT wd.id, wd.day_name, wd.focus,
+                   COALESCE(
+                       json_agg(
+                           json_build_object(
+                               'id', we.id,
+                               'name', we.name,
+                               'sets', we.sets,
+                               'reps', we.reps,
+                               'rest_time', we.rest_time,
+                               'weight', we.weight
+                           )
+                           ORDER BY we.id
+                       ) FILTER (WHERE we.id IS NOT NULL),
+                       '[]'
+                   ) AS exercises
+            FROM workout_days wd
+            LEFT JOIN workout_exercises we ON we.day_id = wd.id
+            WHERE wd.plan_id = wp.id
+            GROUP BY wd.id
+        ) d
+    ) days ON TRUE
+    WHERE wp.user_email = %(user)s AND (%(plan)s::int IS NULL OR wp.id = %(plan)s)
+    ORDER BY wp.created_at DESC
+"""
+
+
+# rebuilds a plan from dataclasses.asdict() output or the JSON the plan loader in
+# appSetup aggregates in the database, so both decode the same way
+def plan_from_dict(data) -> WorkoutPlan:
+    created_at = data.get("created_at")
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return WorkoutPlan(
+        goal=data.get("goal", ""),
+        days_per_week=data.get("days_per_week", 0),
+        user_email=data.get("user_email"),
+        id=data.get("id"),
+        created_at=created_at,
+        workout_days=[
+            WorkoutDay(
+                day_name=day["day_name"],
+                focus=day.get("focus"),
+                id=day.get("id"),
+                exercises=[Exercise(**ex) for ex in day.get("exercises") or []],
+            )
+            for day in data.get("workout_days") or []
+        ],
+    )
+
+
 def delete_workout_plan(conn, plan_id):
     try:
         with conn.cursor() as cursor:
+            # the plan's progress goes with it, so those exercises' rollups change
+            cursor.execute(
+                """
+                SELECT DISTINCT user_email, exercise_name
+                FROM workout_progress
+                WHERE plan_id = %s
+                """,
+                (plan_id,),
+            )
+            touched = cursor.fetchall()
             cursor.execute("DELETE FROM workout_plans WHERE id = %s", (plan_id,))
+            for user_email in {user for user, _ in touched}:
+                refresh_rollups(
+                    cursor,
+                    user_email,
+                    [name for user, name in touched if user == user_email],
+                )
         conn.commit()
     except Exception:
         conn.rollback()
+        raise
+    invalidate_plan(plan_id)
+    for user_email in {user for user, _ in touched}:
+        invalidate_progress(user_email)
 
 
 def clear_workout_plan_data(conn, plan_id):
@@ -158,6 +556,7 @@ def clear_workout_plan_data(conn, plan_id):
     )
 
     conn.commit()
+    invalidate_plan(plan_id)
 
 
 def save_workout_plan(plan, conn, plan_id=None):
@@ -206,6 +605,116 @@ def save_workout_plan(plan, conn, plan_id=None):
             )
 
     conn.commit()
+    invalidate_plan(plan_id, plan.user_email)
+
+
+# reserve ids from each table's serial sequence in one round trip, so rows can be
+# inserted with known ids instead of relying on the order RETURNING hands them back
+def allocate_ids(cursor, counts):
+    tables = [table for table, count in counts.items() if count > 0]
+    ids = {table: [] for table in counts}
+    if not tables:
+        return ids
+
+    columns = ", ".join(
+        "ARRAY(SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s))"
+        for _ in tables
+    )
+    params = []
+    for table in tables:
+        params += [table, counts[table]]
+    cursor.execute(f"SELECT {columns}", params)
+    for table, table_ids in zip(tables, cursor.fetchone()):
+        ids[table] = table_ids
+    return ids
+
+
+# same result as save_workout_plan, but a constant 4 statements however big the plan is:
+# plan row, id reservation, one multi-row insert for days, one for exercises
+def save_workout_plan_batched(plan, conn, plan_id=None):
+    days = plan.workout_days or []
+    try:
+        with conn.cursor() as cursor:
+            if plan_id:
+                cursor.execute(
+                    """
+                    UPDATE workout_plans
+                    SET goal = %s,
+                        days_per_week = %s
+                    WHERE id = %s
+                    """,
+                    (plan.goal, plan.days_per_week, plan_id),
+                )
+            else:
+                cursor.execute(
+                    """
+                    INSERT INTO workout_plans (user_email, goal, days_per_week)
+                    VALUES (%s, %s, %s)
+                    RETURNING id
+                    """,
+                    (plan.user_email, plan.goal, plan.days_per_week),
+                )
+                plan_id = cursor.fetchone()[0]
+
+            ids = allocate_ids(
+                cursor,
+                {
+                    "workout_days": len(days),
+                    "workout_exercises": sum(len(day.exercises or []) for day in days),
+                },
+            )
+            day_ids = ids["workout_days"]
+            free_exercise_ids = iter(ids["workout_exercises"])
+
+            day_rows = []
+            exercise_rows = []
+            exercise_ids = []  # one list per day, same order as plan.workout_days
+            for day, day_id in zip(days, day_ids):
+                day_rows.append((day_id, plan_id, day.day_name, day.focus))
+                ids_for_day = []
+                for ex in day.exercises or []:
+                    ex_id = next(free_exercise_ids)
+                    ids_for_day.append(ex_id)
+                    exercise_rows.append(
+                        (
+                            ex_id,
+                            day_id,
+                            ex.name,
+                            ex.sets,
+                            ex.reps,
+                            ex.rest_time,
+                            ex.weight,
+                        )
+                    )
+                exercise_ids.append(ids_for_day)
+
+            # page_size = all rows, so each insert is a single statement
+            if day_rows:
+                execute_values(
+                    cursor,
+                    "INSERT INTO workout_days (id, plan_id, day_name, focus) VALUES %s",
+                    day_rows,
+                    page_size=len(day_rows),
+                )
+            if exercise_rows:
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO workout_exercises (
+                        id, day_id, name, sets, reps, rest_time, weight
+                    )
+                    VALUES %s
+                    """,
+                    exercise_rows,
+                    page_size=len(exercise_rows),
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    invalidate_plan(plan_id, plan.user_email)
+    return plan_id, day_ids, exercise_ids
 
 
 def save_progress(
@@ -226,6 +735,7 @@ def save_progress(
                 user_email, exercise_name, day_name, sets_done, reps_done, weight_used, notes, plan_id
             )
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
         """,
             (
                 user_email,
@@ -238,4 +748,99 @@ def save_progress(
                 plan_id,
             ),
         )
+        rollup_added(cur, user_email, [cur.fetchone()[0]])
         conn.commit()
+    invalidate_progress(user_email)
+
+
+# a whole session in one transaction: one workout_progress row per exercise (sets
+# done, average reps, top weight) and one workout_progress_sets row per set.
+# `entries` is [(exercise_name, [(reps, weight), ...]), ...]; exercises with no
+# sets are skipped. a constant 4 statements: id reservation, two inserts and the
+# rollup update
+def save_session_progress(conn, user_email, plan_id, day_name, entries, notes=""):
+    entries = [(name, sets) for name, sets in entries if sets]
+    if not entries:
+        return []
+    try:
+        with conn.cursor() as cursor:
+            progress_ids = allocate_ids(cursor, {"workout_progress": len(entries)})[
+                "workout_progress"
+            ]
+            progress_rows = []
+            set_rows = []
+            for progress_id, (name, sets) in zip(progress_ids, entries):
+                reps = [r for r, _ in sets]
+                progress_rows.append(
+                    (
+                        progress_id,
+                        user_email,
+                        name,
+                        day_name,
+                        len(sets),
+                        round(sum(reps) / len(reps)),
+                        max(w for _, w in sets),
+                        notes,
+                        plan_id,
+                    )
+                )
+                set_rows += [
+                    (progress_id, number, r, w)
+                    for number, (r, w) in enumerate(sets, start=1)
+                ]
+            execute_values(
+                cursor,
+                """
+                INSERT INTO workout_progress (
+                    id, user_email, exercise_name, day_name, sets_done, reps_done, weight_used, notes, plan_id
+                )
+                VALUES %s
+                """,
+                progress_rows,
+                page_size=len(progress_rows),
+            )
+            execute_values(
+                cursor,
+                "INSERT INTO workout_progress_sets (progress_id, set_number, reps, weight) VALUES %s",
+                set_rows,
+                page_size=len(set_rows),
+            )
+            rollup_added(cursor, user_email, progress_ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    invalidate_progress(user_email)
+    return progress_ids
+
+
+# {exercise_name: [(reps, weight), ...]} from the user's most recent entry for each
+# exercise, in any plan, to prefill the session form; one rollup lookup per name.
+# entries logged one exercise at a time have no set rows, so their summary is
+# repeated sets_done times
+LAST_SESSION_SETS_SQL = """
+    SELECT r.exercise_name, r.latest_sets, r.latest_reps, r.latest_weight,
+           ARRAY(
+               SELECT ARRAY[s.reps, s.weight]
+               FROM workout_progress_sets s
+               WHERE s.progress_id = r.latest_progress_id
+               ORDER BY s.set_number
+           )
+    FROM progress_rollups r
+    WHERE r.user_email = %(user)s AND r.exercise_name = ANY(%(names)s)
+"""
+
+
+def get_last_session_sets(conn, user_email, exercise_names):
+    with conn.cursor() as cur:
+        cur.execute(
+            LAST_SESSION_SETS_SQL,
+            {"user": user_email, "names": list(exercise_names)},
+        )
+        last = {}
+        for name, sets_done, reps_done, weight_used, sets in cur.fetchall():
+            if sets:
+                last[name] = [(r, w) for r, w in sets]
+            else:
+                last[name] = [(reps_done, weight_used)] * (sets_done or 0)
+        return last